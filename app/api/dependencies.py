@@ -1,15 +1,69 @@
 from functools import lru_cache
 
+import httpx
+from openai import AsyncOpenAI
+
+from app.cache.response import ResponseCache
+from app.cache.semantic import SemanticResponseCache
 from app.classifier.base import BaseClassifier
+from app.classifier.cached import CachedClassifier
 from app.classifier.heuristic import HeuristicClassifier
 from app.classifier.hybrid import HybridClassifier
+from app.classifier.learned import LabelLog, LearnedClassifier
 from app.classifier.llm_classifier import LLMClassifier
 from app.config import Settings, get_settings
+from app.llm.http import build_http_client, build_openai_client
 from app.llm.openai_client import OpenAIClient
+from app.llm.pool import EndpointPool, build_endpoint_pools
+from app.llm.ratelimit import RateLimiter
+from app.metrics.persistence import SQLiteMetricsLog
 from app.metrics.store import MetricsStore
+from app.metrics.tracing import TraceExporter, build_exporter
+from app.models import ComplexityLevel
+from app.router.admission import AdmissionController
+from app.router.breaker import CircuitBreaker
+from app.router.ladder import ModelLadder
 from app.router.router import SmartRouter
 
-_metrics_store = MetricsStore()
+
+def _with_cache(classifier: BaseClassifier, settings: Settings) -> BaseClassifier:
+    if not settings.classification_cache_enabled:
+        return classifier
+    return CachedClassifier(
+        classifier,
+        max_entries=settings.classification_cache_max_entries,
+        ttl_seconds=settings.classification_cache_ttl_seconds,
+        max_bytes=settings.classification_cache_max_bytes,
+        on_event=get_metrics_store().record_classification_cache,
+    )
+
+
+@lru_cache
+def get_http_client() -> httpx.AsyncClient:
+    return build_http_client(get_settings())
+
+
+@lru_cache
+def get_openai_client() -> AsyncOpenAI:
+    """One AsyncOpenAI (and connection pool) shared by the classifier and generation."""
+    return build_openai_client(get_settings(), get_http_client())
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter | None:
+    """One limiter shared by classification and generation, which draw on the same quotas."""
+    settings = get_settings()
+    if not settings.rate_limits:
+        return None
+    return RateLimiter(settings.rate_limits, settings.rate_limit_max_wait_ms / 1000)
+
+
+@lru_cache
+def get_label_log() -> LabelLog | None:
+    settings = get_settings()
+    if settings.classification_label_log_path is None:
+        return None
+    return LabelLog(settings.classification_label_log_path)
 
 
 @lru_cache
@@ -17,20 +71,135 @@ def get_classifier() -> BaseClassifier:
     settings = get_settings()
     mode = settings.classifier_mode.lower()
     if mode == "llm":
-        return LLMClassifier(settings)
+        return _with_cache(
+            LLMClassifier(settings, get_openai_client(), get_rate_limiter(), get_label_log()),
+            settings,
+        )
     elif mode == "hybrid":
-        return HybridClassifier(settings)
+        return _with_cache(
+            HybridClassifier(settings, get_openai_client(), get_rate_limiter(), get_label_log()),
+            settings,
+        )
+    elif mode == "learned":
+        return LearnedClassifier.from_path(settings.learned_classifier_path)
     else:
         return HeuristicClassifier()
 
 
+@lru_cache
+def get_endpoint_pools() -> dict[str, EndpointPool]:
+    return build_endpoint_pools(get_settings(), get_http_client())
+
+
 @lru_cache
 def get_llm_client() -> OpenAIClient:
-    return OpenAIClient(get_settings())
+    return OpenAIClient(
+        get_settings(), get_openai_client(), get_rate_limiter(), get_endpoint_pools()
+    )
 
 
+@lru_cache
 def get_metrics_store() -> MetricsStore:
-    return _metrics_store
+    settings = get_settings()
+    return MetricsStore(
+        capacity=settings.metrics_recent_capacity,
+        bucket_seconds=settings.metrics_bucket_seconds,
+        retention_seconds=settings.metrics_retention_seconds,
+        persist=settings.metrics_log_path is not None,
+    )
+
+
+@lru_cache
+def get_metrics_log() -> SQLiteMetricsLog | None:
+    settings = get_settings()
+    if settings.metrics_log_path is None:
+        return None
+    return SQLiteMetricsLog(settings.metrics_log_path, keep_rows=settings.metrics_recent_capacity)
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache | None:
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return None
+    return ResponseCache(
+        max_entries=settings.response_cache_max_entries,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        max_bytes=settings.response_cache_max_bytes,
+        path=settings.response_cache_path,
+    )
+
+
+@lru_cache
+def get_semantic_cache() -> SemanticResponseCache | None:
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    return SemanticResponseCache(
+        thresholds={
+            ComplexityLevel.SYSTEM1: settings.semantic_cache_threshold_system1,
+            ComplexityLevel.SYSTEM2: settings.semantic_cache_threshold_system2,
+        },
+        max_entries=settings.semantic_cache_max_entries,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        max_query_chars=settings.semantic_cache_max_query_chars,
+    )
+
+
+@lru_cache
+def get_tracer() -> TraceExporter | None:
+    settings = get_settings()
+    return build_exporter(
+        settings.trace_exporter, settings.trace_file_path, settings.trace_memory_capacity
+    )
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController | None:
+    settings = get_settings()
+    if settings.admission_max_in_flight <= 0 and not settings.admission_max_in_flight_per_model:
+        return None
+    return AdmissionController(
+        max_in_flight=settings.admission_max_in_flight,
+        per_model=settings.admission_max_in_flight_per_model,
+        queue_timeout_seconds=settings.admission_queue_timeout_ms / 1000,
+        max_queue=settings.admission_max_queue,
+    )
+
+
+@lru_cache
+def get_circuit_breaker() -> CircuitBreaker | None:
+    settings = get_settings()
+    if not settings.circuit_breaker_enabled:
+        return None
+    return CircuitBreaker(
+        window_seconds=settings.circuit_breaker_window_seconds,
+        min_requests=settings.circuit_breaker_min_requests,
+        error_rate_threshold=settings.circuit_breaker_error_rate,
+        slow_call_ms=settings.circuit_breaker_slow_call_ms,
+        open_seconds=settings.circuit_breaker_open_seconds,
+        half_open_probes=settings.circuit_breaker_half_open_probes,
+    )
+
+
+@lru_cache
+def get_model_ladder() -> ModelLadder | None:
+    settings = get_settings()
+    if not settings.routing_tiers:
+        return None
+    return ModelLadder(
+        settings.routing_tiers,
+        get_metrics_store(),
+        settings.model_pricing,
+        objective=settings.routing_objective,
+        latency_slo_ms=settings.routing_latency_slo_ms,
+        max_error_rate=settings.routing_max_error_rate,
+        window_seconds=settings.routing_stats_window_seconds,
+        min_requests=settings.routing_min_requests,
+        refresh_seconds=settings.routing_refresh_seconds,
+        probe_share=settings.routing_probe_share,
+        breaker=get_circuit_breaker(),
+    )
 
 
 @lru_cache
@@ -40,4 +209,10 @@ def get_router() -> SmartRouter:
         llm_client=get_llm_client(),
         metrics_store=get_metrics_store(),
         settings=get_settings(),
+        response_cache=get_response_cache(),
+        semantic_cache=get_semantic_cache(),
+        tracer=get_tracer(),
+        admission=get_admission_controller(),
+        breaker=get_circuit_breaker(),
+        ladder=get_model_ladder(),
     )
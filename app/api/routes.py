@@ -1,11 +1,45 @@
+import json
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from app import __version__
-from app.api.dependencies import get_metrics_store, get_router, get_settings
+from app.api.dependencies import (
+    get_circuit_breaker,
+    get_classifier,
+    get_endpoint_pools,
+    get_metrics_store,
+    get_model_ladder,
+    get_rate_limiter,
+    get_router,
+    get_settings,
+)
+from app.classifier.base import BaseClassifier
 from app.config import Settings
-from app.exceptions import SmartRouterError
+from app.exceptions import (
+    CircuitOpenError,
+    OverloadedError,
+    RateLimitedError,
+    SmartRouterError,
+)
+from app.llm.pool import EndpointPool
+from app.llm.ratelimit import RateLimiter
+from app.metrics import prometheus
 from app.metrics.store import MetricsStore
-from app.models import HealthResponse, MetricsSummary, RouteRequest, RouteResponse
+from app.models import (
+    CircuitState,
+    ClassifyBatchRequest,
+    ClassifyBatchResponse,
+    HealthResponse,
+    MetricsSummary,
+    MetricsTimeSeries,
+    MetricsWindow,
+    RouteRequest,
+    RouteResponse,
+)
+from app.router.breaker import CircuitBreaker
+from app.router.ladder import ModelLadder
 from app.router.router import SmartRouter
 
 router = APIRouter()
@@ -19,29 +53,121 @@ async def route_query(
     """Classify the query, route to the appropriate model, and return the response."""
     try:
         return await smart_router.route(request)
+    except (OverloadedError, RateLimitedError, CircuitOpenError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
     except SmartRouterError as exc:
         raise HTTPException(status_code=502, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Internal error: {exc}")
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/route/stream")
+async def route_query_stream(
+    request: RouteRequest,
+    smart_router: SmartRouter = Depends(get_router),
+):
+    """Like /route, but streams the answer as Server-Sent Events.
+
+    Events: ``classification``, ``delta`` (repeated), optional ``fallback``, then
+    ``done`` with usage and cost, or ``error`` if generation fails.
+    """
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in smart_router.route_stream(request):
+                yield _sse(event, data)
+        except SmartRouterError as exc:
+            yield _sse("error", {"detail": str(exc)})
+        except Exception as exc:
+            yield _sse("error", {"detail": f"Internal error: {exc}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/classify/batch", response_model=ClassifyBatchResponse)
+async def classify_batch(
+    request: ClassifyBatchRequest,
+    classifier: BaseClassifier = Depends(get_classifier),
+):
+    """Classify a batch of queries in one call, without generating answers."""
+    try:
+        results = await classifier.classify_many(request.queries)
+    except SmartRouterError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Internal error: {exc}")
+    return ClassifyBatchResponse(results=results)
+
+
 @router.get("/metrics", response_model=MetricsSummary)
 async def get_metrics(
+    window: MetricsWindow | None = None,
+    metrics_store: MetricsStore = Depends(get_metrics_store),
+    rate_limiter: RateLimiter | None = Depends(get_rate_limiter),
+    breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
+    pools: dict[str, EndpointPool] = Depends(get_endpoint_pools),
+    ladder: ModelLadder | None = Depends(get_model_ladder),
+):
+    """Return aggregated metrics across all requests, or only the trailing window."""
+    summary = metrics_store.get_summary(window)
+    if ladder is not None:
+        summary.routing_tiers = ladder.choices()
+    summary.endpoints = {model: pool.stats() for model, pool in pools.items()}
+    if rate_limiter is not None:
+        summary.rate_limits = rate_limiter.stats()
+    if breaker is not None:
+        summary.circuit_breakers = breaker.stats()
+    return summary
+
+
+@router.get("/metrics/timeseries", response_model=MetricsTimeSeries)
+async def get_metrics_timeseries(
+    window: MetricsWindow = MetricsWindow.HOUR,
     metrics_store: MetricsStore = Depends(get_metrics_store),
 ):
-    """Return aggregated metrics across all requests."""
-    return metrics_store.get_summary()
+    """Return per-bucket rollups (model, complexity, classifier) for the trailing window."""
+    return metrics_store.get_timeseries(window)
+
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_metrics_prometheus(
+    metrics_store: MetricsStore = Depends(get_metrics_store),
+    rate_limiter: RateLimiter | None = Depends(get_rate_limiter),
+    breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
+):
+    """Prometheus text exposition of request counters, latency histograms and in-flight."""
+    text = metrics_store.render_prometheus()
+    if rate_limiter is not None:
+        text += prometheus.render_rate_limits(rate_limiter.stats())
+    if breaker is not None:
+        states = {model: state.value for model, state in breaker.states().items()}
+        text += prometheus.render_circuit_breakers(states)
+    return PlainTextResponse(text, media_type=prometheus.CONTENT_TYPE)
 
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check(
     settings: Settings = Depends(get_settings),
+    breaker: CircuitBreaker | None = Depends(get_circuit_breaker),
 ):
-    """Health check endpoint with configuration summary."""
+    """Health check endpoint with configuration summary.
+
+    ``status`` is ``degraded`` while any model's circuit is open.
+    """
+    circuits = breaker.states() if breaker is not None else {}
     return HealthResponse(
-        status="healthy",
+        status="degraded" if CircuitState.OPEN in circuits.values() else "healthy",
         version=__version__,
         classifier_mode=settings.classifier_mode,
         system1_model=settings.system1_model,
         system2_model=settings.system2_model,
+        circuit_breakers=circuits,
     )
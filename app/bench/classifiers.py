@@ -0,0 +1,337 @@
+"""Microbenchmarks for the classifiers and metric building over a synthetic corpus.
+
+    python -m app.bench.classifiers --out before.json
+    python -m app.bench.classifiers --baseline before.json
+
+Covers HeuristicClassifier.classify, HybridClassifier.classify (with an instant stub
+in place of the LLM) and MetricsCollector.build_metric. The corpus is generated from
+a seed: short greetings, factual lookups, math-heavy text, ~10k-character code dumps
+and adversarial inputs aimed at the heuristic's regexes. Each benchmark/category pair
+reports ns/op and ops/sec (best of --repeats timed runs), plus the median tracemalloc
+peak per call. With --baseline the run fails when any pair is more than --tolerance
+slower (or allocates that much more) than in a previous results file.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from app.classifier.base import BaseClassifier
+from app.classifier.heuristic import HeuristicClassifier
+from app.classifier.hybrid import HybridClassifier
+from app.config import Settings
+from app.llm.base import LLMResponse
+from app.metrics.collector import MetricsCollector
+from app.models import ClassificationResult, ComplexityLevel
+
+logger = logging.getLogger(__name__)
+
+_GREETINGS = [
+    "hi",
+    "Hello!",
+    "hey there",
+    "Good morning",
+    "good evening!",
+    "Thanks!",
+    "thank you",
+    "thx",
+    "Greetings.",
+    "hello?",
+]
+_SUBJECTS = ["France", "Japan", "Brazil", "Kenya", "Canada", "Norway", "Peru", "Egypt"]
+_FACTUAL = [
+    "What is the capital of {s}?",
+    "Who is the president of {s}?",
+    "What's the population of {s}",
+    "Where is {s}?",
+    "Define {w}",
+    "What is {w}?",
+    "Translate '{w}' to Spanish",
+    "When was {s} founded?",
+]
+_WORDS = [
+    "photosynthesis",
+    "entropy",
+    "inflation",
+    "recursion",
+    "latency",
+    "osmosis",
+    "democracy",
+    "gravity",
+    "bandwidth",
+    "mitosis",
+]
+_MATH = [
+    "Solve {a}x^2 + {b}x - {c} = 0 and show each step.",
+    "Calculate the integral of x^{a} * sin({b}x) from 0 to {c}.",
+    (
+        "If P(A) = 0.{a} and P(B|A) = 0.{b}, what is P(A and B)? "
+        "Then compute E[X] for X ~ Bin({c}, 0.{a})."
+    ),
+    "Prove that {a}^n - 1 is divisible by {b} - 1 for all n >= {c}.",
+    "Compute det([[{a}, {b}, {c}], [{c}, {a}, {b}], [{b}, {c}, {a}]]) and the inverse matrix.",
+    "What is ({a} * {b} + {c}) / ({a} - {b}) % {c}? Simplify {a}/{b} + {c}/{a}.",
+]
+_CODE_LINES = [
+    "def {f}({a}, {b}):",
+    "    return {a} * {b} + len({a})",
+    "class {F}({G}):",
+    "    async def {f}(self, {a}: int) -> list[str]:",
+    "        await self.{f}_{b}({a})",
+    "import {a}",
+    "from {a}.{b} import {F}",
+    '    query = "SELECT id, name FROM {a} WHERE {b} = %s"',
+    "    for {a} in range({n}):",
+    "        if {a} % {n} == 0 and {b} >= {n}:",
+    "            {b}[{a}] = {f}({a}) ** 2",
+    "    # TODO: handle {a} when {b} is None",
+    "function {f}({a}) {{ return {a}.map(x => x * {n}); }}",
+]
+_IDENTS = ["items", "cache", "node", "value", "batch", "total", "result", "index", "row", "key"]
+
+
+def _code_dump(rng: random.Random, length: int = 10_000) -> str:
+    lines = ["Why does this crash under load?", "```python"]
+    size = 0
+    while size < length:
+        line = rng.choice(_CODE_LINES).format(
+            f=rng.choice(_IDENTS) + "_" + rng.choice(_IDENTS),
+            F=rng.choice(_IDENTS).title(),
+            G=rng.choice(_IDENTS).title(),
+            a=rng.choice(_IDENTS),
+            b=rng.choice(_IDENTS),
+            n=rng.randint(2, 999),
+        )
+        lines.append(line)
+        size += len(line) + 1
+    lines.append("```")
+    return "\n".join(lines)
+
+
+# Long inputs that hit the heuristic's regexes and scans at their worst: no sentence
+# breaks, SQL verbs without a clause (ASCII and non-ASCII paths), keyword prefixes
+# that never complete, phrase prefixes followed by runs, and digit/symbol floods.
+_ADVERSARIAL = {
+    "unpunctuated_phrase": "how do " + "a " * 5000,
+    "sql_verbs_no_clause": "select " * 1430,
+    "sql_verbs_unicode": "SELECT é " * 1100,
+    "sql_verb_per_line": "select x\n" * 1000,
+    "def_without_paren": "def " + "a" * 10_000,
+    "class_without_colon": "class " + "b" * 10_000,
+    "repeated_def": "def a " * 1700,
+    "translate_overlong": "translate " + "x" * 10_000,
+    "what_is_overlong": "what is the " + "a" * 10_000 + "?" * 100,
+    "whitespace_run": " " * 10_000 + "?",
+    "number_flood": "1 " * 5000,
+    "nested_parens": "(" * 5000 + ")" * 5000,
+    "symbol_flood": "+-*/=<>^%" * 1100,
+    "keyword_prefixes": "step by ste" * 900,
+    "non_ascii_words": "ünïcödé " * 1250,
+}
+
+
+def build_corpus(seed: int = 0) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    return {
+        "greeting": [rng.choice(_GREETINGS) for _ in range(50)],
+        "factual": [
+            rng.choice(_FACTUAL).format(s=rng.choice(_SUBJECTS), w=rng.choice(_WORDS))
+            for _ in range(50)
+        ],
+        "math": [
+            rng.choice(_MATH).format(a=rng.randint(2, 9), b=rng.randint(2, 9), c=rng.randint(2, 99))
+            for _ in range(30)
+        ],
+        "code_dump": [_code_dump(rng) for _ in range(10)],
+        # One category per input, so a regression points at the input that caused it
+        **{f"adversarial/{name}": [text] for name, text in _ADVERSARIAL.items()},
+    }
+
+
+class _StubLLMClassifier(BaseClassifier):
+    """Stands in for the LLM in hybrid mode: answers at once, so only hybrid's own
+    work is timed."""
+
+    @property
+    def name(self) -> str:
+        return "llm"
+
+    async def classify(self, query: str) -> ClassificationResult:
+        return ClassificationResult(
+            complexity=ComplexityLevel.SYSTEM2,
+            confidence=0.9,
+            reasoning="stub",
+            classifier_used=self.name,
+        )
+
+
+def benchmarks() -> dict[str, Callable[[str], object]]:
+    heuristic = HeuristicClassifier()
+    hybrid = HybridClassifier(Settings(api_key="bench"))
+    hybrid.llm_classifier = _StubLLMClassifier()
+    classification = ClassificationResult(
+        complexity=ComplexityLevel.SYSTEM1,
+        confidence=0.8,
+        reasoning="bench",
+        classifier_used="heuristic",
+    )
+    response = LLMResponse(
+        content="ok", model="gpt-4o-mini", prompt_tokens=12, completion_tokens=40, total_tokens=52
+    )
+    pricing = Settings(api_key="bench").model_pricing
+
+    def build_metric(query: str) -> object:
+        return MetricsCollector.build_metric(query, classification, response, 12.5, pricing)
+
+    return {
+        "heuristic.classify": heuristic.classify,
+        "hybrid.classify": hybrid.classify,
+        "collector.build_metric": build_metric,
+    }
+
+
+async def _time(fn: Callable, queries: list[str], loops: int) -> float:
+    """Seconds for ``loops`` passes over ``queries``."""
+    is_async = inspect.iscoroutinefunction(fn)
+    started = time.perf_counter()
+    for _ in range(loops):
+        for query in queries:
+            if is_async:
+                await fn(query)
+            else:
+                fn(query)
+    return time.perf_counter() - started
+
+
+async def _peak_bytes(fn: Callable, queries: list[str]) -> int:
+    """Median tracemalloc peak of a single call, over the queries."""
+    is_async = inspect.iscoroutinefunction(fn)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for query in queries:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            if is_async:
+                await fn(query)
+            else:
+                fn(query)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+
+async def measure(fn: Callable, queries: list[str], min_time: float, repeats: int) -> dict:
+    # Calibrate loops so one timed run lasts at least min_time, as timeit does
+    loops = 1
+    while (elapsed := await _time(fn, queries, loops)) < min_time:
+        loops *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    best = min([elapsed] + [await _time(fn, queries, loops) for _ in range(repeats - 1)])
+    ns_per_op = best / (loops * len(queries)) * 1e9
+    return {
+        "ns_per_op": round(ns_per_op, 1),
+        "ops_per_sec": round(1e9 / ns_per_op, 1),
+        "peak_bytes_per_call": await _peak_bytes(fn, queries),
+    }
+
+
+async def run(
+    corpus: dict[str, list[str]],
+    min_time: float = 0.1,
+    repeats: int = 5,
+    only: list[str] | None = None,
+) -> dict[str, dict[str, dict]]:
+    results: dict[str, dict[str, dict]] = {}
+    for name, fn in benchmarks().items():
+        if only and not any(part in name for part in only):
+            continue
+        results[name] = {
+            category: await measure(fn, queries, min_time, repeats)
+            for category, queries in corpus.items()
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Benchmark/category pairs more than ``tolerance`` slower (or heavier) than baseline."""
+    regressions = []
+    for name, categories in results.items():
+        for category, current in categories.items():
+            base = baseline.get(name, {}).get(category)
+            if base is None:
+                continue
+            for key in ("ns_per_op", "peak_bytes_per_call"):
+                if base[key] and current[key] > base[key] * (1 + tolerance):
+                    regressions.append(
+                        f"{name}[{category}] {key} {current[key]} vs {base[key]} "
+                        f"({current[key] / base[key]:.2f}x)"
+                    )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per timed run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Run benchmarks whose name contains these")
+    parser.add_argument("--dump-corpus", help="Also write the corpus here as JSONL")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    corpus = build_corpus(args.seed)
+    if args.dump_corpus:
+        with open(args.dump_corpus, "w", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps({"category": category, "query": query}) + "\n"
+                for category, queries in corpus.items()
+                for query in queries
+            )
+
+    results = asyncio.run(run(corpus, args.min_time, args.repeats, args.only))
+    for name, categories in results.items():
+        for category, r in categories.items():
+            logger.info(
+                "%-24s %-32s %12.1f ns/op %12.1f ops/s %10d B/call",
+                name,
+                category,
+                r["ns_per_op"],
+                r["ops_per_sec"],
+                r["peak_bytes_per_call"],
+            )
+    output = {
+        "benchmarks": results,
+        "config": {"seed": args.seed, "python": platform.python_version()},
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(output, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline["benchmarks"], args.tolerance)
+        for regression in regressions:
+            logger.error("Regression: %s", regression)
+        if regressions:
+            return 1
+        logger.info(
+            "No regressions against %s (tolerance %.0f%%)", args.baseline, args.tolerance * 100
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
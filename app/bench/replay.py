@@ -0,0 +1,370 @@
+"""Replay a query trace through SmartRouter in-process against a fake LLM client.
+
+    python -m app.bench.replay trace.jsonl --latency-ms 40 --concurrency 32 --out bench.json
+    python -m app.bench.replay trace.jsonl --baseline bench.json
+
+Each trace line is a JSON object with ``query`` (``body`` is accepted too) and
+optionally ``system_prompt``, ``force_model``, ``priority`` and ``interarrival_ms``,
+the recorded gap since the previous line. With recorded gaps the trace is replayed
+open-loop on that schedule (scaled by --speedup); otherwise --concurrency workers send
+requests back to back. The router is built from settings like the server's, except
+that the provider is FakeLLMClient and the classifier must be heuristic or learned.
+
+Reported: throughput, end-to-end and router-overhead latency (end-to-end minus time
+spent in the fake provider), per-stage span latency, and memory allocated per request
+(tracemalloc peak, measured in a separate sequential pass). With --baseline the run
+fails when it is more than --tolerance worse than a previous results file.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from app.api.dependencies import (
+    get_admission_controller,
+    get_circuit_breaker,
+    get_classifier,
+    get_metrics_store,
+    get_model_ladder,
+    get_response_cache,
+    get_semantic_cache,
+    get_settings,
+    get_tracer,
+)
+from app.exceptions import SmartRouterError
+from app.llm.base import BaseLLMClient, LLMResponse
+from app.llm.ratelimit import estimate_tokens
+from app.models import RouteRequest
+from app.router.router import SmartRouter
+
+# Differences below this are timer noise, not regressions
+_NOISE_MS = 0.05
+
+# Time the fake provider spent on the current request; tasks the router spawns for
+# hedging or speculation copy the context, so they add to the same list.
+_provider_ms: contextvars.ContextVar[list[float]] = contextvars.ContextVar("provider_ms")
+
+logger = logging.getLogger(__name__)
+
+
+class FakeLLMClient(BaseLLMClient):
+    """Answers after a log-normally distributed delay with a log-normally distributed
+    number of completion tokens (``*_sigma=0`` makes either constant)."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_sigma: float = 0.0,
+        completion_tokens: int = 200,
+        tokens_sigma: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.completion_tokens = completion_tokens
+        self.tokens_sigma = tokens_sigma
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _sample(self, median: float, sigma: float) -> float:
+        return median * math.exp(self._rng.gauss(0.0, sigma)) if sigma else median
+
+    async def generate(
+        self,
+        query: str,
+        system_prompt: str | None = None,
+        model: str | None = None,
+    ) -> LLMResponse:
+        self.calls += 1
+        started = time.perf_counter()
+        delay_ms = self._sample(self.latency_ms, self.latency_sigma)
+        completion_tokens = max(1, round(self._sample(self.completion_tokens, self.tokens_sigma)))
+        await asyncio.sleep(delay_ms / 1000)
+        prompt_tokens = estimate_tokens(system_prompt or "", query, completion_tokens=0)
+        provider_ms = _provider_ms.get(None)
+        if provider_ms is not None:
+            provider_ms.append((time.perf_counter() - started) * 1000)
+        return LLMResponse(
+            content="lorem " * completion_tokens,
+            model=model or "fake",
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+
+def load_trace(path: str) -> tuple[list[RouteRequest], list[float] | None]:
+    """Requests in order, plus the recorded inter-arrival gaps if every line has one."""
+    requests, gaps = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            requests.append(
+                RouteRequest(
+                    query=record.get("query") or record["body"],
+                    system_prompt=record.get("system_prompt"),
+                    force_model=record.get("force_model"),
+                    priority=record.get("priority", "interactive"),
+                    include_spans=True,
+                )
+            )
+            gaps.append(record.get("interarrival_ms"))
+    if not requests:
+        raise ValueError(f"{path} has no requests")
+    return requests, gaps if all(g is not None for g in gaps) else None
+
+
+def build_router(llm_client: BaseLLMClient) -> SmartRouter:
+    """The router get_router() would build, around ``llm_client`` and with fresh
+    caches, metrics and controllers."""
+    mode = get_settings().classifier_mode.lower()
+    if mode not in ("heuristic", "learned"):
+        raise ValueError(
+            f"CLASSIFIER_MODE={mode} would call the real provider; replay with heuristic or learned"
+        )
+    for getter in (
+        get_metrics_store,
+        get_response_cache,
+        get_semantic_cache,
+        get_admission_controller,
+        get_circuit_breaker,
+        get_model_ladder,
+    ):
+        getter.cache_clear()
+    return SmartRouter(
+        classifier=get_classifier(),
+        llm_client=llm_client,
+        metrics_store=get_metrics_store(),
+        settings=get_settings(),
+        response_cache=get_response_cache(),
+        semantic_cache=get_semantic_cache(),
+        tracer=get_tracer(),
+        admission=get_admission_controller(),
+        breaker=get_circuit_breaker(),
+        ladder=get_model_ladder(),
+    )
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
+
+
+async def replay(
+    router: SmartRouter,
+    requests: list[RouteRequest],
+    gaps_ms: list[float] | None = None,
+    concurrency: int = 32,
+    speedup: float = 1.0,
+) -> dict:
+    """Route every request; open-loop on ``gaps_ms`` (scaled by ``speedup``) if given,
+    else closed-loop with ``concurrency`` workers."""
+    latencies: list[float] = []
+    overheads: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+
+    async def one(request: RouteRequest) -> None:
+        provider_ms: list[float] = []
+        _provider_ms.set(provider_ms)
+        started = time.perf_counter()
+        try:
+            response = await router.route(request)
+        except SmartRouterError as exc:
+            errors[type(exc).__name__] += 1
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        per_stage: dict[str, float] = defaultdict(float)
+        for span in response.spans or ():
+            per_stage[span.name] += span.duration_ms
+        for name, duration_ms in per_stage.items():
+            stages[name].append(duration_ms)
+        latencies.append(elapsed_ms)
+        # Coalesced followers wait on the leader's provider call, made in another task
+        waited_ms = sum(provider_ms) + per_stage.get("coalesced_wait", 0.0)
+        overheads.append(max(elapsed_ms - waited_ms, 0.0))
+
+    started = time.perf_counter()
+    if gaps_ms is not None and speedup > 0:
+        tasks, due = [], started
+        for request, gap_ms in zip(requests, gaps_ms):
+            due += gap_ms / 1000 / speedup
+            await asyncio.sleep(max(due - time.perf_counter(), 0.0))
+            tasks.append(asyncio.create_task(one(request)))
+        await asyncio.gather(*tasks)
+    else:
+        pending = iter(requests)
+
+        async def worker() -> None:
+            for request in pending:
+                await one(request)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": dict(errors),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": _percentiles(latencies),
+        "overhead_ms": _percentiles(overheads),
+        "stages_ms": {name: _percentiles(values) for name, values in sorted(stages.items())},
+    }
+
+
+async def measure_allocations(router: SmartRouter, requests: list[RouteRequest]) -> dict:
+    """Per-request tracemalloc peak (bytes allocated above the starting point), routing
+    one request at a time so peaks are not shared between requests."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for request in requests:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            try:
+                await router.route(request)
+            except SmartRouterError:
+                continue
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "requests": len(peaks),
+        "peak_kib": _percentiles(peaks),
+        "retained_bytes_per_request": round((retained - baseline) / max(len(requests), 1), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of ``results`` against ``baseline``, allowing ``tolerance`` (0.1 = 10%)."""
+    regressions = []
+    base_rps = baseline.get("throughput_rps")
+    if base_rps and results["throughput_rps"] < base_rps * (1 - tolerance):
+        regressions.append(f"throughput_rps {results['throughput_rps']} < baseline {base_rps}")
+
+    checks = [("overhead_ms", "p50"), ("overhead_ms", "p95")]
+    checks += [("stages_ms", name) for name in results.get("stages_ms", {})]
+    checks += [("alloc", "peak_kib")]
+    for section, key in checks:
+        current = results.get(section, {}).get(key)
+        base = baseline.get(section, {}).get(key)
+        if not current or not base:
+            continue
+        if section != "overhead_ms":
+            # Stages and allocations are compared on their medians
+            current, base, key = current.get("p50"), base.get("p50"), f"{key}.p50"
+            if current is None or base is None:
+                continue
+        if current > base * (1 + tolerance) and current - base > _NOISE_MS:
+            regressions.append(f"{section}.{key} {current} > baseline {base}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="JSONL trace of requests")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the trace this many times")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--speedup", type=float, default=1.0, help="Scale recorded gaps; 0 ignores them"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median provider latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Log-normal spread")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Median tokens")
+    parser.add_argument("--tokens-sigma", type=float, default=0.0, help="Log-normal spread")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--alloc-requests", type=int, default=200, help="Requests in the memory pass (0 skips)"
+    )
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Nothing reaches a real provider, but Settings still insists on a key
+    os.environ.setdefault("API_KEY", "replay")
+
+    requests, gaps_ms = load_trace(args.trace)
+    requests *= args.repeat
+    if gaps_ms is not None:
+        gaps_ms *= args.repeat
+
+    def client() -> FakeLLMClient:
+        return FakeLLMClient(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            completion_tokens=args.completion_tokens,
+            tokens_sigma=args.tokens_sigma,
+            seed=args.seed,
+        )
+
+    async def run() -> dict:
+        alloc = None
+        if args.alloc_requests:
+            # Runs first, on its own router, which also warms imports and lazy setup;
+            # the provider answers instantly so only the router's own work is measured
+            fake = FakeLLMClient(0.0, 0.0, args.completion_tokens, args.tokens_sigma, args.seed)
+            alloc = await measure_allocations(build_router(fake), requests[: args.alloc_requests])
+        results = await replay(
+            build_router(client()), requests, gaps_ms, args.concurrency, args.speedup
+        )
+        results["alloc"] = alloc or {}
+        return results
+
+    try:
+        results = asyncio.run(run())
+    except ValueError as exc:
+        logger.error("%s", exc)
+        return 2
+    results["config"] = {
+        "trace": args.trace,
+        "concurrency": args.concurrency,
+        "open_loop": gaps_ms is not None and args.speedup > 0,
+        "latency_ms": args.latency_ms,
+        "latency_sigma": args.latency_sigma,
+        "completion_tokens": args.completion_tokens,
+        "tokens_sigma": args.tokens_sigma,
+        "classifier_mode": get_settings().classifier_mode,
+        "python": platform.python_version(),
+    }
+    print(json.dumps(results, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("config", {}).get("latency_ms") != args.latency_ms:
+            logger.warning("Baseline was recorded with a different --latency-ms")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            logger.error("Regression: %s", regression)
+        if regressions:
+            return 1
+        logger.info(
+            "No regressions against %s (tolerance %.0f%%)", args.baseline, args.tolerance * 100
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
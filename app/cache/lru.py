@@ -0,0 +1,108 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, replace
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?!.,;: "
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, whitespace runs and trailing punctuation so trivial re-wordings share a key."""
+    return _WHITESPACE_RE.sub(" ", query.lower()).strip().rstrip(_TRAILING_PUNCTUATION)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU cache with per-entry TTL and an approximate memory cap.
+
+    ``on_event`` is called with the ``CacheStats`` counter name ("hits", "misses",
+    "evictions" or "expirations") each time one is bumped.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_bytes: int,
+        sizeof: Callable[[V], int] = sys.getsizeof,
+        on_event: Callable[[str], None] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._on_event = on_event
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[Hashable, tuple[V, float, int]] = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _bump(self, event: str) -> None:
+        setattr(self._stats, event, getattr(self._stats, event) + 1)
+        if self._on_event is not None:
+            self._on_event(event)
+
+    def get(self, key: Hashable) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._bump("misses")
+                return None
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats.size_bytes -= size
+                self._bump("expirations")
+                self._bump("misses")
+                return None
+            self._entries.move_to_end(key)
+            self._bump("hits")
+            return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        size = sys.getsizeof(key) + self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.size_bytes -= previous[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self._stats.size_bytes += size
+            while len(self._entries) > self.max_entries or self._stats.size_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._stats.size_bytes -= evicted_size
+                self._bump("evictions")
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return replace(self._stats, entries=len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
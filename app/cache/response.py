@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+
+from app.cache.lru import CacheStats, LRUCache, normalize_query
+from app.llm.base import LLMResponse
+
+
+def _response_size(response: LLMResponse) -> int:
+    return sys.getsizeof(response) + sys.getsizeof(response.content) + sys.getsizeof(response.model)
+
+
+class SQLiteResponseStore:
+    """On-disk response tier so cached answers survive restarts."""
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " content TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL,"
+                " completion_tokens INTEGER NOT NULL,"
+                " total_tokens INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> LLMResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, model, prompt_tokens, completion_tokens, total_tokens"
+                " FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return LLMResponse(*row) if row else None
+
+    def set(self, key: str, response: LLMResponse) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.content,
+                    response.model,
+                    response.prompt_tokens,
+                    response.completion_tokens,
+                    response.total_tokens,
+                    time.time() + self.ttl_seconds,
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Exact-match cache of generated answers, keyed by (model, system prompt, normalized query).
+
+    Lookups hit the in-memory LRU first and fall back to the optional SQLite tier,
+    promoting disk hits back into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_bytes: int,
+        path: str | None = None,
+    ):
+        self.memory: LRUCache[LLMResponse] = LRUCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            sizeof=_response_size,
+        )
+        self.disk = SQLiteResponseStore(path, ttl_seconds) if path else None
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str | None, query: str) -> str:
+        raw = "\x00".join((model, system_prompt or "", normalize_query(query)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, model: str, system_prompt: str | None, query: str) -> LLMResponse | None:
+        key = self.make_key(model, system_prompt, query)
+        response = self.memory.get(key)
+        if response is None and self.disk is not None:
+            response = await asyncio.to_thread(self.disk.get, key)
+            if response is not None:
+                self.memory.set(key, response)
+        return response
+
+    async def set(
+        self,
+        model: str,
+        system_prompt: str | None,
+        query: str,
+        response: LLMResponse,
+    ) -> None:
+        key = self.make_key(model, system_prompt, query)
+        self.memory.set(key, response)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, response)
+
+    def stats(self) -> CacheStats:
+        return self.memory.stats()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+
+import numpy as np
+
+from app.cache.lru import normalize_query
+from app.llm.base import LLMResponse
+from app.models import ComplexityLevel
+
+# Filler words that change phrasing but not the question being asked. Negations, tense
+# ("is" vs "was") and content words are deliberately absent.
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "the",
+        "of",
+        "what",
+        "what's",
+        "whats",
+        "please",
+        "tell",
+        "me",
+        "can",
+        "could",
+        "would",
+        "you",
+    }
+)
+
+# Tokens that flip the answer while barely moving the embedding ("1990" vs "1991",
+# "leap year" vs "non leap year"); a hit needs the same ones, in the same order.
+_EXACT_TOKENS_RE = re.compile(r"\d+(?:[.,:/]\d+)*|\b(?:not|no|non|never|cannot)\b|n['’]t\b")
+
+
+def exact_tokens(query: str) -> tuple[str, ...]:
+    return tuple(_EXACT_TOKENS_RE.findall(normalize_query(query)))
+
+
+class HashedNgramEmbedder:
+    """Dependency-light text embedding: signed hashed character n-grams, L2-normalized.
+
+    Hashes use Python's per-process ``hash``, so vectors are only comparable within
+    one process — fine for an in-memory index.
+    """
+
+    def __init__(self, dim: int = 256, ngram_sizes: tuple[int, ...] = (3, 4, 5)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def embed(self, text: str) -> np.ndarray:
+        words = [w for w in normalize_query(text).split(" ") if w not in _STOPWORDS]
+        padded = f" {' '.join(words)} "
+        grams = [padded[i : i + n] for n in self.ngram_sizes for i in range(len(padded) - n + 1)]
+        hashes = np.fromiter((hash(g) for g in grams), dtype=np.int64, count=len(grams))
+        signs = np.where(hashes & (1 << 40), 1.0, -1.0)
+        vector = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+
+class SemanticIndex:
+    """Approximate nearest-neighbour index using random-hyperplane LSH.
+
+    Vectors live in one preallocated matrix; each of ``n_tables`` hash tables maps an
+    ``n_bits`` sign code to the slots that share it, so a lookup only scores the
+    handful of candidates in matching buckets. Searches also probe the buckets
+    reached by flipping the ``n_probes`` least certain bits, which recovers most
+    near neighbours that land just across a hyperplane. When full, the oldest slot
+    is reused.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int,
+        n_tables: int = 8,
+        n_bits: int = 14,
+        n_probes: int = 2,
+        seed: int = 0,
+    ):
+        self.capacity = capacity
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = n_probes
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((dim, n_tables * n_bits)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(n_bits, dtype=np.int64)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._namespaces = np.zeros(capacity, dtype=np.int64)
+        self._expires_at = np.zeros(capacity, dtype=np.float64)
+        self._payloads: list[object] = [None] * capacity
+        self._slot_buckets: list[list[tuple[int, int, int]]] = [[] for _ in range(capacity)]
+        self._buckets: dict[tuple[int, int, int], set[int]] = {}
+        self._next_slot = 0
+        self._size = 0
+
+    def _project(self, vector: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        projections = (vector @ self._planes).reshape(self.n_tables, self.n_bits)
+        return projections, (projections > 0) @ self._bit_weights
+
+    def _bucket_keys(self, namespace: int, vector: np.ndarray) -> list[tuple[int, int, int]]:
+        _, codes = self._project(vector)
+        return [(namespace, table, int(code)) for table, code in enumerate(codes)]
+
+    def _probe_keys(self, namespace: int, vector: np.ndarray) -> list[tuple[int, int, int]]:
+        projections, codes = self._project(vector)
+        uncertain = np.argsort(np.abs(projections), axis=1)[:, : self.n_probes]
+        flips = self._bit_weights[uncertain]
+        keys = []
+        for table, code in enumerate(codes.tolist()):
+            keys.append((namespace, table, code))
+            keys.extend((namespace, table, code ^ flip) for flip in flips[table].tolist())
+        return keys
+
+    def add(self, namespace: int, vector: np.ndarray, payload: object, ttl_seconds: float) -> None:
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.capacity
+        for key in self._slot_buckets[slot]:
+            bucket = self._buckets[key]
+            bucket.discard(slot)
+            if not bucket:
+                del self._buckets[key]
+        if self._payloads[slot] is None:
+            self._size += 1
+
+        keys = self._bucket_keys(namespace, vector)
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(slot)
+        self._slot_buckets[slot] = keys
+        self._vectors[slot] = vector
+        self._namespaces[slot] = namespace
+        self._expires_at[slot] = time.monotonic() + ttl_seconds
+        self._payloads[slot] = payload
+
+    def search(
+        self, namespace: int, vector: np.ndarray, threshold: float
+    ) -> tuple[object, float] | None:
+        candidates: set[int] = set()
+        for key in self._probe_keys(namespace, vector):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates |= bucket
+        if not candidates:
+            return None
+
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        live = (self._expires_at[slots] > time.monotonic()) & (self._namespaces[slots] == namespace)
+        slots = slots[live]
+        if not len(slots):
+            return None
+        scores = self._vectors[slots] @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return self._payloads[slots[best]], float(scores[best])
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class SemanticResponseCache:
+    """Near-duplicate response cache: paraphrases of a cached query reuse its answer.
+
+    Entries are scoped to (model, system prompt) and to the query's numbers and
+    negations, which must match exactly; the similarity a hit needs is set per
+    complexity tier. Queries longer than ``max_query_chars`` bypass the cache.
+    """
+
+    def __init__(
+        self,
+        thresholds: dict[ComplexityLevel, float],
+        max_entries: int,
+        ttl_seconds: float,
+        dim: int = 256,
+        max_query_chars: int = 512,
+    ):
+        self.thresholds = thresholds
+        self.ttl_seconds = ttl_seconds
+        self.max_query_chars = max_query_chars
+        self.embedder = HashedNgramEmbedder(dim=dim)
+        self.index = SemanticIndex(dim=dim, capacity=max_entries)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _namespace(model: str, system_prompt: str | None, query: str) -> int:
+        return hash((model, system_prompt or "", exact_tokens(query)))
+
+    def get(
+        self,
+        model: str,
+        system_prompt: str | None,
+        query: str,
+        complexity: ComplexityLevel,
+    ) -> LLMResponse | None:
+        if len(query) > self.max_query_chars:
+            return None
+        vector = self.embedder.embed(query)
+        with self._lock:
+            match = self.index.search(
+                self._namespace(model, system_prompt, query), vector, self.thresholds[complexity]
+            )
+        return match[0] if match else None
+
+    def set(
+        self,
+        model: str,
+        system_prompt: str | None,
+        query: str,
+        response: LLMResponse,
+    ) -> None:
+        if len(query) > self.max_query_chars:
+            return
+        vector = self.embedder.embed(query)
+        with self._lock:
+            self.index.add(
+                self._namespace(model, system_prompt, query), vector, response, self.ttl_seconds
+            )
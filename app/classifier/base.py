@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from app.models import ClassificationResult
@@ -7,6 +8,10 @@ class BaseClassifier(ABC):
     @abstractmethod
     async def classify(self, query: str) -> ClassificationResult: ...
 
+    async def classify_many(self, queries: list[str]) -> list[ClassificationResult]:
+        """Classify a batch of queries, preserving input order."""
+        return list(await asyncio.gather(*(self.classify(query) for query in queries)))
+
     @property
     @abstractmethod
     def name(self) -> str: ...
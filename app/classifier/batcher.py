@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[K, T]):
+    """Collects concurrent single-item calls into one ``fn(items)`` call.
+
+    A batch is flushed when it reaches ``max_size`` items or ``window_seconds`` after
+    its first item arrived, whichever comes first. ``fn`` returns one result per item,
+    in order; an exception in place of a result is raised to that item's caller only,
+    and if ``fn`` itself raises, every caller in the batch gets the exception. The batch
+    runs as its own task, so a cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[K]], Awaitable[list[T | Exception]]],
+        max_size: int,
+        window_seconds: float,
+    ):
+        self.fn = fn
+        self.max_size = max_size
+        self.window_seconds = window_seconds
+        self._pending: list[tuple[K, asyncio.Future[T]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: K) -> T:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[K, asyncio.Future[T]]]) -> None:
+        try:
+            results = await self.fn([item for item, _ in batch])
+        except Exception as exc:  # noqa: BLE001
+            # Not swallowed: every caller in the batch re-raises it
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
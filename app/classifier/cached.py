@@ -0,0 +1,78 @@
+import sys
+from collections.abc import Callable
+
+from app.cache.lru import LRUCache, normalize_query
+from app.classifier.base import BaseClassifier
+from app.models import ClassificationResult
+
+
+def _is_fallback(result: ClassificationResult) -> bool:
+    # A fallback answers for a failed classifier; the next request should retry it
+    return result.classifier_used.endswith("heuristic_fallback")
+
+
+def _result_size(result: ClassificationResult) -> int:
+    return (
+        sys.getsizeof(result)
+        + sys.getsizeof(result.reasoning)
+        + sys.getsizeof(result.classifier_used)
+    )
+
+
+class CachedClassifier(BaseClassifier):
+    """Serves repeated queries from an LRU+TTL cache in front of another classifier.
+
+    ``on_event`` receives the cache's hits, misses, evictions and expirations.
+    """
+
+    def __init__(
+        self,
+        classifier: BaseClassifier,
+        max_entries: int,
+        ttl_seconds: float,
+        max_bytes: int,
+        on_event: Callable[[str], None] | None = None,
+    ):
+        self.classifier = classifier
+        self.cache: LRUCache[ClassificationResult] = LRUCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            sizeof=_result_size,
+            on_event=on_event,
+        )
+
+    @property
+    def name(self) -> str:
+        return self.classifier.name
+
+    async def classify(self, query: str) -> ClassificationResult:
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.model_copy()
+
+        result = await self.classifier.classify(query)
+        if not _is_fallback(result):
+            self.cache.set(key, result.model_copy())
+        return result
+
+    async def classify_many(self, queries: list[str]) -> list[ClassificationResult]:
+        keys = [normalize_query(query) for query in queries]
+        results: list[ClassificationResult | None] = []
+        misses: dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            cached = self.cache.get(key) if key not in misses else None
+            if cached is None:
+                misses.setdefault(key, query)
+            results.append(cached)
+
+        if misses:
+            fresh = await self.classifier.classify_many(list(misses.values()))
+            by_key = dict(zip(misses, fresh))
+            for key, result in by_key.items():
+                if not _is_fallback(result):
+                    self.cache.set(key, result.model_copy())
+            results = [r if r is not None else by_key[k] for r, k in zip(results, keys)]
+
+        return [result.model_copy() for result in results]
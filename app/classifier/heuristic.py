@@ -3,6 +3,41 @@ import re
 from app.classifier.base import BaseClassifier
 from app.models import ClassificationResult, ComplexityLevel
 
+_SENTENCE_RE = re.compile(r"[^.!?\s][^.!?]*")
+_MATH_SYMBOLS = "+-*/=<>^%"
+_NUMBER_RE = re.compile(r"\d\d+")
+_SQL_VERBS = ("select ", "insert ", "update ", "delete ")
+_SQL_VERB_RE = re.compile("|".join(_SQL_VERBS))
+_SQL_CLAUSE_RE = re.compile(r" (?:from|into|set)")
+# Same match as _has_sql_statement, for text where lowercasing and IGNORECASE disagree
+_SQL_STATEMENT_PATTERN = (
+    r"(?m:^(?>[^\n]*?(?:select|insert|update|delete) )[^\n]+ (?:from|into|set))"
+)
+
+
+def _compile_any(patterns: list[str], flags: int = 0) -> re.Pattern:
+    """Fold a list of patterns into a single alternation so one search covers all of them."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+def _has_sql_statement(text: str) -> bool:
+    """Equivalent to searching ``(?:SELECT|...) .+ (?:FROM|INTO|SET)`` but linear in ``text``.
+
+    Only the first verb on each line needs checking: any later verb on the same line
+    sees a suffix of the text the first one already saw.
+    """
+    if not any(verb in text for verb in _SQL_VERBS):
+        return False
+    pos = 0
+    while match := _SQL_VERB_RE.search(text, pos):
+        line_end = text.find("\n", match.end())
+        if line_end == -1:
+            line_end = len(text)
+        if _SQL_CLAUSE_RE.search(text, match.end() + 1, line_end):
+            return True
+        pos = line_end + 1
+    return False
+
 
 class HeuristicClassifier(BaseClassifier):
     """Rule-based classifier using keyword matching, structural signals, and query characteristics."""
@@ -31,7 +66,8 @@ class HeuristicClassifier(BaseClassifier):
             r"write (?:a |an |the )?(?:code|program|script|function|class)",
             r"how (?:do|does|would|could|can) .{20,}",
             r"what (?:are the|is the) (?:difference|relationship|impact)",
-            r"(?:pro|con)s? and (?:con|pro)s?",
+            r"pros? and (?:con|pro)s?",
+            r"cons? and (?:con|pro)s?",
             r"build (?:a |an |the )?",
             r"create (?:a |an |the )?(?:system|application|pipeline|framework)",
             r"design (?:a |an |the )?",
@@ -49,20 +85,40 @@ class HeuristicClassifier(BaseClassifier):
             r"^(?:translate|convert) .{1,50}$",
         ]
 
+        # Matched against the lowercased query; SQL statements are detected separately
         self.code_indicators: list[str] = [
             r"```",
             r"def \w+\(",
             r"class \w+[:\(]",
             r"function \w+\(",
             r"import \w+",
-            r"(?:SELECT|INSERT|UPDATE|DELETE) .+ (?:FROM|INTO|SET)",
         ]
 
+        # Compiled once so classify() never touches the pattern cache. Patterns that
+        # start with a literal are kept as separate searches: the regex engine scans
+        # ahead for a literal prefix, which beats stepping an alternation through
+        # every position. Keyword counting uses C-level substring search for the
+        # same reason.
+        self._system1_re = _compile_any(self.system1_patterns)
+        self._system2_phrase_re = _compile_any(self.system2_phrases)
+        self._code_res = tuple(re.compile(p) for p in self.code_indicators)
+        # Non-ASCII text can lowercase differently from how IGNORECASE folds it
+        self._code_unicode_re = _compile_any(
+            [*self.code_indicators, _SQL_STATEMENT_PATTERN], re.IGNORECASE
+        )
+        self._keywords = tuple(sorted(self.system2_keywords))
+
     @property
     def name(self) -> str:
         return "heuristic"
 
     async def classify(self, query: str) -> ClassificationResult:
+        return self._classify(query)
+
+    async def classify_many(self, queries: list[str]) -> list[ClassificationResult]:
+        return [self._classify(query) for query in queries]
+
+    def _classify(self, query: str) -> ClassificationResult:
         query_lower = query.lower().strip()
         score = 0.0
         signals: list[str] = []
@@ -80,14 +136,12 @@ class HeuristicClassifier(BaseClassifier):
             signals.append(f"medium_query({word_count}_words)")
 
         # Signal 2: System 1 pattern match
-        for pattern in self.system1_patterns:
-            if re.search(pattern, query_lower):
-                score -= 0.4
-                signals.append(f"system1_pattern")
-                break
+        if self._system1_re.search(query_lower):
+            score -= 0.4
+            signals.append("system1_pattern")
 
         # Signal 3: System 2 keyword match
-        keyword_hits = sum(1 for kw in self.system2_keywords if kw in query_lower)
+        keyword_hits = sum(kw in query_lower for kw in self._keywords)
         if keyword_hits >= 3:
             score += 0.5
             signals.append(f"system2_keywords({keyword_hits}_hits)")
@@ -96,18 +150,20 @@ class HeuristicClassifier(BaseClassifier):
             signals.append(f"system2_keywords({keyword_hits}_hits)")
 
         # Signal 4: System 2 phrase match
-        for pattern in self.system2_phrases:
-            if re.search(pattern, query_lower):
-                score += 0.35
-                signals.append("system2_phrase")
-                break
+        if self._system2_phrase_re.search(query_lower):
+            score += 0.35
+            signals.append("system2_phrase")
 
         # Signal 5: Code detection
-        for pattern in self.code_indicators:
-            if re.search(pattern, query, re.IGNORECASE):
-                score += 0.4
-                signals.append("code_detected")
-                break
+        if query.isascii():
+            code_detected = any(p.search(query_lower) for p in self._code_res) or (
+                _has_sql_statement(query_lower)
+            )
+        else:
+            code_detected = self._code_unicode_re.search(query) is not None
+        if code_detected:
+            score += 0.4
+            signals.append("code_detected")
 
         # Signal 6: Question complexity
         question_marks = query.count("?")
@@ -115,13 +171,13 @@ class HeuristicClassifier(BaseClassifier):
             score += 0.2
             signals.append(f"multi_question({question_marks})")
 
-        sentences = [s.strip() for s in re.split(r"[.!?]+", query) if s.strip()]
-        if len(sentences) >= 4:
+        sentence_count = len(_SENTENCE_RE.findall(query))
+        if sentence_count >= 4:
             score += 0.15
-            signals.append(f"multi_sentence({len(sentences)})")
+            signals.append(f"multi_sentence({sentence_count})")
 
         # Signal 7: Math content
-        math_symbols = len(re.findall(r"[+\-*/=<>^%]|\d{2,}", query))
+        math_symbols = sum(map(query.count, _MATH_SYMBOLS)) + len(_NUMBER_RE.findall(query))
         if math_symbols >= 3:
             score += 0.3
             signals.append(f"math_content({math_symbols}_symbols)")
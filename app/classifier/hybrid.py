@@ -1,16 +1,26 @@
+from openai import AsyncOpenAI
+
 from app.classifier.base import BaseClassifier
 from app.classifier.heuristic import HeuristicClassifier
-from app.classifier.llm_classifier import LLMClassifier
+from app.classifier.learned import LabelLog
+from app.classifier.llm_classifier import CLASSIFIER_ERRORS, LLMClassifier
 from app.config import Settings
+from app.llm.ratelimit import RateLimiter
 from app.models import ClassificationResult
 
 
 class HybridClassifier(BaseClassifier):
     """Heuristic first; if confidence is low, escalates to LLM classifier."""
 
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        client: AsyncOpenAI | None = None,
+        rate_limiter: RateLimiter | None = None,
+        label_log: LabelLog | None = None,
+    ):
         self.heuristic = HeuristicClassifier()
-        self.llm_classifier = LLMClassifier(settings)
+        self.llm_classifier = LLMClassifier(settings, client, rate_limiter, label_log)
         self.confidence_threshold = settings.confidence_threshold
 
     @property
@@ -28,6 +38,28 @@ class HybridClassifier(BaseClassifier):
             llm_result = await self.llm_classifier.classify(query)
             llm_result.classifier_used = "hybrid/llm"
             return llm_result
-        except Exception:
+        except CLASSIFIER_ERRORS:
             heuristic_result.classifier_used = "hybrid/heuristic_fallback"
             return heuristic_result
+
+    async def classify_many(self, queries: list[str]) -> list[ClassificationResult]:
+        results = await self.heuristic.classify_many(queries)
+
+        # Only the low-confidence subset is escalated to the LLM
+        escalated = list(
+            dict.fromkeys(
+                query
+                for query, result in zip(queries, results)
+                if result.confidence < self.confidence_threshold
+            )
+        )
+        by_query = dict(zip(escalated, await self.llm_classifier.classify_each(escalated)))
+
+        for i, (query, result) in enumerate(zip(queries, results)):
+            if result.confidence >= self.confidence_threshold:
+                result.classifier_used = "hybrid/heuristic"
+            elif isinstance(by_query[query], Exception):
+                result.classifier_used = "hybrid/heuristic_fallback"
+            else:
+                results[i] = by_query[query].model_copy(update={"classifier_used": "hybrid/llm"})
+        return results
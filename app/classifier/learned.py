@@ -0,0 +1,221 @@
+import json
+import logging
+import math
+import re
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from itertools import pairwise
+from pathlib import Path
+
+import numpy as np
+
+from app.classifier.base import BaseClassifier
+from app.exceptions import ConfigurationError
+from app.models import ClassificationResult, ComplexityLevel
+
+# File layout: MAGIC, uint16 format version, uint32 header length, JSON header, zero
+# padding to a 64-byte boundary, then ``dim`` little-endian float32 weights.
+MAGIC = b"SLRCLF"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<6sHI")
+_ALIGN = 64
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(z: float) -> float:
+    return 1.0 / (1.0 + math.exp(-max(min(z, 30.0), -30.0)))
+
+
+@dataclass
+class FeatureConfig:
+    dim: int = 1 << 18
+    char_ngrams: tuple[int, int] = (3, 5)
+    # Character n-grams only look at the start of long queries
+    max_chars: int = 1000
+
+    def to_dict(self) -> dict:
+        return {"dim": self.dim, "char_ngrams": list(self.char_ngrams), "max_chars": self.max_chars}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureConfig":
+        return cls(data["dim"], tuple(data["char_ngrams"]), data["max_chars"])
+
+
+# Seeding crc32 with the hash of a kind prefix equals hashing prefix + feature, without
+# building the prefixed string
+_LENGTH, _WORD, _BIGRAM, _CHAR = (zlib.crc32(p) for p in (b"len:", b"w:", b"b:", b"c:"))
+
+
+def vectorize(text: str, config: FeatureConfig) -> tuple[np.ndarray, np.ndarray]:
+    """Sparse feature vector: hashed indices and L2-normalised log counts.
+
+    Features are a length bucket, words, word bigrams and byte n-grams of the
+    normalised text. crc32 keeps the hashing stable across processes (``hash()`` is
+    salted per run), so a model trained offline sees the same indices at serving time.
+    """
+    crc32 = zlib.crc32
+    text = " ".join(text.lower().split())
+    words = [w.encode() for w in _WORD_RE.findall(text)]
+    hashes = [crc32(str(min(len(words) // 5, 20)).encode(), _LENGTH)]
+    hashes += [crc32(w, _WORD) for w in words]
+    hashes += [crc32(a + b" " + b, _BIGRAM) for a, b in pairwise(words)]
+    data = f" {text[: config.max_chars]} ".encode()
+    low, high = config.char_ngrams
+    for n in range(low, high + 1):
+        hashes += [crc32(data[i : i + n], _CHAR) for i in range(len(data) - n + 1)]
+    indices, counts = np.unique(
+        np.array(hashes, dtype=np.int64) & (config.dim - 1), return_counts=True
+    )
+    values = 1.0 + np.log(counts, dtype=np.float32)
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+@dataclass
+class LinearModel:
+    weights: np.ndarray
+    bias: float
+    features: FeatureConfig
+    # Everything else from the file header (model_version, trained_at, accuracy, ...)
+    metadata: dict = field(default_factory=dict)
+
+    def probability(self, text: str) -> float:
+        """P(system2) for ``text``."""
+        indices, values = vectorize(text, self.features)
+        return _sigmoid(float(self.weights[indices] @ values) + self.bias)
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get("model_version", "unknown")
+
+
+def save_model(model: LinearModel, path: str | Path) -> None:
+    header = {
+        **model.metadata,
+        "format_version": FORMAT_VERSION,
+        "bias": model.bias,
+        "features": model.features.to_dict(),
+    }
+    header_bytes = json.dumps(header).encode()
+    offset = _PREFIX.size + len(header_bytes)
+    padding = -offset % _ALIGN
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        f.write(np.asarray(model.weights, dtype="<f4").tobytes())
+
+
+def load_model(path: str | Path) -> LinearModel:
+    """Read the header and memory-map the weights (pages load on first use, shared
+    between worker processes)."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ConfigurationError(f"{path} is not a learned classifier model")
+            if version != FORMAT_VERSION:
+                raise ConfigurationError(
+                    f"{path} has model format {version}; this build reads {FORMAT_VERSION}"
+                )
+            header = json.loads(f.read(header_len))
+        features = FeatureConfig.from_dict(header.pop("features"))
+        bias = header.pop("bias")
+        offset = _PREFIX.size + header_len
+        offset += -offset % _ALIGN
+        weights = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(features.dim,))
+    # ValueError covers a corrupt JSON header and weights truncated short of features.dim
+    except (OSError, struct.error, ValueError, KeyError) as exc:
+        raise ConfigurationError(f"Cannot read learned classifier model {path}: {exc}") from exc
+    return LinearModel(weights=weights, bias=bias, features=features, metadata=header)
+
+
+def train(
+    queries: list[str],
+    labels: list[ComplexityLevel],
+    features: FeatureConfig | None = None,
+    epochs: int = 10,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+    seed: int = 0,
+) -> LinearModel:
+    """Logistic regression (system2 = 1) fitted with per-example AdaGrad."""
+    features = features or FeatureConfig()
+    examples = [vectorize(q, features) for q in queries]
+    targets = np.array([label == ComplexityLevel.SYSTEM2 for label in labels], dtype=np.float32)
+    weights = np.zeros(features.dim, dtype=np.float32)
+    squared = np.zeros(features.dim, dtype=np.float32)
+    bias, bias_squared = 0.0, 0.0
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        for i in rng.permutation(len(examples)):
+            indices, values = examples[i]
+            error = _sigmoid(float(weights[indices] @ values) + bias) - targets[i]
+            grad = error * values + l2 * weights[indices]
+            squared[indices] += grad * grad
+            weights[indices] -= learning_rate * grad / (np.sqrt(squared[indices]) + 1e-8)
+            bias_squared += error * error
+            bias -= learning_rate * error / (math.sqrt(bias_squared) + 1e-8)
+    return LinearModel(weights=weights, bias=float(bias), features=features)
+
+
+class LearnedClassifier(BaseClassifier):
+    """Local linear model over hashed n-grams, trained offline on LLM-classifier labels.
+
+    No API calls and no I/O per query; cost is one pass over the query's n-grams.
+    """
+
+    def __init__(self, model: LinearModel):
+        self.model = model
+
+    @classmethod
+    def from_path(cls, path: str | Path) -> "LearnedClassifier":
+        return cls(load_model(path))
+
+    @property
+    def name(self) -> str:
+        return "learned"
+
+    async def classify(self, query: str) -> ClassificationResult:
+        p = self.model.probability(query)
+        return ClassificationResult(
+            complexity=ComplexityLevel.SYSTEM2 if p >= 0.5 else ComplexityLevel.SYSTEM1,
+            confidence=round(max(p, 1.0 - p), 4),
+            reasoning=f"Learned model {self.model.version}: P(system2)={p:.2f}",
+            classifier_used=self.name,
+        )
+
+
+class LabelLog:
+    """Appends classifications as JSON lines, the training input for ``learned`` mode."""
+
+    def __init__(self, path: str):
+        # Held open for the log's lifetime and closed by close() at shutdown
+        self._file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+        self._lock = threading.Lock()
+
+    def write(self, query: str, result: ClassificationResult, model: str) -> None:
+        line = json.dumps(
+            {
+                "timestamp": time.time(),
+                "query": query,
+                "complexity": result.complexity.value,
+                "confidence": result.confidence,
+                "model": model,
+            }
+        )
+        try:
+            with self._lock:
+                self._file.write(line + "\n")
+        except OSError:
+            logger.exception("Failed to write classification label")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
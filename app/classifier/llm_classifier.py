@@ -1,9 +1,16 @@
+import asyncio
 import json
+import logging
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, OpenAIError
 
 from app.classifier.base import BaseClassifier
+from app.classifier.batcher import MicroBatcher
+from app.classifier.heuristic import HeuristicClassifier
+from app.classifier.learned import LabelLog
 from app.config import Settings
+from app.exceptions import ClassificationError, RateLimitedError
+from app.llm.ratelimit import RateLimiter, estimate_tokens
 from app.models import ClassificationResult, ComplexityLevel
 
 CLASSIFICATION_PROMPT = """You are a query complexity classifier. Analyze the user's query and determine if it requires:
@@ -13,42 +20,168 @@ CLASSIFICATION_PROMPT = """You are a query complexity classifier. Analyze the us
 Respond with ONLY valid JSON:
 {"complexity": "system1" or "system2", "confidence": 0.0-1.0, "reasoning": "brief explanation"}"""
 
+BATCH_CLASSIFICATION_PROMPT = """You are a query complexity classifier. The user message is a JSON array of {"id": ..., "query": ...} items. Classify each query as:
+- "system1": Simple, factual, or routine (greetings, lookups, definitions, translations, simple Q&A)
+- "system2": Complex reasoning, analysis, coding, math, multi-step problems, creative writing, detailed explanations
+
+Respond with ONLY valid JSON, one result per item:
+{"results": [{"id": <item id>, "complexity": "system1" or "system2", "confidence": 0.0-1.0, "reasoning": "brief explanation"}]}"""
+
+# Completion budget per classified query
+MAX_TOKENS = 150
+
+# Expected failures of one classification; callers fall back to the heuristic on these
+CLASSIFIER_ERRORS = (ClassificationError, RateLimitedError)
+
+logger = logging.getLogger(__name__)
+
 
 class LLMClassifier(BaseClassifier):
-    def __init__(self, settings: Settings):
-        self.client = AsyncOpenAI(
+    def __init__(
+        self,
+        settings: Settings,
+        client: AsyncOpenAI | None = None,
+        rate_limiter: RateLimiter | None = None,
+        label_log: LabelLog | None = None,
+    ):
+        self.client = client or AsyncOpenAI(
             api_key=settings.api_key,
             base_url=settings.api_base_url,
         )
         self.model = settings.classifier_model
+        self.rate_limiter = rate_limiter
+        self.label_log = label_log
+        self.max_concurrency = max(1, settings.classify_batch_concurrency)
+        self._heuristic = HeuristicClassifier()
+        # Concurrent classify() calls share one provider call of up to batch_size queries
+        self._batcher: MicroBatcher[str, ClassificationResult] | None = None
+        if settings.classifier_batch_size > 1:
+            self._batcher = MicroBatcher(
+                self._classify_batch,
+                max_size=settings.classifier_batch_size,
+                window_seconds=settings.classifier_batch_window_ms / 1000,
+            )
 
     @property
     def name(self) -> str:
         return "llm"
 
     async def classify(self, query: str) -> ClassificationResult:
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": CLASSIFICATION_PROMPT},
-                {"role": "user", "content": query},
-            ],
-            temperature=0.0,
-            max_tokens=150,
-            response_format={"type": "json_object"},
-        )
+        if self._batcher is not None:
+            return await self._batcher.submit(query)
+        return await self._classify_one(query)
 
-        result = json.loads(response.choices[0].message.content)
+    async def _complete(self, system_prompt: str, content: str, max_tokens: int) -> str:
+        reservation = None
+        if self.rate_limiter is not None:
+            reservation = await self.rate_limiter.acquire(
+                self.model,
+                estimate_tokens(system_prompt, content, completion_tokens=max_tokens),
+            )
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content},
+                ],
+                temperature=0.0,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"},
+            )
+        except OpenAIError as exc:
+            raise ClassificationError(f"Classifier call to {self.model} failed: {exc}") from exc
+        if reservation is not None and response.usage is not None:
+            reservation.settle(response.usage.total_tokens)
+        return response.choices[0].message.content
 
+    def _result(self, query: str, result: dict) -> ClassificationResult:
         complexity = (
             ComplexityLevel.SYSTEM2
             if result["complexity"] == "system2"
             else ComplexityLevel.SYSTEM1
         )
 
-        return ClassificationResult(
+        classification = ClassificationResult(
             complexity=complexity,
             confidence=float(result.get("confidence", 0.8)),
             reasoning=result.get("reasoning", ""),
             classifier_used=self.name,
         )
+        if self.label_log is not None:
+            self.label_log.write(query, classification, self.model)
+        return classification
+
+    async def _classify_one(self, query: str) -> ClassificationResult:
+        content = await self._complete(CLASSIFICATION_PROMPT, query, MAX_TOKENS)
+        try:
+            return self._result(query, json.loads(content))
+        except (ValueError, KeyError, TypeError) as exc:
+            raise ClassificationError(f"Malformed classification from {self.model}") from exc
+
+    async def _classify_batch(self, queries: list[str]) -> list[ClassificationResult | Exception]:
+        unique = list(dict.fromkeys(queries))
+        if len(unique) == 1:
+            result = await self._classify_one(unique[0])
+            return [result.model_copy() for _ in queries]
+
+        content = await self._complete(
+            BATCH_CLASSIFICATION_PROMPT,
+            json.dumps([{"id": i, "query": query} for i, query in enumerate(unique)]),
+            MAX_TOKENS * len(unique),
+        )
+        by_query: dict[str, ClassificationResult | Exception] = {}
+        try:
+            for item in json.loads(content)["results"]:
+                if not isinstance(item["id"], int) or not 0 <= item["id"] < len(unique):
+                    raise ValueError(f"unknown batch item id {item['id']!r}")
+                query = unique[item["id"]]
+                if query not in by_query:
+                    by_query[query] = self._result(query, item)
+        except (ValueError, KeyError, TypeError):
+            # Keep whatever parsed before the malformed item; the rest go one by one
+            pass
+        missing = [query for query in unique if query not in by_query]
+        if missing:
+            logger.warning(
+                "Batch classification answered %d of %d queries; retrying the rest singly",
+                len(unique) - len(missing),
+                len(unique),
+            )
+            # One failed retry only fails the callers waiting on that query
+            retried = await asyncio.gather(
+                *(self._classify_one(query) for query in missing), return_exceptions=True
+            )
+            by_query.update(zip(missing, retried))
+        return [
+            outcome if isinstance(outcome, Exception) else outcome.model_copy()
+            for outcome in (by_query[query] for query in queries)
+        ]
+
+    async def classify_each(self, queries: list[str]) -> list[ClassificationResult | Exception]:
+        """One result per query, or the CLASSIFIER_ERRORS exception that query failed with.
+
+        At most ``max_concurrency`` classifications are in flight at once.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(query: str) -> ClassificationResult | Exception:
+            async with semaphore:
+                try:
+                    return await self.classify(query)
+                except CLASSIFIER_ERRORS as exc:
+                    return exc
+
+        return list(await asyncio.gather(*(one(query) for query in queries)))
+
+    async def classify_many(self, queries: list[str]) -> list[ClassificationResult]:
+        # Identical queries in a batch share one provider call
+        unique = list(dict.fromkeys(queries))
+        by_query = dict(zip(unique, await self.classify_each(unique)))
+        for query, outcome in by_query.items():
+            if isinstance(outcome, Exception):
+                logger.warning("LLM classification failed, using the heuristic: %s", outcome)
+                fallback = await self._heuristic.classify(query)
+                fallback.classifier_used = "llm/heuristic_fallback"
+                by_query[query] = fallback
+        return [by_query[query].model_copy() for query in queries]
@@ -0,0 +1,113 @@
+"""Train the ``learned`` classifier from labeled query logs.
+
+    python -m app.classifier.train labels.jsonl more.jsonl --out models/classifier.bin
+
+Each input line is a JSON object with ``query`` and ``complexity`` (``system1`` or
+``system2``; ``label`` is accepted too), such as the lines written to
+CLASSIFICATION_LABEL_LOG_PATH by the LLM classifier. Lines without both are skipped.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.classifier.learned import FeatureConfig, save_model, train
+from app.models import ComplexityLevel
+
+logger = logging.getLogger(__name__)
+
+
+def load_examples(
+    paths: list[str], min_confidence: float = 0.0
+) -> tuple[list[str], list[ComplexityLevel]]:
+    # Later lines win, so a query relabeled in a newer log keeps only its newest label
+    examples: dict[str, ComplexityLevel] = {}
+    skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    query = record["query"]
+                    label = ComplexityLevel(record.get("complexity") or record["label"])
+                    # Absent means hand-labeled; null means unknown and fails any minimum
+                    confidence = record.get("confidence", 1.0)
+                    confidence = 0.0 if confidence is None else float(confidence)
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                if confidence < min_confidence or not query.strip():
+                    skipped += 1
+                    continue
+                examples[query] = label
+    if skipped:
+        logger.info("Skipped %d line(s) without a usable query and label", skipped)
+    return list(examples), list(examples.values())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="JSONL files of labeled queries")
+    parser.add_argument("--out", required=True, help="Model file to write")
+    parser.add_argument("--model-version", help="Stored in the file (default: timestamp)")
+    parser.add_argument("--min-confidence", type=float, default=0.0)
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fraction kept for eval")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--dim-bits", type=int, default=18, help="Hash space is 2**bits")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    queries, labels = load_examples(args.inputs, args.min_confidence)
+    if len(set(labels)) < 2:
+        logger.error("Need examples of both system1 and system2; found %d example(s)", len(queries))
+        return 1
+
+    order = np.random.default_rng(args.seed).permutation(len(queries))
+    n_eval = int(len(queries) * args.holdout)
+    eval_idx, train_idx = order[:n_eval], order[n_eval:]
+    features = FeatureConfig(dim=1 << args.dim_bits)
+    started = time.perf_counter()
+    model = train(
+        [queries[i] for i in train_idx],
+        [labels[i] for i in train_idx],
+        features=features,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        seed=args.seed,
+    )
+    logger.info("Trained on %d example(s) in %.1fs", len(train_idx), time.perf_counter() - started)
+
+    accuracy = None
+    if n_eval:
+        correct = sum(
+            (model.probability(queries[i]) >= 0.5) == (labels[i] == ComplexityLevel.SYSTEM2)
+            for i in eval_idx
+        )
+        accuracy = correct / n_eval
+        logger.info("Holdout accuracy: %.3f on %d example(s)", accuracy, n_eval)
+
+    model.metadata = {
+        "model_version": args.model_version or time.strftime("%Y%m%d-%H%M%S"),
+        "trained_at": time.time(),
+        "examples": len(train_idx),
+        "holdout_examples": n_eval,
+        "holdout_accuracy": accuracy,
+        "label_counts": {
+            level.value: sum(label == level for label in labels) for level in ComplexityLevel
+        },
+    }
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    save_model(model, args.out)
+    logger.info("Wrote model %s to %s", model.version, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
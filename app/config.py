@@ -18,24 +18,245 @@ class Settings(BaseSettings):
         description="OpenAI-compatible API base URL",
     )
 
+    # HTTP connection pool shared by all provider calls
+    http_max_connections: int = Field(default=100)
+    http_max_keepalive_connections: int = Field(default=20)
+    http_keepalive_expiry_seconds: float = Field(default=60.0)
+    http_connect_timeout_seconds: float = Field(default=5.0)
+    http_read_timeout_seconds: float = Field(default=60.0)
+    http2: bool = Field(default=False, description="Requires the 'h2' package (extra: http2)")
+    http_warmup_connections: int = Field(
+        default=2,
+        description="Connections opened to the provider at startup; 0 disables warm-up",
+    )
+
+    # Endpoint pools: spread a logical model over several keys/gateways
+    endpoint_pools: dict[str, list[dict[str, str]]] = Field(
+        default_factory=dict,
+        description=(
+            'Per-model endpoint lists, e.g. {"gpt-4o-mini": [{"base_url": "...", '
+            '"api_key": "...", "model": "provider-side name", "name": "label"}]}'
+        ),
+    )
+    endpoint_selection: str = Field(
+        default="ewma",
+        description="Pool member selection: ewma (latency-aware) or least_outstanding",
+    )
+    endpoint_eject_after_failures: int = Field(
+        default=3,
+        description="Consecutive failures before an endpoint is taken out of rotation",
+    )
+    endpoint_eject_seconds: float = Field(
+        default=30.0,
+        description="How long an ejected endpoint sits out before it is tried again",
+    )
+
     # Classifier settings
     classifier_mode: str = Field(
         default="heuristic",
-        description="Classification strategy: heuristic | llm | hybrid",
+        description="Classification strategy: heuristic | llm | hybrid | learned",
+    )
+    learned_classifier_path: str = Field(
+        default="models/classifier.bin",
+        description="Model file for learned mode (see python -m app.classifier.train)",
+    )
+    classification_label_log_path: str | None = Field(
+        default=None,
+        description="Append every LLM classification here as training data for learned mode",
     )
     confidence_threshold: float = Field(
         default=0.7,
         description="Hybrid classifier: confidence below this triggers LLM classification",
     )
+    classifier_batch_size: int = Field(
+        default=1,
+        description="llm/hybrid: classify up to this many concurrent queries per provider call",
+    )
+    classifier_batch_window_ms: float = Field(
+        default=10.0,
+        description="How long a partial classification batch waits for more queries",
+    )
+    classify_batch_concurrency: int = Field(
+        default=8,
+        description="llm/hybrid: most classifications one /classify/batch request runs at once",
+    )
+
+    # Classification cache (llm and hybrid modes)
+    classification_cache_enabled: bool = Field(
+        default=True,
+        description="Cache classifier results by normalized query text",
+    )
+    classification_cache_max_entries: int = Field(default=10_000)
+    classification_cache_ttl_seconds: float = Field(default=3600.0)
+    classification_cache_max_bytes: int = Field(
+        default=16 * 1024 * 1024,
+        description="Approximate memory cap for cached classifications",
+    )
+
+    # Response cache (exact match on model, system prompt and normalized query)
+    response_cache_enabled: bool = Field(
+        default=False,
+        description="Serve repeated queries from cache instead of calling the provider",
+    )
+    response_cache_max_entries: int = Field(default=10_000)
+    response_cache_ttl_seconds: float = Field(default=86_400.0)
+    response_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Approximate memory cap for the in-memory tier",
+    )
+    response_cache_path: str | None = Field(
+        default=None,
+        description="SQLite file for the on-disk tier; unset keeps the cache in memory only",
+    )
+
+    # Semantic cache (near-duplicate queries, checked after an exact-match miss)
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Serve paraphrases of cached queries from cache",
+    )
+    semantic_cache_threshold_system1: float = Field(
+        default=0.92,
+        description="Cosine similarity a System 1 query needs to reuse a cached answer",
+    )
+    semantic_cache_threshold_system2: float = Field(
+        default=0.97,
+        description="Cosine similarity a System 2 query needs to reuse a cached answer",
+    )
+    semantic_cache_max_entries: int = Field(default=100_000)
+    semantic_cache_ttl_seconds: float = Field(default=86_400.0)
+    semantic_cache_max_query_chars: int = Field(
+        default=512,
+        description="Longer queries bypass the semantic cache",
+    )
+
+    # Single-flight: concurrent identical requests share one provider call
+    single_flight_enabled: bool = Field(default=True)
+
+    # Admission control (per-model concurrency limits)
+    admission_max_in_flight: int = Field(
+        default=0,
+        description="Max concurrent provider calls per model (0 = unlimited)",
+    )
+    admission_max_in_flight_per_model: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-model overrides of admission_max_in_flight",
+    )
+    admission_queue_timeout_ms: float = Field(
+        default=2000.0,
+        description="How long a request may wait for a slot before failing with 503",
+    )
+    admission_max_queue: int = Field(default=1000)
+
+    # Provider rate limits (token buckets per model)
+    rate_limits: dict[str, dict[str, float]] = Field(
+        default_factory=dict,
+        description='Per-model provider quotas, e.g. {"gpt-4o": {"rpm": 500, "tpm": 30000}}',
+    )
+    rate_limit_max_wait_ms: float = Field(
+        default=1000.0,
+        description="Longest a call may wait for budget before it is rerouted or rejected",
+    )
+    rate_limit_completion_tokens_estimate: int = Field(
+        default=256,
+        description="Completion tokens assumed when reserving TPM budget before a call",
+    )
+
+    # Circuit breaker: stop calling a failing model and go straight to the fallback
+    circuit_breaker_enabled: bool = Field(default=False)
+    circuit_breaker_window_seconds: float = Field(
+        default=30.0,
+        description="Rolling window over which a model's error rate is measured",
+    )
+    circuit_breaker_min_requests: int = Field(
+        default=10,
+        description="Calls needed in the window before the circuit may open",
+    )
+    circuit_breaker_error_rate: float = Field(
+        default=0.5,
+        description="Failed (or slow) fraction of calls that opens the circuit",
+    )
+    circuit_breaker_slow_call_ms: float = Field(
+        default=0.0,
+        description="Non-streaming calls slower than this count as failures (0 = off)",
+    )
+    circuit_breaker_open_seconds: float = Field(
+        default=30.0,
+        description="How long an open circuit rejects calls before letting probes through",
+    )
+    circuit_breaker_half_open_probes: int = Field(
+        default=1,
+        description="Probe calls that must succeed to close a half-open circuit",
+    )
+
+    # Speculative System 1: generate with the fast model while an LLM classifier decides
+    speculative_system1: bool = Field(
+        default=False,
+        description="Start System 1 generation in parallel with llm/hybrid classification",
+    )
+
+    # Hedging: back up slow System 1 calls with a second request
+    hedge_enabled: bool = Field(default=False)
+    hedge_delay_ms: float | None = Field(
+        default=None,
+        description="Fixed hedge delay; unset uses the model's observed p95 latency",
+    )
+    hedge_budget: float = Field(
+        default=0.05,
+        description="Maximum fraction of System 1 calls that may be hedged",
+    )
+    hedge_to_next_tier: bool = Field(
+        default=False,
+        description="Send the hedge to the System 2 model instead of repeating System 1",
+    )
 
     # Model selection (defaults to Google Gemini)
-    system1_model: str = Field(default="gemini-2.5-flash-lite", description="Fast/cheap model (System 1)")
-    system2_model: str = Field(default="gemini-2.5-flash", description="Advanced/powerful model (System 2)")
+    system1_model: str = Field(
+        default="gemini-2.5-flash-lite",
+        description="Fast/cheap model (System 1)",
+    )
+    system2_model: str = Field(
+        default="gemini-2.5-flash",
+        description="Advanced/powerful model (System 2)",
+    )
     classifier_model: str = Field(
         default="gemini-2.5-flash-lite",
         description="Model used for LLM-based classification",
     )
 
+    # Adaptive model ladder (replaces system1_model/system2_model when set)
+    routing_tiers: list[list[str]] = Field(
+        default_factory=list,
+        description=(
+            "Tiers of interchangeable models, cheapest first; System 1 starts on tier 0, "
+            "System 2 on tier 1, failures climb one tier"
+        ),
+    )
+    routing_objective: str = Field(
+        default="latency",
+        description="Pick within a tier by lowest p95 (latency) or cheapest within the SLO (cost)",
+    )
+    routing_latency_slo_ms: float = Field(
+        default=5000.0,
+        description="p95 latency a model must meet to be picked under the cost objective",
+    )
+    routing_max_error_rate: float = Field(
+        default=0.2,
+        description="Models failing more often than this are skipped",
+    )
+    routing_stats_window_seconds: int = Field(default=300)
+    routing_min_requests: int = Field(
+        default=20,
+        description="Calls in the window before a model's stats are trusted",
+    )
+    routing_probe_share: float = Field(
+        default=0.05,
+        description="Share of a tier's traffic sent to models without trusted stats",
+    )
+    routing_refresh_seconds: float = Field(
+        default=5.0,
+        description="How often tier choices are recomputed from live stats",
+    )
+
     # Pricing (USD per 1M tokens)
     model_pricing: dict = Field(default_factory=lambda: {
         "gemini-2.5-flash-lite": {"input": 0.05, "output": 0.20},
@@ -49,10 +270,41 @@ class Settings(BaseSettings):
     # Server
     log_level: str = Field(default="INFO")
 
+    # Tracing
+    trace_exporter: str = Field(
+        default="none",
+        description="Where per-request stage spans are exported: none, memory or file",
+    )
+    trace_file_path: str = Field(default="traces.jsonl")
+    trace_memory_capacity: int = Field(default=1000)
+
+    # Metrics
+    metrics_recent_capacity: int = Field(
+        default=10_000,
+        description="Raw request rows kept for recent-request lookups (oldest dropped first)",
+    )
+    metrics_bucket_seconds: int = Field(
+        default=60,
+        description="Width of the time buckets behind windowed metrics and the time series",
+    )
+    metrics_retention_seconds: int = Field(
+        default=86_400,
+        description="How long time buckets are kept; the 24h window needs at least 86400",
+    )
+    metrics_log_path: str | None = Field(
+        default=None,
+        description="SQLite file that persists metrics across restarts (unset = in-memory only)",
+    )
+    metrics_flush_interval_seconds: float = Field(default=1.0)
+    metrics_snapshot_interval_seconds: float = Field(
+        default=300.0,
+        description="How often aggregates are snapshotted so startup replays only the tail",
+    )
+
     # Fallback
     fallback_to_system2: bool = Field(
         default=True,
-        description="If System 1 fails, fallback to System 2",
+        description="If System 1 fails, fallback to System 2 (with routing tiers: one tier up)",
     )
 
 
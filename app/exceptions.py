@@ -16,3 +16,18 @@ class RoutingError(SmartRouterError):
 class ConfigurationError(SmartRouterError):
     """Raised for configuration issues."""
     pass
+
+
+class OverloadedError(SmartRouterError):
+    """Raised when a model is at capacity and the request could not be admitted in time."""
+    pass
+
+
+class RateLimitedError(SmartRouterError):
+    """Raised when a model's provider RPM/TPM budget cannot cover a call in time."""
+    pass
+
+
+class CircuitOpenError(SmartRouterError):
+    """Raised instead of calling a model whose circuit breaker is open."""
+    pass
@@ -1,6 +1,14 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
+from openai import OpenAIError
+
+from app.exceptions import SmartRouterError
+
+# What a failed generate() raises: provider SDK errors or the router's own rejections
+PROVIDER_ERRORS = (OpenAIError, SmartRouterError)
+
 
 @dataclass
 class LLMResponse:
@@ -11,6 +19,14 @@ class LLMResponse:
     total_tokens: int
 
 
+@dataclass
+class LLMStreamChunk:
+    """A piece of a streamed completion; the last chunk carries the full response and usage."""
+
+    delta: str = ""
+    response: LLMResponse | None = None
+
+
 class BaseLLMClient(ABC):
     @abstractmethod
     async def generate(
@@ -19,3 +35,14 @@ class BaseLLMClient(ABC):
         system_prompt: str | None = None,
         model: str | None = None,
     ) -> LLMResponse: ...
+
+    async def generate_stream(
+        self,
+        query: str,
+        system_prompt: str | None = None,
+        model: str | None = None,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream a completion. Clients without native streaming yield it in one piece."""
+        response = await self.generate(query=query, system_prompt=system_prompt, model=model)
+        yield LLMStreamChunk(delta=response.content)
+        yield LLMStreamChunk(response=response)
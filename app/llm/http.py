@@ -0,0 +1,58 @@
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Connection pool shared by every provider call (classifier and generation)."""
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2=true but the 'h2' package is missing; using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.http_read_timeout_seconds,
+            connect=settings.http_connect_timeout_seconds,
+        ),
+    )
+
+
+def build_openai_client(settings: Settings, http_client: httpx.AsyncClient) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key=settings.api_key,
+        base_url=settings.api_base_url,
+        http_client=http_client,
+    )
+
+
+async def warm_connections(http_client: httpx.AsyncClient, url: str, count: int) -> int:
+    """Open ``count`` pooled connections to ``url`` ahead of real traffic.
+
+    Any HTTP response (even a 404) means the TCP and TLS handshakes are done and the
+    connection is back in the pool. Returns how many connections were warmed.
+    """
+
+    async def warm() -> bool:
+        try:
+            await http_client.head(url)
+            return True
+        except httpx.HTTPError as exc:
+            logger.warning("Connection warm-up to %s failed: %s", url, exc)
+            return False
+
+    results = await asyncio.gather(*(warm() for _ in range(count)))
+    return sum(results)
@@ -1,18 +1,53 @@
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
 from openai import AsyncOpenAI
 
 from app.config import Settings
-from app.llm.base import BaseLLMClient, LLMResponse
+from app.llm.base import BaseLLMClient, LLMResponse, LLMStreamChunk
+from app.llm.pool import EndpointPool
+from app.llm.ratelimit import RateLimiter, Reservation, estimate_tokens
 
 DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant. Provide clear, accurate, and concise answers."
 
 
 class OpenAIClient(BaseLLMClient):
-    def __init__(self, settings: Settings):
-        self.client = AsyncOpenAI(
+    def __init__(
+        self,
+        settings: Settings,
+        client: AsyncOpenAI | None = None,
+        rate_limiter: RateLimiter | None = None,
+        pools: dict[str, EndpointPool] | None = None,
+    ):
+        self.client = client or AsyncOpenAI(
             api_key=settings.api_key,
             base_url=settings.api_base_url,
         )
         self.settings = settings
+        self.rate_limiter = rate_limiter
+        self.pools = pools or {}
+
+    @contextmanager
+    def _endpoint(self, model: str, timed: bool = True) -> Iterator[tuple[AsyncOpenAI, str]]:
+        """Yield the client and provider-side model name to use for ``model``."""
+        pool = self.pools.get(model)
+        if pool is None:
+            yield self.client, model
+            return
+        with pool.lease(timed) as endpoint:
+            yield endpoint.client, endpoint.model or model
+
+    async def _reserve(self, model: str, system_prompt: str, query: str) -> Reservation | None:
+        if self.rate_limiter is None:
+            return None
+        return await self.rate_limiter.acquire(
+            model,
+            estimate_tokens(
+                system_prompt,
+                query,
+                completion_tokens=self.settings.rate_limit_completion_tokens_estimate,
+            ),
+        )
 
     async def generate(
         self,
@@ -22,23 +57,73 @@ class OpenAIClient(BaseLLMClient):
     ) -> LLMResponse:
         model = model or self.settings.system1_model
         system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
+        reservation = await self._reserve(model, system_prompt, query)
 
-        response = await self.client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query},
-            ],
-            temperature=0.7,
-        )
+        with self._endpoint(model) as (client, provider_model):
+            response = await client.chat.completions.create(
+                model=provider_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query},
+                ],
+                temperature=0.7,
+            )
 
         choice = response.choices[0]
         usage = response.usage
+        if reservation is not None:
+            reservation.settle(usage.total_tokens)
 
         return LLMResponse(
             content=choice.message.content,
-            model=response.model,
+            # Pricing and metrics are keyed by the logical model, not a pool member's alias
+            model=response.model if provider_model == model else model,
             prompt_tokens=usage.prompt_tokens,
             completion_tokens=usage.completion_tokens,
             total_tokens=usage.total_tokens,
         )
+
+    async def generate_stream(
+        self,
+        query: str,
+        system_prompt: str | None = None,
+        model: str | None = None,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        model = model or self.settings.system1_model
+        system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
+        reservation = await self._reserve(model, system_prompt, query)
+
+        parts: list[str] = []
+        usage = None
+        response_model = model
+        with self._endpoint(model, timed=False) as (client, provider_model):
+            stream = await client.chat.completions.create(
+                model=provider_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query},
+                ],
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                if provider_model == model:
+                    response_model = chunk.model or response_model
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield LLMStreamChunk(delta=parts[-1])
+
+        if reservation is not None and usage is not None:
+            reservation.settle(usage.total_tokens)
+        yield LLMStreamChunk(
+            response=LLMResponse(
+                content="".join(parts),
+                model=response_model,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                total_tokens=usage.total_tokens if usage else 0,
+            )
+        )
@@ -0,0 +1,133 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import Settings
+
+
+class Endpoint:
+    def __init__(self, name: str, client: AsyncOpenAI, model: str | None = None):
+        self.name = name
+        self.client = client
+        # Provider-side model name, when it differs from the logical one
+        self.model = model
+        self.outstanding = 0
+        self.ewma_ms = 0.0  # 0 until the first timed call
+        self.failures = 0  # consecutive
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+
+class EndpointPool:
+    """Spreads one logical model's calls over several OpenAI-compatible endpoints.
+
+    ``ewma`` picks the endpoint with the lowest latency EWMA weighted by its outstanding
+    calls (endpoints without samples go first); ``least_outstanding`` ignores latency.
+    An endpoint that fails ``eject_after_failures`` times in a row sits out for
+    ``eject_seconds``; after that it is tried again, and a single further failure
+    ejects it once more.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        strategy: str = "ewma",
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0,
+        alpha: float = 0.3,
+    ):
+        if not endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.strategy = strategy.lower()
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.alpha = alpha
+
+    def _score(self, endpoint: Endpoint) -> tuple[float, int]:
+        if self.strategy == "least_outstanding":
+            return endpoint.outstanding, endpoint.requests
+        return endpoint.ewma_ms * (endpoint.outstanding + 1), endpoint.outstanding
+
+    def pick(self) -> Endpoint:
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.ejected_until <= now]
+        if not healthy:
+            # Everything is ejected; try whichever comes back first rather than failing
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+        return min(healthy, key=self._score)
+
+    @contextmanager
+    def lease(self, timed: bool = True) -> Iterator[Endpoint]:
+        """Hold the best endpoint for one call and learn from its outcome.
+
+        ``timed=False`` leaves the latency EWMA alone, for streams whose duration
+        depends on answer length.
+        """
+        endpoint = self.pick()
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        started = time.perf_counter()
+        try:
+            yield endpoint
+        except Exception:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.failures >= self.eject_after_failures:
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            raise
+        else:
+            endpoint.failures = 0
+            if timed:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                endpoint.ewma_ms = (
+                    elapsed_ms
+                    if not endpoint.ewma_ms
+                    else self.alpha * elapsed_ms + (1 - self.alpha) * endpoint.ewma_ms
+                )
+        finally:
+            endpoint.outstanding -= 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        now = time.monotonic()
+        return {
+            e.name: {
+                "outstanding": e.outstanding,
+                "ewma_ms": round(e.ewma_ms, 2),
+                "requests": e.requests,
+                "errors": e.errors,
+                "ejected": e.ejected_until > now,
+            }
+            for e in self.endpoints
+        }
+
+
+def build_endpoint_pools(
+    settings: Settings, http_client: httpx.AsyncClient
+) -> dict[str, EndpointPool]:
+    """One pool per entry in ``settings.endpoint_pools``, all on the shared HTTP client."""
+    pools = {}
+    for model, entries in settings.endpoint_pools.items():
+        endpoints = [
+            Endpoint(
+                name=entry.get("name") or entry["base_url"],
+                client=AsyncOpenAI(
+                    api_key=entry.get("api_key") or settings.api_key,
+                    base_url=entry["base_url"],
+                    http_client=http_client,
+                ),
+                model=entry.get("model"),
+            )
+            for entry in entries
+        ]
+        pools[model] = EndpointPool(
+            endpoints,
+            strategy=settings.endpoint_selection,
+            eject_after_failures=settings.endpoint_eject_after_failures,
+            eject_seconds=settings.endpoint_eject_seconds,
+        )
+    return pools
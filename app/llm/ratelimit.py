@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from app.exceptions import RateLimitedError
+
+
+def estimate_tokens(*texts: str, completion_tokens: int) -> int:
+    """Rough pre-call token count: ~4 characters per prompt token plus expected output."""
+    return sum(len(text) for text in texts) // 4 + 1 + completion_tokens
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; the level may go negative (debt)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until ``amount`` (capped at capacity) fits in the bucket."""
+        self._refill()
+        shortfall = min(amount, self.capacity) - self.level
+        return max(0.0, shortfall / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def remaining(self) -> float:
+        self._refill()
+        return max(0.0, self.level)
+
+
+class _Quota:
+    def __init__(self, rpm: float | None, tpm: float | None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.throttled = 0
+        self.rejected = 0
+
+
+class Reservation:
+    def __init__(self, quota: _Quota, estimated_tokens: int):
+        self._quota = quota
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens: int) -> None:
+        """Replace the pre-call estimate with the provider-reported usage."""
+        if self._quota.tokens is not None:
+            self._quota.tokens.give_back(self.estimated_tokens - actual_tokens)
+
+
+class RateLimiter:
+    """Keeps each model under its provider requests-per-minute and tokens-per-minute quota.
+
+    Callers reserve budget up front (virtual scheduling: the reservation is taken
+    immediately and the caller sleeps until its turn), so concurrent callers queue in
+    arrival order without a lock. If the projected wait exceeds ``max_wait_seconds``
+    the call fails fast with ``RateLimitedError`` and the caller can reroute it.
+    """
+
+    def __init__(self, limits: dict[str, dict[str, float]], max_wait_seconds: float = 1.0):
+        self.max_wait_seconds = max_wait_seconds
+        self._quotas = {
+            model: _Quota(limit.get("rpm"), limit.get("tpm")) for model, limit in limits.items()
+        }
+
+    async def acquire(self, model: str, estimated_tokens: int) -> Reservation | None:
+        quota = self._quotas.get(model)
+        if quota is None:
+            return None
+        wait = max(
+            quota.requests.wait_for(1) if quota.requests else 0.0,
+            quota.tokens.wait_for(estimated_tokens) if quota.tokens else 0.0,
+        )
+        if wait > self.max_wait_seconds:
+            quota.rejected += 1
+            raise RateLimitedError(f"{model} is over its rate limit for the next {wait:.1f}s")
+        if quota.requests:
+            quota.requests.take(1)
+        if quota.tokens:
+            quota.tokens.take(estimated_tokens)
+        if wait > 0:
+            quota.throttled += 1
+            await asyncio.sleep(wait)
+        return Reservation(quota, estimated_tokens)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        stats = {}
+        for model, quota in self._quotas.items():
+            entry: dict[str, float] = {"throttled": quota.throttled, "rejected": quota.rejected}
+            if quota.requests:
+                entry["requests_remaining"] = round(quota.requests.remaining(), 2)
+            if quota.tokens:
+                entry["tokens_remaining"] = round(quota.tokens.remaining(), 2)
+            stats[model] = entry
+        return stats
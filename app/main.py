@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -8,8 +9,19 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app import __version__
+from app.api.dependencies import (
+    get_classifier,
+    get_http_client,
+    get_label_log,
+    get_metrics_log,
+    get_metrics_store,
+    get_response_cache,
+    get_tracer,
+)
 from app.api.routes import router
 from app.config import get_settings
+from app.llm.http import warm_connections
+from app.metrics.persistence import flush_metrics, restore_metrics, run_metrics_flusher
 
 FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend" / "dist"
 
@@ -26,8 +38,58 @@ async def lifespan(app: FastAPI):
         settings.system1_model,
         settings.system2_model,
     )
+    if settings.classifier_mode.lower() == "learned":
+        # Map the model now so a missing or incompatible file fails startup, not requests
+        classifier = get_classifier()
+        logger.info(
+            "Loaded learned classifier %s from %s",
+            classifier.model.version,
+            settings.learned_classifier_path,
+        )
+    http_client = get_http_client()
+    if settings.http_warmup_connections > 0:
+        urls = {settings.api_base_url}
+        urls.update(e["base_url"] for entries in settings.endpoint_pools.values() for e in entries)
+        for url in sorted(urls):
+            warmed = await warm_connections(http_client, url, settings.http_warmup_connections)
+            logger.info("Warmed %d connection(s) to %s", warmed, url)
+    metrics_store = get_metrics_store()
+    metrics_log = get_metrics_log()
+    flusher = None
+    if metrics_log is not None:
+        replay = await asyncio.to_thread(restore_metrics, metrics_store, metrics_log)
+        logger.info(
+            "Restored metrics from %s (snapshot=%s, replayed %d row(s))",
+            settings.metrics_log_path,
+            replay.snapshot is not None,
+            len(replay.metrics),
+        )
+        flusher = asyncio.create_task(
+            run_metrics_flusher(
+                metrics_store,
+                metrics_log,
+                settings.metrics_flush_interval_seconds,
+                settings.metrics_snapshot_interval_seconds,
+            )
+        )
     yield
     logger.info("Smart LLM Router shutting down")
+    if flusher is not None:
+        flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await flusher
+        await flush_metrics(metrics_store, metrics_log, snapshot=True)
+        metrics_log.close()
+    await http_client.aclose()
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        response_cache.close()
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.close()
+    label_log = get_label_log()
+    if label_log is not None:
+        label_log.close()
 
 
 def create_app() -> FastAPI:
@@ -1,7 +1,7 @@
 import time
 
 from app.llm.base import LLMResponse
-from app.models import ClassificationResult, RequestMetric
+from app.models import ClassificationResult, RequestMetric, Span
 
 
 class MetricsCollector:
@@ -17,6 +17,18 @@ class MetricsCollector:
         output_cost = (completion_tokens / 1_000_000) * pricing["output"]
         return round(input_cost + output_cost, 8)
 
+    @staticmethod
+    def response_cost(
+        llm_response: LLMResponse, model_pricing: dict, model: str | None = None
+    ) -> float:
+        # Price by the model that was requested; providers may report a dated variant
+        return MetricsCollector.calculate_cost(
+            model=model or llm_response.model,
+            prompt_tokens=llm_response.prompt_tokens,
+            completion_tokens=llm_response.completion_tokens,
+            model_pricing=model_pricing,
+        )
+
     @staticmethod
     def build_metric(
         query: str,
@@ -24,23 +36,36 @@ class MetricsCollector:
         llm_response: LLMResponse,
         latency_ms: float,
         model_pricing: dict,
+        cached: bool = False,
+        coalesced: bool = False,
+        ttft_ms: float | None = None,
+        tokens_per_second: float | None = None,
+        classification_ms: float | None = None,
+        generation_ms: float | None = None,
+        queue_wait_ms: float | None = None,
+        spans: list[Span] | None = None,
+        model: str | None = None,
     ) -> RequestMetric:
-        cost = MetricsCollector.calculate_cost(
-            model=llm_response.model,
-            prompt_tokens=llm_response.prompt_tokens,
-            completion_tokens=llm_response.completion_tokens,
-            model_pricing=model_pricing,
-        )
-        return RequestMetric(
+        cost = MetricsCollector.response_cost(llm_response, model_pricing, model)
+        # Every field is already typed by the router, so skip pydantic validation here.
+        return RequestMetric.model_construct(
             timestamp=time.time(),
             query_length=len(query),
             complexity=classification.complexity,
             classifier_used=classification.classifier_used,
             classification_confidence=classification.confidence,
-            model_used=llm_response.model,
+            model_used=model or llm_response.model,
             latency_ms=latency_ms,
             prompt_tokens=llm_response.prompt_tokens,
             completion_tokens=llm_response.completion_tokens,
             total_tokens=llm_response.total_tokens,
             estimated_cost_usd=cost,
+            cached=cached,
+            coalesced=coalesced,
+            ttft_ms=ttft_ms,
+            tokens_per_second=tokens_per_second,
+            classification_ms=classification_ms,
+            generation_ms=generation_ms,
+            queue_wait_ms=queue_wait_ms,
+            spans=spans if spans is not None else [],
         )
@@ -0,0 +1,172 @@
+import math
+import struct
+from array import array
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+from app.models import ComplexityLevel, RequestMetric, Span
+
+K = TypeVar("K", bound=Hashable)
+
+# (field, array typecode). Strings are interned to small integer ids; optional floats use NaN.
+# Spans are variable-length, so each row packs its own into bytes of _SPAN records.
+_SCHEMA: tuple[tuple[str, str], ...] = (
+    ("timestamp", "d"),
+    ("query_length", "I"),
+    ("complexity", "B"),
+    ("classifier_used", "H"),
+    ("classification_confidence", "f"),
+    ("model_used", "H"),
+    ("latency_ms", "d"),
+    ("prompt_tokens", "I"),
+    ("completion_tokens", "I"),
+    ("total_tokens", "I"),
+    ("estimated_cost_usd", "d"),
+    ("cached", "B"),
+    ("coalesced", "B"),
+    ("ttft_ms", "d"),
+    ("tokens_per_second", "d"),
+    ("classification_ms", "d"),
+    ("generation_ms", "d"),
+    ("queue_wait_ms", "d"),
+)
+
+_OPTIONAL_FLOATS = (
+    "ttft_ms",
+    "tokens_per_second",
+    "classification_ms",
+    "generation_ms",
+    "queue_wait_ms",
+)
+_COMPLEXITIES = list(ComplexityLevel)
+_COMPLEXITY_IDS = {level: i for i, level in enumerate(_COMPLEXITIES)}
+# Interned (name, attributes) stage id, start and duration in ms
+_SPAN = struct.Struct("<Hff")
+
+
+class Interner(Generic[K]):
+    def __init__(self):
+        self._ids: dict[K, int] = {}
+        self.names: list[K] = []
+
+    def id(self, name: K) -> int:
+        try:
+            return self._ids[name]
+        except KeyError:
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+            return self._ids[name]
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self.names.clear()
+
+
+class ColumnarBuffer:
+    """Fixed-capacity ring of request metrics stored as one typed array per field.
+
+    Rows cost ~90 bytes plus 10 per span instead of a pydantic object each; they are only
+    turned back into ``RequestMetric`` when read through ``recent``.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.columns: dict[str, array] = {name: array(code) for name, code in _SCHEMA}
+        self.models: Interner[str] = Interner()
+        self.classifiers: Interner[str] = Interner()
+        self.stages: Interner[tuple[str, tuple[tuple[str, str], ...]]] = Interner()
+        self.spans: list[bytes] = []
+        self._head = 0  # next slot to overwrite once the ring is full
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def append(self, metric: RequestMetric) -> None:
+        row = (
+            metric.timestamp,
+            metric.query_length,
+            _COMPLEXITY_IDS[metric.complexity],
+            self.classifiers.id(metric.classifier_used),
+            metric.classification_confidence,
+            self.models.id(metric.model_used),
+            metric.latency_ms,
+            metric.prompt_tokens,
+            metric.completion_tokens,
+            metric.total_tokens,
+            metric.estimated_cost_usd,
+            metric.cached,
+            metric.coalesced,
+            math.nan if metric.ttft_ms is None else metric.ttft_ms,
+            math.nan if metric.tokens_per_second is None else metric.tokens_per_second,
+            math.nan if metric.classification_ms is None else metric.classification_ms,
+            math.nan if metric.generation_ms is None else metric.generation_ms,
+            math.nan if metric.queue_wait_ms is None else metric.queue_wait_ms,
+        )
+        spans = b"".join(
+            _SPAN.pack(
+                self.stages.id((span.name, tuple(span.attributes.items()))),
+                span.start_ms,
+                span.duration_ms,
+            )
+            for span in metric.spans
+        )
+        if len(self) < self.capacity:
+            for column, value in zip(self.columns.values(), row):
+                column.append(value)
+            self.spans.append(spans)
+        else:
+            head = self._head
+            for column, value in zip(self.columns.values(), row):
+                column[head] = value
+            self.spans[head] = spans
+            self._head = (head + 1) % self.capacity
+
+    def _row(self, i: int) -> RequestMetric:
+        c = self.columns
+        optional = {
+            name: None if math.isnan(c[name][i]) else c[name][i] for name in _OPTIONAL_FLOATS
+        }
+        return RequestMetric(
+            timestamp=c["timestamp"][i],
+            query_length=c["query_length"][i],
+            complexity=_COMPLEXITIES[c["complexity"][i]],
+            classifier_used=self.classifiers.names[c["classifier_used"][i]],
+            classification_confidence=round(c["classification_confidence"][i], 6),
+            model_used=self.models.names[c["model_used"][i]],
+            latency_ms=c["latency_ms"][i],
+            prompt_tokens=c["prompt_tokens"][i],
+            completion_tokens=c["completion_tokens"][i],
+            total_tokens=c["total_tokens"][i],
+            estimated_cost_usd=c["estimated_cost_usd"][i],
+            cached=bool(c["cached"][i]),
+            coalesced=bool(c["coalesced"][i]),
+            spans=[self._span(*record) for record in _SPAN.iter_unpack(self.spans[i])],
+            **optional,
+        )
+
+    def _span(self, stage: int, start_ms: float, duration_ms: float) -> Span:
+        name, attributes = self.stages.names[stage]
+        return Span.model_construct(
+            name=name,
+            start_ms=round(start_ms, 2),
+            duration_ms=round(duration_ms, 2),
+            attributes=dict(attributes),
+        )
+
+    def recent(self, n: int) -> list[RequestMetric]:
+        size = len(self)
+        n = min(max(n, 0), size)
+        # Oldest row sits at _head once the ring has wrapped (and at 0 before that).
+        start = self._head if size == self.capacity else 0
+        return [self._row((start + size - n + k) % size) for k in range(n)]
+
+    def clear(self) -> None:
+        for name, code in _SCHEMA:
+            self.columns[name] = array(code)
+        self.models.clear()
+        self.classifiers.clear()
+        self.stages.clear()
+        self.spans = []
+        self._head = 0
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from app.metrics.store import MetricsStore
+from app.models import ComplexityLevel, RequestMetric
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = tuple(RequestMetric.model_fields)
+# Stored as JSON text
+_JSON_FIELDS = {"spans"}
+
+
+def _column_value(name: str, value):
+    if name in _JSON_FIELDS:
+        return json.dumps([item.model_dump() for item in value])
+    return value.value if isinstance(value, ComplexityLevel) else value
+
+
+def _metric_row(metric: RequestMetric) -> tuple:
+    return tuple(_column_value(name, getattr(metric, name)) for name in _FIELDS)
+
+
+def _metric_from_row(row: tuple) -> RequestMetric:
+    data = dict(zip(_FIELDS, row))
+    for name in _JSON_FIELDS:
+        data[name] = json.loads(data[name]) if data[name] else []
+    return RequestMetric(**data)
+
+
+@dataclass
+class MetricsReplay:
+    snapshot: dict | None = None
+    # Rows and events logged after the snapshot, oldest first
+    metrics: list[RequestMetric] = field(default_factory=list)
+    events: list[tuple[float, dict[str, float]]] = field(default_factory=list)
+    # Newest rows (oldest first) to refill the recent-request buffer
+    recent: list[RequestMetric] = field(default_factory=list)
+
+
+class SQLiteMetricsLog:
+    """Append-only metrics log (SQLite, WAL) with periodic aggregate snapshots.
+
+    Writing a snapshot compacts the log: covered counter events are dropped and only the
+    newest ``keep_rows`` request rows are kept, for refilling the recent-request buffer.
+    """
+
+    def __init__(self, path: str, keep_rows: int):
+        self.keep_rows = keep_rows
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metrics ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, " + ", ".join(_FIELDS) + ")"
+            )
+            # Fields added to RequestMetric since the file was created
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(metrics)")}
+            for name in _FIELDS:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE metrics ADD COLUMN {name}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metric_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " timestamp REAL NOT NULL,"
+                " increments TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metric_snapshots ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " created_at REAL NOT NULL,"
+                " last_metric_id INTEGER NOT NULL,"
+                " last_event_id INTEGER NOT NULL,"
+                " state TEXT NOT NULL)"
+            )
+
+    def write(
+        self,
+        metrics: list[RequestMetric],
+        events: list[tuple[float, dict[str, float]]],
+        snapshot: dict | None = None,
+    ) -> None:
+        placeholders = ", ".join("?" * len(_FIELDS))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO metrics ({', '.join(_FIELDS)}) VALUES ({placeholders})",
+                [_metric_row(m) for m in metrics],
+            )
+            self._conn.executemany(
+                "INSERT INTO metric_events (timestamp, increments) VALUES (?, ?)",
+                [(ts, json.dumps(increments)) for ts, increments in events],
+            )
+            if snapshot is None:
+                return
+            last_metric_id = self._max_id("metrics")
+            last_event_id = self._max_id("metric_events")
+            cursor = self._conn.execute(
+                "INSERT INTO metric_snapshots (created_at, last_metric_id, last_event_id, state)"
+                " VALUES (?, ?, ?, ?)",
+                (time.time(), last_metric_id, last_event_id, json.dumps(snapshot)),
+            )
+            self._conn.execute("DELETE FROM metric_snapshots WHERE id < ?", (cursor.lastrowid,))
+            self._conn.execute("DELETE FROM metric_events WHERE id <= ?", (last_event_id,))
+            self._conn.execute(
+                "DELETE FROM metrics WHERE id <= ?", (last_metric_id - self.keep_rows,)
+            )
+
+    def _max_id(self, table: str) -> int:
+        return self._conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def load(self) -> MetricsReplay:
+        columns = ", ".join(_FIELDS)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_metric_id, last_event_id, state FROM metric_snapshots"
+                " ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            last_metric_id, last_event_id, state = row if row else (0, 0, None)
+            metrics = self._conn.execute(
+                f"SELECT {columns} FROM metrics WHERE id > ? ORDER BY id", (last_metric_id,)
+            ).fetchall()
+            events = self._conn.execute(
+                "SELECT timestamp, increments FROM metric_events WHERE id > ? ORDER BY id",
+                (last_event_id,),
+            ).fetchall()
+            recent = self._conn.execute(
+                f"SELECT {columns} FROM metrics ORDER BY id DESC LIMIT ?", (self.keep_rows,)
+            ).fetchall()
+        return MetricsReplay(
+            snapshot=json.loads(state) if state else None,
+            metrics=[_metric_from_row(r) for r in metrics],
+            events=[(ts, json.loads(increments)) for ts, increments in events],
+            recent=[_metric_from_row(r) for r in reversed(recent)],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def restore_metrics(store: MetricsStore, log: SQLiteMetricsLog) -> MetricsReplay:
+    replay = log.load()
+    store.restore(replay.snapshot, replay.metrics, replay.events, replay.recent)
+    return replay
+
+
+async def flush_metrics(store: MetricsStore, log: SQLiteMetricsLog, snapshot: bool = False) -> None:
+    metrics, events, state = store.drain(snapshot)
+    if not (metrics or events or state):
+        return
+    try:
+        await asyncio.to_thread(log.write, metrics, events, state)
+    except sqlite3.Error:
+        logger.exception("Failed to persist %d metric row(s); dropping them", len(metrics))
+
+
+async def run_metrics_flusher(
+    store: MetricsStore,
+    log: SQLiteMetricsLog,
+    flush_interval_seconds: float,
+    snapshot_interval_seconds: float,
+) -> None:
+    """Background task: write queued rows every flush interval, snapshot less often."""
+    last_snapshot = time.monotonic()
+    while True:
+        await asyncio.sleep(flush_interval_seconds)
+        snapshot = time.monotonic() - last_snapshot >= snapshot_interval_seconds
+        await flush_metrics(store, log, snapshot=snapshot)
+        if snapshot:
+            last_snapshot = time.monotonic()
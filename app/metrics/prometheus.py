@@ -0,0 +1,177 @@
+from bisect import bisect_left
+from collections import Counter
+
+from app.models import RequestMetric
+
+# Seconds; spans cache hits (~ms) through long System 2 generations.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class PrometheusMetrics:
+    """Counters, histograms and gauges kept up to date as requests are recorded.
+
+    ``render`` only formats what is already aggregated, so a scrape costs O(series),
+    not O(requests).
+    """
+
+    def __init__(self, prefix: str = "smart_router"):
+        self.prefix = prefix
+        self.requests: Counter[Labels] = Counter()
+        self.tokens: Counter[Labels] = Counter()
+        self.cost_usd: Counter[Labels] = Counter()
+        self.events: Counter[str] = Counter()
+        self.model_errors: Counter[Labels] = Counter()
+        self.request_duration: dict[Labels, Histogram] = {}
+        self.classification_duration: dict[Labels, Histogram] = {}
+        self.generation_duration: dict[Labels, Histogram] = {}
+        self.queue_wait: dict[Labels, Histogram] = {}
+        self.in_flight = 0
+
+    @staticmethod
+    def _observe(histograms: dict[Labels, Histogram], labels: Labels, seconds: float) -> None:
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = Histogram()
+        histogram.observe(seconds)
+
+    def observe(self, metric: RequestMetric) -> None:
+        labels = (
+            ("model", metric.model_used),
+            ("complexity", metric.complexity.value),
+            ("classifier", metric.classifier_used),
+        )
+        self.requests[labels] += 1
+        self.tokens[labels + (("type", "prompt"),)] += metric.prompt_tokens
+        self.tokens[labels + (("type", "completion"),)] += metric.completion_tokens
+        self.cost_usd[labels] += metric.estimated_cost_usd
+        self._observe(self.request_duration, labels[:2], metric.latency_ms / 1000)
+        if metric.classification_ms is not None:
+            self._observe(self.classification_duration, labels[2:], metric.classification_ms / 1000)
+        if metric.generation_ms is not None:
+            self._observe(self.generation_duration, labels[:1], metric.generation_ms / 1000)
+        if metric.queue_wait_ms is not None:
+            self._observe(self.queue_wait, labels[:1], metric.queue_wait_ms / 1000)
+
+    def count_events(self, increments: dict[str, float]) -> None:
+        self.events.update(increments)
+
+    def render(self) -> str:
+        p = self.prefix
+        lines: list[str] = []
+
+        def counter(name: str, help_text: str, values: Counter[Labels]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in values.items():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        def histogram(name: str, help_text: str, values: dict[Labels, Histogram]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, h in values.items():
+                cumulative = 0
+                for le, n in zip((*map(repr, h.buckets), "+Inf"), h.counts):
+                    cumulative += n
+                    bucket_labels = _format_labels(labels, f'le="{le}"')
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+
+        counter(f"{p}_requests_total", "Routed requests.", self.requests)
+        counter(f"{p}_tokens_total", "Tokens billed by the provider.", self.tokens)
+        counter(f"{p}_cost_usd_total", "Estimated provider cost in USD.", self.cost_usd)
+        counter(f"{p}_model_errors_total", "Failed provider calls.", self.model_errors)
+        for event, value in sorted(self.events.items()):
+            name = f"{p}_{event}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {_format_value(value)}")
+        histogram(
+            f"{p}_request_duration_seconds",
+            "End-to-end routing latency.",
+            self.request_duration,
+        )
+        histogram(
+            f"{p}_classification_duration_seconds",
+            "Time spent classifying the query.",
+            self.classification_duration,
+        )
+        histogram(
+            f"{p}_generation_duration_seconds",
+            "Time from classification to a complete answer (cache, generation, fallback).",
+            self.generation_duration,
+        )
+        histogram(
+            f"{p}_queue_wait_seconds",
+            "Time spent waiting for a model's admission slot.",
+            self.queue_wait,
+        )
+        lines.append(f"# HELP {p}_in_flight_requests Requests currently being routed.")
+        lines.append(f"# TYPE {p}_in_flight_requests gauge")
+        lines.append(f"{p}_in_flight_requests {self.in_flight}")
+        return "\n".join(lines) + "\n"
+
+
+def render_rate_limits(stats: dict[str, dict[str, float]], prefix: str = "smart_router") -> str:
+    """Remaining provider budget gauges, read from the rate limiter at scrape time."""
+    if not stats:
+        return ""
+    name = f"{prefix}_rate_limit_remaining"
+    lines = [
+        f"# HELP {name} Provider budget left in the current minute.",
+        f"# TYPE {name} gauge",
+    ]
+    for model, entry in stats.items():
+        for kind in ("requests", "tokens"):
+            if f"{kind}_remaining" in entry:
+                labels = _format_labels((("model", model), ("kind", kind)))
+                lines.append(f"{name}{labels} {_format_value(entry[f'{kind}_remaining'])}")
+    return "\n".join(lines) + "\n"
+
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def render_circuit_breakers(states: dict[str, str], prefix: str = "smart_router") -> str:
+    """Per-model breaker state gauge (0 closed, 1 half-open, 2 open)."""
+    if not states:
+        return ""
+    name = f"{prefix}_circuit_state"
+    lines = [
+        f"# HELP {name} Circuit breaker state per model (0 closed, 1 half-open, 2 open).",
+        f"# TYPE {name} gauge",
+    ]
+    for model, state in states.items():
+        lines.append(f"{name}{_format_labels((('model', model),))} {_CIRCUIT_STATE_VALUES[state]}")
+    return "\n".join(lines) + "\n"
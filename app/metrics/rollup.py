@@ -0,0 +1,182 @@
+from collections import Counter
+from dataclasses import dataclass, field, fields
+
+from app.metrics.sketch import LatencySketch
+from app.models import RequestMetric
+
+# (model, complexity, classifier)
+RollupKey = tuple[str, str, str]
+
+
+@dataclass
+class Rollup:
+    """Additive aggregate of the request metrics that share one ``RollupKey``."""
+
+    requests: int = 0
+    latency_ms: float = 0.0
+    tokens: int = 0
+    cost_usd: float = 0.0
+    cached: int = 0
+    coalesced: int = 0
+    ttft_count: int = 0
+    ttft_ms: float = 0.0
+    tps_count: int = 0
+    tokens_per_second: float = 0.0
+    queue_wait_count: int = 0
+    queue_wait_ms: float = 0.0
+    latency: LatencySketch = field(default_factory=LatencySketch)
+    # generation_ms of rows that actually called the provider (not cached or coalesced)
+    generation: LatencySketch = field(default_factory=LatencySketch)
+
+    def add(self, metric: RequestMetric) -> None:
+        self.requests += 1
+        self.latency_ms += metric.latency_ms
+        self.tokens += metric.total_tokens
+        self.cost_usd += metric.estimated_cost_usd
+        self.cached += metric.cached
+        self.coalesced += metric.coalesced
+        if metric.ttft_ms is not None:
+            self.ttft_count += 1
+            self.ttft_ms += metric.ttft_ms
+        if metric.tokens_per_second is not None:
+            self.tps_count += 1
+            self.tokens_per_second += metric.tokens_per_second
+        if metric.queue_wait_ms is not None:
+            self.queue_wait_count += 1
+            self.queue_wait_ms += metric.queue_wait_ms
+        self.latency.add(metric.latency_ms)
+        if metric.generation_ms is not None and not (metric.cached or metric.coalesced):
+            self.generation.add(metric.generation_ms)
+
+    def merge(self, other: "Rollup") -> None:
+        self.requests += other.requests
+        self.latency_ms += other.latency_ms
+        self.tokens += other.tokens
+        self.cost_usd += other.cost_usd
+        self.cached += other.cached
+        self.coalesced += other.coalesced
+        self.ttft_count += other.ttft_count
+        self.ttft_ms += other.ttft_ms
+        self.tps_count += other.tps_count
+        self.tokens_per_second += other.tokens_per_second
+        self.queue_wait_count += other.queue_wait_count
+        self.queue_wait_ms += other.queue_wait_ms
+        self.latency.merge(other.latency)
+        self.generation.merge(other.generation)
+
+    def to_dict(self) -> dict:
+        sketches = ("latency", "generation")
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in sketches}
+        data["latency"] = self.latency.to_dict()
+        data["generation"] = self.generation.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rollup":
+        # Snapshots written before the generation sketch existed start it empty
+        generation = data.get("generation")
+        return cls(
+            **{
+                **data,
+                "latency": LatencySketch.from_dict(data["latency"]),
+                "generation": LatencySketch.from_dict(generation)
+                if generation
+                else LatencySketch(),
+            }
+        )
+
+
+def rollup_key(metric: RequestMetric) -> RollupKey:
+    return (metric.model_used, metric.complexity.value, metric.classifier_used)
+
+
+@dataclass
+class RollupSet:
+    """Rollups per key plus the event counters (cache lookups, hedges, ...) seen alongside."""
+
+    rollups: dict[RollupKey, Rollup] = field(default_factory=dict)
+    counters: Counter[str] = field(default_factory=Counter)
+    # Failed provider calls per model (failed requests never produce a rollup row)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def add(self, metric: RequestMetric) -> None:
+        key = rollup_key(metric)
+        rollup = self.rollups.get(key)
+        if rollup is None:
+            rollup = self.rollups[key] = Rollup()
+        rollup.add(metric)
+
+    def merge(self, other: "RollupSet") -> None:
+        for key, rollup in other.rollups.items():
+            self.rollups.setdefault(key, Rollup()).merge(rollup)
+        self.counters.update(other.counters)
+        self.errors.update(other.errors)
+
+    def to_dict(self) -> dict:
+        return {
+            "rollups": [[*key, rollup.to_dict()] for key, rollup in self.rollups.items()],
+            "counters": dict(self.counters),
+            "errors": dict(self.errors),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollupSet":
+        return cls(
+            rollups={
+                (model, complexity, classifier): Rollup.from_dict(rollup)
+                for model, complexity, classifier, rollup in data["rollups"]
+            },
+            counters=Counter(data["counters"]),
+            errors=Counter(data.get("errors", {})),
+        )
+
+
+class TimeBuckets:
+    """Fixed-width time buckets of ``RollupSet``s; buckets older than the retention expire."""
+
+    def __init__(self, bucket_seconds: int = 60, retention_seconds: int = 86_400):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self._buckets: dict[int, RollupSet] = {}
+
+    def bucket(self, timestamp: float) -> RollupSet | None:
+        """Return the bucket for ``timestamp``, or None if it is already past retention."""
+        start = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            # New buckets open at most once per bucket width, so expire lazily from here.
+            newest = max(start, max(self._buckets, default=start))
+            self._expire(newest)
+            if start <= newest - self.retention_seconds:
+                return None
+            bucket = self._buckets[start] = RollupSet()
+        return bucket
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.retention_seconds
+        for start in [s for s in self._buckets if s <= cutoff]:
+            del self._buckets[start]
+
+    def series(self, window_seconds: int, now: float) -> list[tuple[int, RollupSet]]:
+        """Buckets overlapping the last ``window_seconds``, oldest first."""
+        earliest = now - window_seconds - self.bucket_seconds
+        return sorted(
+            ((start, bucket) for start, bucket in self._buckets.items() if earliest < start <= now),
+            key=lambda item: item[0],
+        )
+
+    def window(self, window_seconds: int, now: float) -> RollupSet:
+        merged = RollupSet()
+        for _, bucket in self.series(window_seconds, now):
+            merged.merge(bucket)
+        return merged
+
+    def to_dict(self) -> dict:
+        return {str(start): bucket.to_dict() for start, bucket in self._buckets.items()}
+
+    def load_dict(self, data: dict, now: float) -> None:
+        self._buckets = {int(start): RollupSet.from_dict(b) for start, b in data.items()}
+        self._expire(now)
+
+    def clear(self) -> None:
+        self._buckets.clear()
@@ -0,0 +1,93 @@
+import math
+from collections import Counter
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def quantile_label(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+class LatencySketch:
+    """Log-bucketed quantile sketch (DDSketch-style) for millisecond latencies.
+
+    Every reported quantile is within ``relative_accuracy`` of the true value, memory is
+    bounded by the (sparse) number of occupied buckets regardless of how many samples are
+    added, and two sketches with the same parameters merge by adding their counts.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 0.001,
+        max_value: float = 1e7,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_index = math.ceil(math.log(min_value) / self._log_gamma)
+        self._max_index = math.ceil(math.log(max_value) / self._log_gamma)
+        self._bins: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return self._min_index
+        if value >= self.max_value:
+            return self._max_index
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        self._bins[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self._bins.update(other._bins)
+        self.count += other.count
+        self.total += other.total
+
+    def quantiles(self, qs: tuple[float, ...] = DEFAULT_QUANTILES) -> list[float]:
+        if not self.count:
+            return [0.0 for _ in qs]
+        ranks = sorted((max(1, math.ceil(q * self.count)), i) for i, q in enumerate(qs))
+        values = [0.0] * len(qs)
+        seen = 0
+        pending = iter(ranks)
+        rank, slot = next(pending)
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            while rank <= seen:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms.
+                values[slot] = 2 * self._gamma**index / (self._gamma + 1)
+                rank, slot = next(pending, (math.inf, -1))
+        return values
+
+    def percentiles(self, qs: tuple[float, ...] = DEFAULT_QUANTILES) -> dict[str, float]:
+        return {quantile_label(q): round(v, 2) for q, v in zip(qs, self.quantiles(qs))}
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "total": self.total,
+            "bins": {str(index): n for index, n in self._bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencySketch":
+        sketch = cls(relative_accuracy=data["relative_accuracy"])
+        sketch._bins.update({int(index): n for index, n in data["bins"].items()})
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        return sketch
+
+    def clear(self) -> None:
+        self._bins.clear()
+        self.count = 0
+        self.total = 0.0
@@ -1,65 +1,326 @@
 import threading
+import time
 from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 
-from app.models import MetricsSummary, RequestMetric
+from app.metrics.columns import ColumnarBuffer
+from app.metrics.prometheus import PrometheusMetrics
+from app.metrics.rollup import Rollup, RollupSet, TimeBuckets
+from app.metrics.sketch import LatencySketch
+from app.models import (
+    MetricsBucket,
+    MetricsSummary,
+    MetricsTimeSeries,
+    MetricsWindow,
+    RequestMetric,
+)
+
+WINDOW_SECONDS = {
+    MetricsWindow.MINUTE: 60,
+    MetricsWindow.FIVE_MINUTES: 300,
+    MetricsWindow.HOUR: 3600,
+    MetricsWindow.DAY: 86_400,
+}
+
+
+@dataclass
+class ModelStats:
+    requests: int
+    errors: int
+    # Provider-side generation time; cache hits and coalesced waits are excluded
+    p95_generation_ms: float
+    # Observed spend per billed token; None until the model has billed any
+    cost_per_token: float | None
+
+    @property
+    def error_rate(self) -> float:
+        attempts = self.requests + self.errors
+        return self.errors / attempts if attempts else 0.0
+
+
+def _round_counters(counters) -> dict:
+    return {
+        name: round(value, 6) if isinstance(value, float) else value
+        for name, value in counters.items()
+    }
+
+
+def _summarize(rollup_set: RollupSet, window: MetricsWindow | None = None) -> MetricsSummary:
+    total = Rollup()
+    requests_by_complexity: dict[str, int] = defaultdict(int)
+    requests_by_model: dict[str, int] = defaultdict(int)
+    classifier_distribution: dict[str, int] = defaultdict(int)
+    latency_by_model: dict[str, LatencySketch] = {}
+    latency_by_complexity: dict[str, LatencySketch] = {}
+
+    for (model, complexity, classifier), rollup in rollup_set.rollups.items():
+        total.merge(rollup)
+        requests_by_complexity[complexity] += rollup.requests
+        requests_by_model[model] += rollup.requests
+        classifier_distribution[classifier] += rollup.requests
+        latency_by_model.setdefault(model, LatencySketch()).merge(rollup.latency)
+        latency_by_complexity.setdefault(complexity, LatencySketch()).merge(rollup.latency)
+
+    n = total.requests
+    return MetricsSummary(
+        window=window,
+        total_requests=n,
+        requests_by_complexity=dict(requests_by_complexity),
+        requests_by_model=dict(requests_by_model),
+        avg_latency_ms=round(total.latency_ms / n, 2) if n else 0.0,
+        latency_percentiles=total.latency.percentiles() if n else {},
+        latency_percentiles_by_model={m: sk.percentiles() for m, sk in latency_by_model.items()},
+        latency_percentiles_by_complexity={
+            c: sk.percentiles() for c, sk in latency_by_complexity.items()
+        },
+        total_tokens_used=total.tokens,
+        total_estimated_cost_usd=round(total.cost_usd, 6),
+        avg_cost_per_request_usd=round(total.cost_usd / n, 6) if n else 0.0,
+        classifier_distribution=dict(classifier_distribution),
+        errors_by_model=dict(rollup_set.errors),
+        coalesced_requests=total.coalesced,
+        avg_ttft_ms=round(total.ttft_ms / total.ttft_count, 2) if total.ttft_count else 0.0,
+        avg_tokens_per_second=(
+            round(total.tokens_per_second / total.tps_count, 2) if total.tps_count else 0.0
+        ),
+        avg_queue_wait_ms=(
+            round(total.queue_wait_ms / total.queue_wait_count, 2)
+            if total.queue_wait_count
+            else 0.0
+        ),
+        **_round_counters(rollup_set.counters),
+    )
 
 
 class MetricsStore:
-    def __init__(self):
-        self._metrics: list[RequestMetric] = []
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        bucket_seconds: int = 60,
+        retention_seconds: int = 86_400,
+        persist: bool = False,
+    ):
+        # Raw rows are only kept for get_recent; summaries come from running aggregates.
+        self._metrics = ColumnarBuffer(capacity)
+        self._lifetime = RollupSet()
+        self._buckets = TimeBuckets(bucket_seconds, retention_seconds)
+        # Process-local, like any Prometheus target: not persisted, reset on restart
+        self._prometheus = PrometheusMetrics()
         self._lock = threading.Lock()
+        # With persistence on, rows and counter events queue here until drain() hands
+        # them to the background writer, so recording never touches the disk.
+        self._persist = persist
+        self._pending_metrics: list[RequestMetric] = []
+        self._pending_events: list[tuple[float, dict[str, float]]] = []
+
+    def _apply(self, metric: RequestMetric) -> None:
+        self._lifetime.add(metric)
+        bucket = self._buckets.bucket(metric.timestamp)
+        if bucket is not None:
+            bucket.add(metric)
+
+    def _apply_counts(self, timestamp: float, increments: dict[str, float]) -> None:
+        self._lifetime.counters.update(increments)
+        bucket = self._buckets.bucket(timestamp)
+        if bucket is not None:
+            bucket.counters.update(increments)
 
     def record(self, metric: RequestMetric) -> None:
         with self._lock:
             self._metrics.append(metric)
+            self._apply(metric)
+            self._prometheus.observe(metric)
+            if self._persist:
+                self._pending_metrics.append(metric)
+
+    def _count(self, increments: dict[str, float]) -> None:
+        """Bump event counters reported as-is in MetricsSummary (cache lookups, hedges, ...)."""
+        now = time.time()
+        with self._lock:
+            self._apply_counts(now, increments)
+            self._prometheus.count_events(increments)
+            if self._persist:
+                self._pending_events.append((now, increments))
+
+    def record_admission_rejected(self) -> None:
+        self._count({"admission_rejected": 1})
+
+    def record_circuit_rejected(self) -> None:
+        self._count({"circuit_rejected": 1})
+
+    def record_model_error(self, model: str) -> None:
+        # Kept in memory and in snapshots only; errors since the last snapshot are not
+        # replayed after a restart, which only matters for the short routing window.
+        with self._lock:
+            self._lifetime.errors[model] += 1
+            bucket = self._buckets.bucket(time.time())
+            if bucket is not None:
+                bucket.errors[model] += 1
+            self._prometheus.model_errors[(("model", model),)] += 1
 
-    def get_summary(self) -> MetricsSummary:
+    @contextmanager
+    def in_flight(self) -> Iterator[None]:
+        """Count a request as in flight for the duration of the block."""
         with self._lock:
-            metrics = list(self._metrics)
-
-        if not metrics:
-            return MetricsSummary(
-                total_requests=0,
-                requests_by_complexity={},
-                requests_by_model={},
-                avg_latency_ms=0.0,
-                total_tokens_used=0,
-                total_estimated_cost_usd=0.0,
-                avg_cost_per_request_usd=0.0,
-                classifier_distribution={},
+            self._prometheus.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._prometheus.in_flight -= 1
+
+    def record_cache_lookup(self, hit: bool, semantic: bool = False) -> None:
+        prefix = "semantic_cache" if semantic else "cache"
+        self._count({f"{prefix}_hits" if hit else f"{prefix}_misses": 1})
+
+    def record_classification_cache(self, event: str) -> None:
+        """Count a classification-cache hit, miss, eviction or expiration."""
+        self._count({f"classification_cache_{event}": 1})
+
+    def record_speculation(
+        self,
+        used: bool,
+        wasted_tokens: int = 0,
+        wasted_cost_usd: float = 0.0,
+        latency_saved_ms: float = 0.0,
+    ) -> None:
+        self._count(
+            {
+                "speculative_used" if used else "speculative_discarded": 1,
+                "speculative_wasted_tokens": wasted_tokens,
+                "speculative_wasted_cost_usd": wasted_cost_usd,
+                "speculative_latency_saved_ms": latency_saved_ms,
+            }
+        )
+
+    def record_hedge(
+        self,
+        won: bool,
+        wasted_tokens: int = 0,
+        wasted_cost_usd: float = 0.0,
+    ) -> None:
+        self._count(
+            {
+                "hedges_fired": 1,
+                "hedges_won": int(won),
+                "hedge_wasted_tokens": wasted_tokens,
+                "hedge_wasted_cost_usd": wasted_cost_usd,
+            }
+        )
+
+    def get_summary(
+        self,
+        window: MetricsWindow | None = None,
+        now: float | None = None,
+    ) -> MetricsSummary:
+        """Lifetime summary, or one covering the buckets that overlap ``window``."""
+        with self._lock:
+            if window is None:
+                return _summarize(self._lifetime)
+            rollups = self._buckets.window(WINDOW_SECONDS[window], now or time.time())
+            return _summarize(rollups, window)
+
+    def model_stats(self, window_seconds: int, now: float | None = None) -> dict[str, ModelStats]:
+        """Per-model latency, error and cost figures over the buckets overlapping the window."""
+        with self._lock:
+            rollups = self._buckets.window(window_seconds, now or time.time())
+        per_model: dict[str, Rollup] = {}
+        for (model, _, _), rollup in rollups.rollups.items():
+            per_model.setdefault(model, Rollup()).merge(rollup)
+        stats = {}
+        for model in per_model.keys() | rollups.errors.keys():
+            rollup = per_model.get(model, Rollup())
+            stats[model] = ModelStats(
+                requests=rollup.requests,
+                errors=rollups.errors[model],
+                p95_generation_ms=rollup.generation.quantiles((0.95,))[0],
+                cost_per_token=rollup.cost_usd / rollup.tokens if rollup.tokens else None,
             )
+        return stats
 
-        total = len(metrics)
-        requests_by_complexity: dict[str, int] = defaultdict(int)
-        requests_by_model: dict[str, int] = defaultdict(int)
-        classifier_distribution: dict[str, int] = defaultdict(int)
-        total_latency = 0.0
-        total_tokens = 0
-        total_cost = 0.0
-
-        for m in metrics:
-            requests_by_complexity[m.complexity.value] += 1
-            requests_by_model[m.model_used] += 1
-            classifier_distribution[m.classifier_used] += 1
-            total_latency += m.latency_ms
-            total_tokens += m.total_tokens
-            total_cost += m.estimated_cost_usd
-
-        return MetricsSummary(
-            total_requests=total,
-            requests_by_complexity=dict(requests_by_complexity),
-            requests_by_model=dict(requests_by_model),
-            avg_latency_ms=round(total_latency / total, 2),
-            total_tokens_used=total_tokens,
-            total_estimated_cost_usd=round(total_cost, 6),
-            avg_cost_per_request_usd=round(total_cost / total, 6),
-            classifier_distribution=dict(classifier_distribution),
+    def get_timeseries(self, window: MetricsWindow, now: float | None = None) -> MetricsTimeSeries:
+        rows = []
+        with self._lock:
+            series = self._buckets.series(WINDOW_SECONDS[window], now or time.time())
+            for start, bucket in series:
+                for (model, complexity, classifier), rollup in sorted(bucket.rollups.items()):
+                    rows.append(
+                        MetricsBucket(
+                            bucket_start=start,
+                            model=model,
+                            complexity=complexity,
+                            classifier=classifier,
+                            requests=rollup.requests,
+                            avg_latency_ms=round(rollup.latency_ms / rollup.requests, 2),
+                            latency_percentiles=rollup.latency.percentiles(),
+                            total_tokens=rollup.tokens,
+                            estimated_cost_usd=round(rollup.cost_usd, 6),
+                            cached_requests=rollup.cached,
+                        )
+                    )
+        return MetricsTimeSeries(
+            window=window,
+            bucket_seconds=self._buckets.bucket_seconds,
+            buckets=rows,
         )
 
+    def render_prometheus(self) -> str:
+        with self._lock:
+            return self._prometheus.render()
+
+    def drain(
+        self, snapshot: bool = False
+    ) -> tuple[list[RequestMetric], list[tuple[float, dict[str, float]]], dict | None]:
+        """Hand queued rows and events to the writer, optionally with a snapshot that
+        covers exactly everything recorded up to (and including) those rows."""
+        with self._lock:
+            metrics, self._pending_metrics = self._pending_metrics, []
+            events, self._pending_events = self._pending_events, []
+            state = None
+            if snapshot:
+                state = {
+                    "bucket_seconds": self._buckets.bucket_seconds,
+                    "lifetime": self._lifetime.to_dict(),
+                    "buckets": self._buckets.to_dict(),
+                }
+        return metrics, events, state
+
+    def restore(
+        self,
+        snapshot: dict | None,
+        metrics: list[RequestMetric],
+        events: list[tuple[float, dict[str, float]]],
+        recent: list[RequestMetric],
+    ) -> None:
+        """Rebuild state from a snapshot plus the rows and events logged after it."""
+        with self._lock:
+            self._metrics.clear()
+            self._lifetime = RollupSet()
+            self._buckets.clear()
+            if snapshot is not None:
+                self._lifetime = RollupSet.from_dict(snapshot["lifetime"])
+                if snapshot["bucket_seconds"] == self._buckets.bucket_seconds:
+                    self._buckets.load_dict(snapshot["buckets"], time.time())
+            for metric in metrics:
+                self._apply(metric)
+            for timestamp, increments in events:
+                self._apply_counts(timestamp, increments)
+            for metric in recent:
+                self._metrics.append(metric)
+
     def get_recent(self, n: int = 100) -> list[RequestMetric]:
         with self._lock:
-            return list(self._metrics[-n:])
+            return self._metrics.recent(n)
 
     def clear(self) -> None:
         with self._lock:
             self._metrics.clear()
+            self._lifetime = RollupSet()
+            self._buckets.clear()
+            in_flight = self._prometheus.in_flight
+            self._prometheus = PrometheusMetrics()
+            self._prometheus.in_flight = in_flight
+            self._pending_metrics.clear()
+            self._pending_events.clear()
@@ -0,0 +1,110 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.models import RequestMetric, Span
+
+logger = logging.getLogger(__name__)
+
+
+class SpanRecorder:
+    """Collects per-stage timings for one request, relative to when it started."""
+
+    __slots__ = ("origin", "spans")
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: list[Span] = []
+
+    def add(self, name: str, start: float, end: float, **attributes: str) -> None:
+        self.spans.append(
+            Span.model_construct(
+                name=name,
+                start_ms=round((start - self.origin) * 1000, 2),
+                duration_ms=round((end - start) * 1000, 2),
+                attributes=attributes,
+            )
+        )
+
+    def total_ms(self, name: str) -> float:
+        return round(sum(s.duration_ms for s in self.spans if s.name == name), 2)
+
+    @contextmanager
+    def span(self, name: str, **attributes: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            attributes["error"] = type(exc).__name__
+            raise
+        finally:
+            self.add(name, start, time.perf_counter(), **attributes)
+
+
+class TraceExporter(ABC):
+    """Receives every recorded request (with its spans) once routing has finished.
+
+    ``export`` runs inline on the request path, so implementations must be cheap and
+    must not raise.
+    """
+
+    @abstractmethod
+    def export(self, metric: RequestMetric) -> None: ...
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryExporter(TraceExporter):
+    def __init__(self, capacity: int = 1000):
+        self._traces: deque[RequestMetric] = deque(maxlen=capacity)
+
+    def export(self, metric: RequestMetric) -> None:
+        self._traces.append(metric)
+
+    def traces(self) -> list[RequestMetric]:
+        return list(self._traces)
+
+
+class FileExporter(TraceExporter):
+    """Appends one JSON line per request; writes go through the file's own buffer."""
+
+    def __init__(self, path: str):
+        # Held open for the exporter's lifetime and closed by close() at shutdown
+        self._file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+        self._lock = threading.Lock()
+
+    def export(self, metric: RequestMetric) -> None:
+        line = json.dumps(
+            {
+                "timestamp": metric.timestamp,
+                "model": metric.model_used,
+                "complexity": metric.complexity.value,
+                "classifier": metric.classifier_used,
+                "latency_ms": metric.latency_ms,
+                "spans": [span.model_dump() for span in metric.spans],
+            }
+        )
+        try:
+            with self._lock:
+                self._file.write(line + "\n")
+        except OSError:
+            logger.exception("Failed to write trace")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def build_exporter(kind: str, path: str, capacity: int) -> TraceExporter | None:
+    kind = kind.lower()
+    if kind == "memory":
+        return InMemoryExporter(capacity)
+    if kind == "file":
+        return FileExporter(path)
+    return None
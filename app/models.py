@@ -1,6 +1,6 @@
 import time
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,18 @@ class ClassificationResult(BaseModel):
     classifier_used: str = ""
 
 
+class Priority(str, Enum):
+    # Declaration order is admission order
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
 class RouteRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=10000)
     system_prompt: Optional[str] = Field(
@@ -27,6 +39,34 @@ class RouteRequest(BaseModel):
         default=None,
         description="Override routing — force a specific model",
     )
+    priority: Priority = Field(
+        default=Priority.INTERACTIVE,
+        description="Admission lane when a model is at capacity; interactive goes first",
+    )
+    include_spans: bool = Field(
+        default=False,
+        description="Return per-stage timings (classify, generate, fallback, ...) with the answer",
+    )
+
+
+class ClassifyBatchRequest(BaseModel):
+    queries: list[Annotated[str, Field(min_length=1, max_length=10000)]] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Queries to classify, without generating answers",
+    )
+
+
+class ClassifyBatchResponse(BaseModel):
+    results: list[ClassificationResult]
+
+
+class Span(BaseModel):
+    name: str
+    start_ms: float  # offset from the start of the request
+    duration_ms: float
+    attributes: dict[str, str] = Field(default_factory=dict)
 
 
 class RouteResponse(BaseModel):
@@ -38,17 +78,84 @@ class RouteResponse(BaseModel):
     latency_ms: float
     token_usage: dict
     estimated_cost_usd: float
+    cached: bool = False
+    coalesced: bool = False
+    spans: Optional[list[Span]] = None
+
+
+class MetricsWindow(str, Enum):
+    MINUTE = "1m"
+    FIVE_MINUTES = "5m"
+    HOUR = "1h"
+    DAY = "24h"
 
 
 class MetricsSummary(BaseModel):
+    # None means lifetime totals; otherwise buckets overlapping the trailing window
+    window: Optional[MetricsWindow] = None
     total_requests: int
     requests_by_complexity: dict[str, int]
     requests_by_model: dict[str, int]
     avg_latency_ms: float
+    # Keys are p50/p90/p99/p99.9, each within 1% of the true latency
+    latency_percentiles: dict[str, float] = Field(default_factory=dict)
+    latency_percentiles_by_model: dict[str, dict[str, float]] = Field(default_factory=dict)
+    latency_percentiles_by_complexity: dict[str, dict[str, float]] = Field(default_factory=dict)
     total_tokens_used: int
     total_estimated_cost_usd: float
     avg_cost_per_request_usd: float
     classifier_distribution: dict[str, int]
+    errors_by_model: dict[str, int] = {}
+    cache_hits: int = 0
+    cache_misses: int = 0
+    semantic_cache_hits: int = 0
+    semantic_cache_misses: int = 0
+    classification_cache_hits: int = 0
+    classification_cache_misses: int = 0
+    classification_cache_evictions: int = 0
+    classification_cache_expirations: int = 0
+    coalesced_requests: int = 0
+    avg_ttft_ms: float = 0.0
+    avg_tokens_per_second: float = 0.0
+    speculative_used: int = 0
+    speculative_discarded: int = 0
+    speculative_wasted_tokens: int = 0
+    speculative_wasted_cost_usd: float = 0.0
+    speculative_latency_saved_ms: float = 0.0
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    hedge_wasted_tokens: int = 0
+    hedge_wasted_cost_usd: float = 0.0
+    avg_queue_wait_ms: float = 0.0
+    admission_rejected: int = 0
+    # Live provider budget per model (requests/tokens remaining this minute)
+    rate_limits: dict[str, dict[str, float]] = {}
+    circuit_rejected: int = 0
+    # Per-model breaker state and rolling error rate
+    circuit_breakers: dict[str, dict[str, float | str]] = {}
+    # Per-model endpoint pool members: outstanding calls, latency EWMA, ejection
+    endpoints: dict[str, dict[str, dict[str, float]]] = {}
+    # Model currently picked on each routing tier, when a ladder is configured
+    routing_tiers: list[str] = []
+
+
+class MetricsBucket(BaseModel):
+    bucket_start: float
+    model: str
+    complexity: ComplexityLevel
+    classifier: str
+    requests: int
+    avg_latency_ms: float
+    latency_percentiles: dict[str, float]
+    total_tokens: int
+    estimated_cost_usd: float
+    cached_requests: int
+
+
+class MetricsTimeSeries(BaseModel):
+    window: MetricsWindow
+    bucket_seconds: int
+    buckets: list[MetricsBucket]
 
 
 class RequestMetric(BaseModel):
@@ -63,6 +170,14 @@ class RequestMetric(BaseModel):
     completion_tokens: int
     total_tokens: int
     estimated_cost_usd: float
+    cached: bool = False
+    coalesced: bool = False
+    ttft_ms: Optional[float] = None
+    tokens_per_second: Optional[float] = None
+    classification_ms: Optional[float] = None
+    generation_ms: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    spans: list[Span] = Field(default_factory=list)
 
 
 class HealthResponse(BaseModel):
@@ -71,3 +186,4 @@ class HealthResponse(BaseModel):
     classifier_mode: str
     system1_model: str
     system2_model: str
+    circuit_breakers: dict[str, CircuitState] = {}
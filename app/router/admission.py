@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.exceptions import OverloadedError
+from app.models import Priority
+
+
+class _ModelGate:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.lanes: dict[Priority, deque[asyncio.Future]] = {p: deque() for p in Priority}
+
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter, interactive lane first
+        for priority in Priority:
+            lane = self.lanes[priority]
+            while lane:
+                waiter = lane.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.in_flight -= 1
+
+
+class AdmissionController:
+    """Caps concurrent provider calls per model, queueing the excess by priority.
+
+    Interactive requests always go ahead of batch ones. A request that cannot start
+    within ``queue_timeout_seconds`` (or finds the queue full) fails fast with
+    ``OverloadedError`` instead of piling more load onto the provider.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        per_model: dict[str, int] | None = None,
+        queue_timeout_seconds: float = 2.0,
+        max_queue: int = 1000,
+    ):
+        self.max_in_flight = max_in_flight
+        self.per_model = per_model or {}
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_queue = max_queue
+        self._gates: dict[str, _ModelGate] = {}
+
+    def _gate(self, model: str) -> _ModelGate | None:
+        gate = self._gates.get(model)
+        if gate is None:
+            limit = self.per_model.get(model, self.max_in_flight)
+            if limit <= 0:
+                return None
+            gate = self._gates[model] = _ModelGate(limit)
+        return gate
+
+    async def _acquire(self, gate: _ModelGate, model: str, priority: Priority) -> bool:
+        """Take a slot, returning whether the request had to queue for it."""
+        if gate.in_flight < gate.limit and not gate.queued():
+            gate.in_flight += 1
+            return False
+        if gate.queued() >= self.max_queue:
+            raise OverloadedError(f"Too many requests queued for {model}")
+
+        waiter = asyncio.get_running_loop().create_future()
+        gate.lanes[priority].append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except BaseException as exc:
+            if waiter.done():
+                # The slot was handed over just as we gave up; pass it on
+                gate.release()
+            else:
+                waiter.cancel()
+                gate.lanes[priority].remove(waiter)
+            if isinstance(exc, TimeoutError):
+                raise OverloadedError(
+                    f"{model} is at capacity; gave up after {self.queue_timeout_seconds:g}s"
+                ) from None
+            raise
+        return True
+
+    @asynccontextmanager
+    async def admit(
+        self, model: str, priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[float]:
+        """Hold one of ``model``'s slots for the block; yields the queue wait in seconds."""
+        gate = self._gate(model)
+        if gate is None:
+            yield 0.0
+            return
+        started = time.perf_counter()
+        queued = await self._acquire(gate, model, priority)
+        try:
+            yield time.perf_counter() - started if queued else 0.0
+        finally:
+            gate.release()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            model: {"in_flight": gate.in_flight, "queued": gate.queued(), "limit": gate.limit}
+            for model, gate in self._gates.items()
+        }
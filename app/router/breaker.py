@@ -0,0 +1,157 @@
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.exceptions import CircuitOpenError, OverloadedError, RateLimitedError
+from app.models import CircuitState
+
+# Raised before the provider was reached; they say nothing about the model's health
+_LOCAL_ERRORS = (OverloadedError, RateLimitedError)
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        # (finished_at, failed) for calls in the rolling window
+        self.outcomes: deque[tuple[float, bool]] = deque()
+        self.failures = 0
+        self.probes = 0
+        self.probe_successes = 0
+
+    def prune(self, now: float, window_seconds: float) -> None:
+        while self.outcomes and self.outcomes[0][0] < now - window_seconds:
+            _, failed = self.outcomes.popleft()
+            self.failures -= failed
+
+
+class CircuitBreaker:
+    """Per-model circuit breaker over a rolling window of provider calls.
+
+    A circuit opens once at least ``min_requests`` calls in the window failed (or ran
+    slower than ``slow_call_ms``) at ``error_rate_threshold`` or more. While open, calls
+    fail immediately with ``CircuitOpenError`` so the router can go straight to its
+    fallback. After ``open_seconds`` the circuit half-opens and lets ``half_open_probes``
+    calls through; if they all succeed it closes, and any failure reopens it.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        min_requests: int = 10,
+        error_rate_threshold: float = 0.5,
+        slow_call_ms: float = 0.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._circuits: dict[str, _Circuit] = {}
+
+    def _circuit(self, model: str) -> _Circuit:
+        circuit = self._circuits.get(model)
+        if circuit is None:
+            circuit = self._circuits[model] = _Circuit()
+        return circuit
+
+    def _open(self, circuit: _Circuit, now: float) -> None:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = now
+        circuit.probes = circuit.probe_successes = 0
+
+    def _allow(self, circuit: _Circuit, now: float) -> bool:
+        if circuit.state == CircuitState.OPEN:
+            if now - circuit.opened_at < self.open_seconds:
+                return False
+            circuit.state = CircuitState.HALF_OPEN
+        if circuit.state == CircuitState.HALF_OPEN:
+            if circuit.probes + circuit.probe_successes >= self.half_open_probes:
+                return False
+            circuit.probes += 1
+        return True
+
+    def _record(self, circuit: _Circuit, now: float, failed: bool) -> None:
+        if circuit.state == CircuitState.HALF_OPEN:
+            circuit.probes -= 1
+            if failed:
+                self._open(circuit, now)
+                return
+            circuit.probe_successes += 1
+            if circuit.probe_successes >= self.half_open_probes:
+                circuit.state = CircuitState.CLOSED
+                circuit.outcomes.clear()
+                circuit.failures = 0
+            return
+        if circuit.state == CircuitState.OPEN:
+            # A call admitted before the circuit opened; the window restarts on close
+            return
+        circuit.outcomes.append((now, failed))
+        circuit.failures += failed
+        circuit.prune(now, self.window_seconds)
+        total = len(circuit.outcomes)
+        if total >= self.min_requests and circuit.failures / total >= self.error_rate_threshold:
+            self._open(circuit, now)
+
+    @contextmanager
+    def guard(self, model: str, timed: bool = True) -> Iterator[None]:
+        """Run one provider call for ``model`` through its circuit.
+
+        Raises ``CircuitOpenError`` without running the block if the circuit is open.
+        ``timed=False`` skips the slow-call check, for streams whose duration depends
+        on answer length.
+        """
+        circuit = self._circuit(model)
+        if not self._allow(circuit, time.monotonic()):
+            raise CircuitOpenError(f"Circuit for {model} is open")
+        started = time.monotonic()
+        try:
+            yield
+        except _LOCAL_ERRORS:
+            self._abandon(circuit)
+            raise
+        except Exception:
+            self._record(circuit, time.monotonic(), failed=True)
+            raise
+        except BaseException:
+            # Cancelled (e.g. a losing hedge); not the provider's fault
+            self._abandon(circuit)
+            raise
+        now = time.monotonic()
+        slow = timed and self.slow_call_ms > 0 and (now - started) * 1000 > self.slow_call_ms
+        self._record(circuit, now, failed=slow)
+
+    def _abandon(self, circuit: _Circuit) -> None:
+        if circuit.state == CircuitState.HALF_OPEN:
+            circuit.probes -= 1
+
+    def state(self, model: str) -> CircuitState:
+        circuit = self._circuits.get(model)
+        if circuit is None:
+            return CircuitState.CLOSED
+        if (
+            circuit.state == CircuitState.OPEN
+            and time.monotonic() - circuit.opened_at >= self.open_seconds
+        ):
+            return CircuitState.HALF_OPEN
+        return circuit.state
+
+    def states(self) -> dict[str, CircuitState]:
+        return {model: self.state(model) for model in self._circuits}
+
+    def stats(self) -> dict[str, dict[str, float | str]]:
+        now = time.monotonic()
+        stats = {}
+        for model, circuit in self._circuits.items():
+            circuit.prune(now, self.window_seconds)
+            total = len(circuit.outcomes)
+            stats[model] = {
+                "state": self.state(model).value,
+                "requests": total,
+                "error_rate": round(circuit.failures / total, 4) if total else 0.0,
+            }
+        return stats
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from app.llm.base import LLMResponse
+
+
+@dataclass
+class HedgeOutcome:
+    response: LLMResponse
+    model: str
+    hedged: bool = False
+    hedge_won: bool = False
+    # Set when the losing attempt also completed, so its tokens were paid for
+    wasted: LLMResponse | None = None
+    wasted_model: str | None = None
+
+
+class Hedger:
+    """Fires a backup request when the primary is slower than usual.
+
+    The hedge delay is either fixed or the observed p95 latency of the model, and
+    at most ``budget`` of all calls may be hedged so extra spend stays bounded.
+    """
+
+    def __init__(
+        self,
+        delay_ms: float | None,
+        budget: float,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        self.delay_ms = delay_ms
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._calls = 0
+        self._hedged = 0
+
+    def observe(self, model: str, latency_s: float) -> None:
+        self._latencies[model].append(latency_s)
+
+    def delay_for(self, model: str) -> float | None:
+        """Seconds to wait before hedging, or None while there is no basis to decide."""
+        if self.delay_ms is not None:
+            return self.delay_ms / 1000
+        samples = self._latencies[model]
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _acquire(self) -> bool:
+        if self._hedged + 1 > self.budget * self._calls:
+            return False
+        self._hedged += 1
+        return True
+
+    async def _timed(self, call: Callable[[str], Awaitable[LLMResponse]], model: str):
+        start = time.perf_counter()
+        response = await call(model)
+        self.observe(model, time.perf_counter() - start)
+        return response
+
+    async def run(
+        self,
+        call: Callable[[str], Awaitable[LLMResponse]],
+        model: str,
+        hedge_model: str,
+    ) -> HedgeOutcome:
+        self._calls += 1
+        primary = asyncio.create_task(self._timed(call, model))
+        tasks = [primary]
+        try:
+            delay = self.delay_for(model)
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if primary.done() or delay is None or not self._acquire():
+                return HedgeOutcome(response=await primary, model=model)
+
+            hedge = asyncio.create_task(self._timed(call, hedge_model))
+            tasks.append(hedge)
+            models = {primary: model, hedge: hedge_model}
+            pending = {primary, hedge}
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                winner = primary if primary in succeeded else (succeeded[0] if succeeded else None)
+        finally:
+            # The loser, or both attempts if the caller was cancelled mid-wait
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if winner is None:
+            # Both attempts failed; surface the primary's error
+            raise primary.exception()
+
+        loser = hedge if winner is primary else primary
+        wasted = wasted_model = None
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            wasted, wasted_model = loser.result(), models[loser]
+        return HedgeOutcome(
+            response=winner.result(),
+            model=models[winner],
+            hedged=True,
+            hedge_won=winner is hedge,
+            wasted=wasted,
+            wasted_model=wasted_model,
+        )
@@ -0,0 +1,136 @@
+import time
+
+from app.metrics.store import MetricsStore, ModelStats
+from app.models import CircuitState, ComplexityLevel
+from app.router.breaker import CircuitBreaker
+
+
+class ModelLadder:
+    """Ordered tiers of interchangeable models, cheapest/fastest tier first.
+
+    System 1 queries start on tier 0 and System 2 queries on tier 1; higher tiers are
+    only reached by fallback or hedging. Within a tier the model is chosen from live
+    stats over the last ``window_seconds``:
+
+    - ``latency``: lowest p95 among models under ``max_error_rate``
+    - ``cost``: cheapest per token among models under ``max_error_rate`` whose p95
+      meets ``latency_slo_ms`` (the fastest one if none does)
+
+    Models with fewer than ``min_requests`` calls in the window are only picked when no
+    model with known stats is usable; otherwise they get ``probe_share`` of the tier's
+    traffic, so a new (or degraded and since forgotten) model earns stats again without
+    taking over. Models with an open circuit are skipped. Choices are recomputed at most
+    every ``refresh_seconds``.
+    """
+
+    def __init__(
+        self,
+        tiers: list[list[str]],
+        metrics_store: MetricsStore,
+        model_pricing: dict,
+        objective: str = "latency",
+        latency_slo_ms: float = 5000.0,
+        max_error_rate: float = 0.2,
+        window_seconds: int = 300,
+        min_requests: int = 20,
+        refresh_seconds: float = 5.0,
+        probe_share: float = 0.05,
+        breaker: CircuitBreaker | None = None,
+    ):
+        if not tiers or not all(tiers):
+            raise ValueError("Every routing tier needs at least one model")
+        self.tiers = tiers
+        self.metrics_store = metrics_store
+        self.model_pricing = model_pricing
+        self.objective = objective.lower()
+        self.latency_slo_ms = latency_slo_ms
+        self.max_error_rate = max_error_rate
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.refresh_seconds = refresh_seconds
+        self.breaker = breaker
+        self._tier_of = {model: i for i, tier in enumerate(tiers) for model in tier}
+        self._choices: list[str] = [tier[0] for tier in tiers]
+        self._probes: list[list[str]] = [[] for _ in tiers]
+        self._probe_every = round(1 / probe_share) if probe_share > 0 else 0
+        self._picks = [0] * len(tiers)
+        self._refreshed_at = -float("inf")
+
+    def tier_for(self, complexity: ComplexityLevel) -> int:
+        return 0 if complexity == ComplexityLevel.SYSTEM1 else min(1, len(self.tiers) - 1)
+
+    def tier_of(self, model: str) -> int | None:
+        return self._tier_of.get(model)
+
+    def select(self, tier: int) -> str:
+        now = time.monotonic()
+        if now - self._refreshed_at >= self.refresh_seconds:
+            self._refresh()
+            self._refreshed_at = now
+        probes = self._probes[tier]
+        if probes and self._probe_every:
+            self._picks[tier] += 1
+            turn, offset = divmod(self._picks[tier], self._probe_every)
+            if offset == 0:
+                return probes[turn % len(probes)]
+        return self._choices[tier]
+
+    def escalate(self, model: str) -> str | None:
+        """Current pick of the tier above ``model``'s, or None at the top (or off-ladder)."""
+        tier = self.tier_of(model)
+        if tier is None or tier + 1 >= len(self.tiers):
+            return None
+        return self.select(tier + 1)
+
+    def _list_price(self, model: str) -> float:
+        pricing = self.model_pricing.get(model, {"input": 0.0, "output": 0.0})
+        return (pricing["input"] + pricing["output"]) / 2_000_000
+
+    def _refresh(self) -> None:
+        stats = self.metrics_store.model_stats(self.window_seconds)
+        chosen = [self._choose(tier, stats) for tier in self.tiers]
+        self._choices = [choice for choice, _ in chosen]
+        self._probes = [probes for _, probes in chosen]
+
+    def _choose(self, tier: list[str], stats: dict[str, ModelStats]) -> tuple[str, list[str]]:
+        """Return the tier's pick and the models without trusted stats that get probes."""
+        candidates = [
+            model
+            for model in tier
+            if self.breaker is None or self.breaker.state(model) != CircuitState.OPEN
+        ] or tier
+
+        def known(model: str) -> ModelStats | None:
+            s = stats.get(model)
+            return s if s is not None and s.requests + s.errors >= self.min_requests else None
+
+        def healthy(model: str) -> bool:
+            s = known(model)
+            return s is None or s.error_rate <= self.max_error_rate
+
+        def latency(model: str) -> float:
+            s = known(model)
+            return s.p95_generation_ms if s is not None else 0.0
+
+        def cost(model: str) -> float:
+            s = known(model)
+            if s is not None and s.cost_per_token is not None:
+                return s.cost_per_token
+            return self._list_price(model)
+
+        unknown = [m for m in candidates if known(m) is None]
+        usable = [m for m in candidates if healthy(m)]
+        if not usable:
+            # Everything is failing; stay on whichever fails least
+            return min(candidates, key=lambda m: stats[m].error_rate), []
+        # Unknown models score best, so only fall back on them when no known model is usable
+        usable = [m for m in usable if m not in unknown] or usable
+        choice = min(usable, key=latency)
+        if self.objective == "cost":
+            within_slo = [m for m in usable if latency(m) <= self.latency_slo_ms]
+            if within_slo:
+                choice = min(within_slo, key=lambda m: (cost(m), latency(m)))
+        return choice, [m for m in unknown if m != choice]
+
+    def choices(self) -> list[str]:
+        return list(self._choices)
@@ -1,17 +1,53 @@
+import asyncio
 import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any
 
+from app.cache.response import ResponseCache
+from app.cache.semantic import SemanticResponseCache
 from app.classifier.base import BaseClassifier
 from app.config import Settings
-from app.exceptions import RoutingError
-from app.llm.openai_client import OpenAIClient
+from app.exceptions import CircuitOpenError, OverloadedError, RateLimitedError, RoutingError
+from app.llm.base import PROVIDER_ERRORS, BaseLLMClient, LLMResponse
 from app.metrics.collector import MetricsCollector
 from app.metrics.store import MetricsStore
+from app.metrics.tracing import SpanRecorder, TraceExporter
 from app.models import (
     ClassificationResult,
     ComplexityLevel,
+    RequestMetric,
     RouteRequest,
     RouteResponse,
 )
+from app.router.admission import AdmissionController
+from app.router.breaker import CircuitBreaker
+from app.router.hedging import Hedger
+from app.router.ladder import ModelLadder
+from app.router.singleflight import SingleFlight
+
+
+@dataclass
+class _Speculation:
+    """A System 1 call started alongside classification, or joined if an identical
+    request already had it in flight."""
+
+    started: float
+    led: bool = True
+    generated_at: float = 0.0
+    task: asyncio.Task[tuple[LLMResponse, str]] = field(init=False)
+
+
+def _unbilled(llm_response: LLMResponse) -> LLMResponse:
+    """Copy of a response served without its own provider call, so nothing was spent."""
+    return LLMResponse(
+        content=llm_response.content,
+        model=llm_response.model,
+        prompt_tokens=0,
+        completion_tokens=0,
+        total_tokens=0,
+    )
 
 
 class SmartRouter:
@@ -20,62 +56,368 @@ class SmartRouter:
     def __init__(
         self,
         classifier: BaseClassifier,
-        llm_client: OpenAIClient,
+        llm_client: BaseLLMClient,
         metrics_store: MetricsStore,
         settings: Settings,
+        response_cache: ResponseCache | None = None,
+        semantic_cache: SemanticResponseCache | None = None,
+        tracer: TraceExporter | None = None,
+        admission: AdmissionController | None = None,
+        breaker: CircuitBreaker | None = None,
+        ladder: ModelLadder | None = None,
     ):
         self.classifier = classifier
         self.llm_client = llm_client
         self.metrics_store = metrics_store
         self.settings = settings
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.tracer = tracer
+        self.admission = admission
+        self.breaker = breaker
+        self.ladder = ladder
+        self._in_flight: SingleFlight[tuple[LLMResponse, str]] | None = (
+            SingleFlight() if settings.single_flight_enabled else None
+        )
+        self._hedger = (
+            Hedger(delay_ms=settings.hedge_delay_ms, budget=settings.hedge_budget)
+            if settings.hedge_enabled
+            else None
+        )
 
     def _select_model(self, classification: ClassificationResult, force_model: str | None) -> str:
         if force_model:
             return force_model
+        if self.ladder is not None:
+            return self.ladder.select(self.ladder.tier_for(classification.complexity))
         if classification.complexity == ComplexityLevel.SYSTEM2:
             return self.settings.system2_model
         return self.settings.system1_model
 
-    async def route(self, request: RouteRequest) -> RouteResponse:
-        start_time = time.perf_counter()
+    def _system1_model(self) -> str:
+        if self.ladder is not None:
+            return self.ladder.select(0)
+        return self.settings.system1_model
 
-        # Step 1: Classify
-        classification = await self.classifier.classify(request.query)
+    def _is_system1(self, model: str) -> bool:
+        if self.ladder is not None:
+            return self.ladder.tier_of(model) == 0
+        return model == self.settings.system1_model
 
-        # Step 2: Select model
-        model = self._select_model(classification, request.force_model)
+    def _next_tier(self, model: str) -> str | None:
+        """Model one step up from ``model`` (System 1 -> System 2 without a ladder)."""
+        if self.ladder is not None:
+            return self.ladder.escalate(model)
+        if model == self.settings.system1_model:
+            return self.settings.system2_model
+        return None
 
-        # Step 3: Generate response
+    @asynccontextmanager
+    async def _admit(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> AsyncIterator[None]:
+        """Hold an admission slot for ``model`` around one provider call."""
+        if self.admission is None:
+            yield
+            return
         try:
-            llm_response = await self.llm_client.generate(
-                query=request.query,
-                system_prompt=request.system_prompt,
-                model=model,
-            )
-        except Exception as exc:
-            if self.settings.fallback_to_system2 and model == self.settings.system1_model:
-                fallback_model = self.settings.system2_model
-                llm_response = await self.llm_client.generate(
+            async with self.admission.admit(model, request.priority) as waited:
+                if waited:
+                    admitted_at = time.perf_counter()
+                    spans.add("queue_wait", admitted_at - waited, admitted_at, model=model)
+                yield
+        except OverloadedError:
+            self.metrics_store.record_admission_rejected()
+            raise
+
+    @contextmanager
+    def _guard(self, model: str, timed: bool = True) -> Iterator[None]:
+        """Pass one provider call through ``model``'s circuit breaker and count failures."""
+        try:
+            if self.breaker is None:
+                yield
+            else:
+                with self.breaker.guard(model, timed):
+                    yield
+        except CircuitOpenError:
+            self.metrics_store.record_circuit_rejected()
+            raise
+        except (OverloadedError, RateLimitedError):
+            raise
+        except Exception:
+            self.metrics_store.record_model_error(model)
+            raise
+
+    async def _call_model(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> LLMResponse:
+        # Admission first: time spent queued or rejected locally is not the model's fault
+        async with self._admit(request, model, spans):
+            with self._guard(model):
+                return await self.llm_client.generate(
                     query=request.query,
                     system_prompt=request.system_prompt,
-                    model=fallback_model,
+                    model=model,
                 )
+
+    async def _lookup_cached(
+        self,
+        request: RouteRequest,
+        model: str,
+        complexity: ComplexityLevel,
+    ) -> LLMResponse | None:
+        hit = None
+        if self.response_cache is not None:
+            hit = await self.response_cache.get(model, request.system_prompt, request.query)
+            self.metrics_store.record_cache_lookup(hit=hit is not None)
+        if hit is None and self.semantic_cache is not None:
+            hit = self.semantic_cache.get(model, request.system_prompt, request.query, complexity)
+            self.metrics_store.record_cache_lookup(hit=hit is not None, semantic=True)
+        return _unbilled(hit) if hit is not None else None
+
+    async def _store_cached(
+        self, request: RouteRequest, model: str, llm_response: LLMResponse
+    ) -> None:
+        if self.response_cache is not None:
+            await self.response_cache.set(model, request.system_prompt, request.query, llm_response)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(model, request.system_prompt, request.query, llm_response)
+
+    async def _generate_and_store(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> tuple[LLMResponse, str]:
+        llm_response, generated_model = await self._generate(request, model, spans)
+        if generated_model == model:
+            await self._store_cached(request, model, llm_response)
+        return llm_response, generated_model
+
+    async def _generate_coalesced(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> tuple[LLMResponse, str, bool]:
+        """Generate once for concurrent identical requests; followers get an unbilled copy."""
+        if self._in_flight is None:
+            return *await self._generate_and_store(request, model, spans), False
+        key = (model, request.system_prompt, request.query)
+        started = time.perf_counter()
+        (llm_response, generated_model), coalesced = await self._in_flight.do(
+            key, lambda: self._generate_and_store(request, model, spans)
+        )
+        if coalesced:
+            # The leader's spans cover the actual generation; followers only waited on it
+            spans.add("coalesced_wait", started, time.perf_counter(), model=generated_model)
+            llm_response = _unbilled(llm_response)
+        return llm_response, generated_model, coalesced
+
+    async def _generate_hedged(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> tuple[LLMResponse, str]:
+        """Call the model, hedging System 1 calls that run past the hedge delay."""
+
+        async def call(attempt_model: str) -> LLMResponse:
+            return await self._call_model(request, attempt_model, spans)
+
+        if self._hedger is None or not self._is_system1(model):
+            return await call(model), model
+
+        hedge_model = model
+        if self.settings.hedge_to_next_tier:
+            hedge_model = self._next_tier(model) or model
+        outcome = await self._hedger.run(call, model, hedge_model)
+        if outcome.hedged and outcome.wasted is not None:
+            self.metrics_store.record_hedge(
+                won=outcome.hedge_won,
+                wasted_tokens=outcome.wasted.total_tokens,
+                wasted_cost_usd=MetricsCollector.response_cost(
+                    outcome.wasted, self.settings.model_pricing, outcome.wasted_model
+                ),
+            )
+        elif outcome.hedged:
+            self.metrics_store.record_hedge(won=outcome.hedge_won)
+        return outcome.response, outcome.model
+
+    async def _generate(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> tuple[LLMResponse, str]:
+        """Generate with the selected model, falling back one tier up if it fails."""
+        try:
+            with spans.span("generate", model=model, attempt="1"):
+                llm_response, model = await self._generate_hedged(request, model, spans)
+        except OverloadedError:
+            # Falling back would only move the overload onto System 2
+            raise
+        except Exception as exc:
+            fallback_model = self._next_tier(model) if self.settings.fallback_to_system2 else None
+            if fallback_model is not None:
+                with spans.span("fallback", model=fallback_model, attempt="2"):
+                    llm_response = await self._call_model(request, fallback_model, spans)
                 model = fallback_model
+            elif isinstance(exc, CircuitOpenError):
+                raise
             else:
                 raise RoutingError(f"LLM generation failed: {exc}") from exc
+        return llm_response, model
+
+    def _speculative_model(self, request: RouteRequest) -> str | None:
+        """System 1 model to generate with alongside classification, when worth it.
+
+        Only slow (LLM-backed) classifiers leave latency to hide; the heuristic and
+        learned classifiers answer in microseconds.
+        """
+        if (
+            not self.settings.speculative_system1
+            or request.force_model
+            or self.classifier.name in ("heuristic", "learned")
+        ):
+            return None
+        return self._system1_model()
+
+    def _start_speculation(
+        self, request: RouteRequest, model: str, spans: SpanRecorder
+    ) -> _Speculation:
+        """Start ``model`` generating, unless an identical request already has that call
+        in flight; this one then shares it after classification instead."""
+        speculation = _Speculation(time.perf_counter())
+
+        async def speculate() -> tuple[LLMResponse, str]:
+            llm_response = await self._call_model(request, model, spans)
+            speculation.generated_at = time.perf_counter()
+            return llm_response, model
+
+        if self._in_flight is None:
+            speculation.task = asyncio.create_task(speculate())
+            return speculation
+        key = (model, request.system_prompt, request.query)
+        speculation.task, speculation.led = self._in_flight.lead(key, speculate)
+        return speculation
+
+    async def _join_speculation(
+        self, speculation: _Speculation, spans: SpanRecorder
+    ) -> tuple[LLMResponse, str] | None:
+        """Share the call this request deferred to, or return None if its leader abandoned it.
+
+        Held by reference, so it is shared even if it finished before classification did.
+        """
+        started = time.perf_counter()
+        try:
+            llm_response, model = await asyncio.shield(speculation.task)
+        except BaseException:
+            if not self._in_flight.abandoned(speculation.task):
+                raise
+            return None
+        spans.add("coalesced_wait", started, time.perf_counter(), model=model)
+        return _unbilled(llm_response), model
+
+    async def _finish_speculation(
+        self, speculation: _Speculation, model: str, classified_at: float
+    ) -> tuple[LLMResponse, str] | None:
+        """Return the speculative answer (and its model) if the query landed on System 1,
+        else discard it."""
+        task = speculation.task
+        if not self._is_system1(model):
+            finished = task.done() and not task.cancelled()
+            if finished and task.exception() is None:
+                # Completed before we could cancel it, so its tokens were paid for
+                wasted, wasted_model = task.result()
+                self.metrics_store.record_speculation(
+                    used=False,
+                    wasted_tokens=wasted.total_tokens,
+                    wasted_cost_usd=MetricsCollector.response_cost(
+                        wasted, self.settings.model_pricing, wasted_model
+                    ),
+                )
+            else:
+                task.cancel()
+                self.metrics_store.record_speculation(used=False)
+            return None
+
+        try:
+            llm_response, speculated_model = await task
+        except PROVIDER_ERRORS:
+            # Let the regular path retry and fall back as usual
+            self.metrics_store.record_speculation(used=False)
+            return None
+        # Sequential would cost classify + generate; overlapped costs the longer of the two
+        saved_ms = (min(classified_at, speculation.generated_at) - speculation.started) * 1000
+        self.metrics_store.record_speculation(used=True, latency_saved_ms=saved_ms)
+        return llm_response, speculated_model
+
+    async def route(self, request: RouteRequest) -> RouteResponse:
+        with self.metrics_store.in_flight():
+            return await self._route(request)
+
+    async def _route(self, request: RouteRequest) -> RouteResponse:
+        spans = SpanRecorder()
+        start_time = spans.origin
+
+        # Speculate only on a cache miss; identical requests share the leader's call
+        speculation = probed = None
+        probed_model = self._speculative_model(request)
+        if probed_model is not None:
+            with spans.span("cache_lookup"):
+                probed = await self._lookup_cached(request, probed_model, ComplexityLevel.SYSTEM1)
+            if probed is None:
+                speculation = self._start_speculation(request, probed_model, spans)
+
+        # Step 1: Classify
+        try:
+            with spans.span("classify"):
+                classification = await self.classifier.classify(request.query)
+        except BaseException:
+            if speculation is not None and speculation.led:
+                speculation.task.cancel()
+            raise
+        classified_at = time.perf_counter()
+
+        # Step 2: Select model
+        model = self._select_model(classification, request.force_model)
+
+        # Step 3: Generate response, serving repeats from the response cache
+        llm_response = None
+        cached = coalesced = False
+        if speculation is not None and speculation.led:
+            with spans.span("speculation"):
+                speculated = await self._finish_speculation(speculation, model, classified_at)
+            if speculated is not None:
+                llm_response, model = speculated
+                await self._store_cached(request, model, llm_response)
+        elif speculation is not None and probed_model == model:
+            shared = await self._join_speculation(speculation, spans)
+            if shared is not None:
+                llm_response, model = shared
+                coalesced = True
+        if llm_response is None and probed_model == model:
+            # Already looked up before classifying
+            llm_response = probed
+            cached = llm_response is not None
+        elif llm_response is None:
+            with spans.span("cache_lookup"):
+                llm_response = await self._lookup_cached(request, model, classification.complexity)
+            cached = llm_response is not None
+        if llm_response is None:
+            llm_response, model, coalesced = await self._generate_coalesced(request, model, spans)
 
         # Step 4: Calculate latency
-        latency_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        end_time = time.perf_counter()
+        latency_ms = round((end_time - start_time) * 1000, 2)
 
         # Step 5: Record metrics
+        recording_at = time.perf_counter()
         metric = MetricsCollector.build_metric(
             query=request.query,
             classification=classification,
             llm_response=llm_response,
             latency_ms=latency_ms,
             model_pricing=self.settings.model_pricing,
+            cached=cached,
+            coalesced=coalesced,
+            classification_ms=round((classified_at - start_time) * 1000, 2),
+            generation_ms=round((end_time - classified_at) * 1000, 2),
+            queue_wait_ms=spans.total_ms("queue_wait") if self.admission else None,
+            spans=spans.spans,
+            model=model,
         )
         self.metrics_store.record(metric)
+        self._finish_trace(spans, metric, recording_at)
 
         # Step 6: Return response
         return RouteResponse(
@@ -91,4 +433,131 @@ class SmartRouter:
                 "total_tokens": llm_response.total_tokens,
             },
             estimated_cost_usd=metric.estimated_cost_usd,
+            cached=cached,
+            coalesced=coalesced,
+            spans=spans.spans if request.include_spans else None,
+        )
+
+    def _finish_trace(
+        self, spans: SpanRecorder, metric: RequestMetric, recording_at: float
+    ) -> None:
+        # The stored row packed its spans already; the trace still shares spans.spans
+        spans.add("record", recording_at, time.perf_counter())
+        if self.tracer is not None:
+            self.tracer.export(metric)
+
+    async def route_stream(
+        self, request: RouteRequest
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Streaming variant of route(), yielding ``(event, data)`` pairs.
+
+        Emits ``classification`` first, then ``delta`` events with answer text (and a
+        ``fallback`` event if System 1 fails before its first token), then ``done``
+        with usage, cost and timings.
+        """
+        with self.metrics_store.in_flight():
+            async for event in self._route_stream(request):
+                yield event
+
+    async def _route_stream(
+        self, request: RouteRequest
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        spans = SpanRecorder()
+        start_time = spans.origin
+
+        with spans.span("classify"):
+            classification = await self.classifier.classify(request.query)
+        classified_at = time.perf_counter()
+        model = self._select_model(classification, request.force_model)
+        yield (
+            "classification",
+            {
+                "complexity": classification.complexity.value,
+                "classification_confidence": classification.confidence,
+                "classifier_used": classification.classifier_used,
+                "model": model,
+            },
+        )
+
+        first_token_at = None
+        with spans.span("cache_lookup"):
+            llm_response = await self._lookup_cached(request, model, classification.complexity)
+        cached = llm_response is not None
+        if cached:
+            first_token_at = time.perf_counter()
+            yield "delta", {"text": llm_response.content}
+        else:
+            models = [model]
+            fallback_model = self._next_tier(model) if self.settings.fallback_to_system2 else None
+            if fallback_model is not None:
+                models.append(fallback_model)
+            for attempt, model in enumerate(models):
+                stage = "fallback" if attempt else "generate"
+                try:
+                    with spans.span(stage, model=model, attempt=str(attempt + 1)):
+                        async with self._admit(request, model, spans):
+                            with self._guard(model, timed=False):
+                                async for chunk in self.llm_client.generate_stream(
+                                    query=request.query,
+                                    system_prompt=request.system_prompt,
+                                    model=model,
+                                ):
+                                    if chunk.response is not None:
+                                        llm_response = chunk.response
+                                    elif chunk.delta:
+                                        first_token_at = first_token_at or time.perf_counter()
+                                        yield "delta", {"text": chunk.delta}
+                    break
+                except OverloadedError:
+                    raise
+                except Exception as exc:
+                    # Once text has been sent there is no clean way to switch models
+                    if first_token_at is not None or attempt == len(models) - 1:
+                        raise RoutingError(f"LLM generation failed: {exc}") from exc
+                    yield "fallback", {"model": models[attempt + 1]}
+            if model == models[0]:
+                await self._store_cached(request, model, llm_response)
+
+        end_time = time.perf_counter()
+        latency_ms = round((end_time - start_time) * 1000, 2)
+        ttft_ms = round((first_token_at - start_time) * 1000, 2) if first_token_at else None
+        tokens_per_second = None
+        if first_token_at and end_time > first_token_at and llm_response.completion_tokens:
+            generation_seconds = end_time - first_token_at
+            tokens_per_second = round(llm_response.completion_tokens / generation_seconds, 2)
+
+        recording_at = time.perf_counter()
+        metric = MetricsCollector.build_metric(
+            query=request.query,
+            classification=classification,
+            llm_response=llm_response,
+            latency_ms=latency_ms,
+            model_pricing=self.settings.model_pricing,
+            cached=cached,
+            ttft_ms=ttft_ms,
+            tokens_per_second=tokens_per_second,
+            classification_ms=round((classified_at - start_time) * 1000, 2),
+            generation_ms=round((end_time - classified_at) * 1000, 2),
+            queue_wait_ms=spans.total_ms("queue_wait") if self.admission else None,
+            spans=spans.spans,
+            model=model,
         )
+        self.metrics_store.record(metric)
+        self._finish_trace(spans, metric, recording_at)
+
+        done = {
+            "model_used": model,
+            "latency_ms": latency_ms,
+            "ttft_ms": ttft_ms,
+            "tokens_per_second": tokens_per_second,
+            "token_usage": {
+                "prompt_tokens": llm_response.prompt_tokens,
+                "completion_tokens": llm_response.completion_tokens,
+                "total_tokens": llm_response.total_tokens,
+            },
+            "estimated_cost_usd": metric.estimated_cost_usd,
+            "cached": cached,
+        }
+        if request.include_spans:
+            done["spans"] = [span.model_dump() for span in spans.spans]
+        yield "done", done
@@ -0,0 +1,57 @@
+import asyncio
+import weakref
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls that share a key onto one in-flight task.
+
+    The work runs as its own task, so a caller that is cancelled does not cancel
+    the call for everyone else waiting on it.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Task[T]] = {}
+        self._led: weakref.WeakSet[asyncio.Task[T]] = weakref.WeakSet()
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> asyncio.Task[T]:
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    def lead(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[asyncio.Task[T], bool]:
+        """Start ``fn`` as the call for ``key`` and return ``(task, True)``, or return the
+        call already in flight and False.
+
+        The caller owns a task it started. If it is cancelled or fails, waiters make their
+        own call instead of sharing the outcome.
+        """
+        if (task := self._in_flight.get(key)) is not None:
+            return task, False
+        task = self._start(key, fn)
+        self._led.add(task)
+        return task, True
+
+    def abandoned(self, task: asyncio.Task[T]) -> bool:
+        """Whether a waiter on ``task`` that just saw it fail should make its own call."""
+        return task in self._led and task.done() and not asyncio.current_task().cancelling()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is True if another caller did the work."""
+        while (task := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(task), True
+            except BaseException:
+                if not self.abandoned(task):
+                    raise
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+
+        return await asyncio.shield(self._start(key, fn)), False
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
@@ -4,6 +4,15 @@ export interface RouteRequest {
   query: string;
   system_prompt?: string | null;
   force_model?: string | null;
+  priority?: "interactive" | "batch";
+  include_spans?: boolean;
+}
+
+export interface Span {
+  name: string;
+  start_ms: number;
+  duration_ms: number;
+  attributes: Record<string, string>;
 }
 
 export interface RouteResponse {
@@ -19,17 +28,52 @@ export interface RouteResponse {
     total_tokens: number;
   };
   estimated_cost_usd: number;
+  cached: boolean;
+  coalesced: boolean;
+  spans?: Span[] | null;
 }
 
+export type MetricsWindow = "1m" | "5m" | "1h" | "24h";
+
 export interface MetricsSummary {
+  window: MetricsWindow | null;
   total_requests: number;
   requests_by_complexity: Record<string, number>;
   requests_by_model: Record<string, number>;
   avg_latency_ms: number;
+  latency_percentiles: Record<string, number>;
+  latency_percentiles_by_model: Record<string, Record<string, number>>;
+  latency_percentiles_by_complexity: Record<string, Record<string, number>>;
   total_tokens_used: number;
   total_estimated_cost_usd: number;
   avg_cost_per_request_usd: number;
   classifier_distribution: Record<string, number>;
+  cache_hits: number;
+  cache_misses: number;
+  semantic_cache_hits: number;
+  semantic_cache_misses: number;
+  coalesced_requests: number;
+  avg_ttft_ms: number;
+  avg_tokens_per_second: number;
+}
+
+export interface MetricsBucket {
+  bucket_start: number;
+  model: string;
+  complexity: ComplexityLevel;
+  classifier: string;
+  requests: number;
+  avg_latency_ms: number;
+  latency_percentiles: Record<string, number>;
+  total_tokens: number;
+  estimated_cost_usd: number;
+  cached_requests: number;
+}
+
+export interface MetricsTimeSeries {
+  window: MetricsWindow;
+  bucket_seconds: number;
+  buckets: MetricsBucket[];
 }
 
 export interface HealthResponse {
@@ -38,6 +82,7 @@ export interface HealthResponse {
   classifier_mode: string;
   system1_model: string;
   system2_model: string;
+  circuit_breakers: Record<string, "closed" | "open" | "half_open">;
 }
 
 export interface HistoryEntry {
@@ -1,9 +1,22 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from unittest.mock import AsyncMock
 
-from app.api.dependencies import get_router, get_settings
+from app.api.dependencies import (
+    get_circuit_breaker,
+    get_classifier,
+    get_model_ladder,
+    get_router,
+    get_settings,
+)
+from app.classifier.heuristic import HeuristicClassifier
+from app.classifier.llm_classifier import LLMClassifier
 from app.config import Settings
+from app.exceptions import OverloadedError
+from app.llm.base import LLMResponse
 from app.models import ComplexityLevel, RouteResponse
+from app.router.breaker import CircuitBreaker
 
 
 def make_test_settings():
@@ -24,6 +37,22 @@ async def test_health_endpoint(client, app):
     assert data["classifier_mode"] == "heuristic"
 
 
+@pytest.mark.asyncio
+async def test_health_reports_open_circuits(client, app):
+    breaker = CircuitBreaker(min_requests=1)
+    with pytest.raises(RuntimeError), breaker.guard("gpt-4o-mini"):
+        raise RuntimeError("provider error")
+    app.dependency_overrides[get_settings] = make_test_settings
+    app.dependency_overrides[get_circuit_breaker] = lambda: breaker
+
+    data = (await client.get("/health")).json()
+    assert data["status"] == "degraded"
+    assert data["circuit_breakers"] == {"gpt-4o-mini": "open"}
+
+    text = (await client.get("/metrics/prometheus")).text
+    assert 'smart_router_circuit_state{model="gpt-4o-mini"} 2' in text
+
+
 @pytest.mark.asyncio
 async def test_metrics_endpoint_empty(client):
     response = await client.get("/metrics")
@@ -32,6 +61,43 @@ async def test_metrics_endpoint_empty(client):
     assert data["total_requests"] == 0
 
 
+@pytest.mark.asyncio
+async def test_metrics_window_and_timeseries(client, test_metrics_store):
+    test_metrics_store.record_cache_lookup(hit=True)
+
+    response = await client.get("/metrics", params={"window": "5m"})
+    assert response.status_code == 200
+    assert response.json()["window"] == "5m"
+    assert response.json()["cache_hits"] == 1
+
+    response = await client.get("/metrics/timeseries", params={"window": "1h"})
+    assert response.status_code == 200
+    assert response.json()["buckets"] == []
+
+    response = await client.get("/metrics", params={"window": "2d"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_prometheus_endpoint(client):
+    response = await client.get("/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE smart_router_requests_total counter" in response.text
+
+
+@pytest.mark.asyncio
+async def test_route_endpoint_returns_503_when_overloaded(client, app):
+    mock_router = AsyncMock()
+    mock_router.route.side_effect = OverloadedError("gpt-4o-mini is at capacity")
+    app.dependency_overrides[get_router] = lambda: mock_router
+
+    response = await client.post("/route", json={"query": "Hello!"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
 @pytest.mark.asyncio
 async def test_route_endpoint(client, app):
     mock_router = AsyncMock()
@@ -59,3 +125,101 @@ async def test_route_endpoint(client, app):
 async def test_route_endpoint_empty_query(client):
     response = await client.post("/route", json={"query": ""})
     assert response.status_code == 422  # Validation error
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_endpoint(client, app):
+    app.dependency_overrides[get_classifier] = HeuristicClassifier
+    queries = [
+        "Hello!",
+        "Write a Python function to implement merge sort with detailed complexity analysis",
+    ]
+    response = await client.post("/classify/batch", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["complexity"] for r in results] == ["system1", "system2"]
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_empty_list(client):
+    response = await client.post("/classify/batch", json={"queries": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_route_stream_endpoint(client, app):
+    async def route_stream(request):
+        yield "classification", {"complexity": "system1", "model": "gpt-4o-mini"}
+        yield "delta", {"text": "Hi"}
+        yield "done", {"estimated_cost_usd": 0.0}
+
+    mock_router = AsyncMock()
+    mock_router.route_stream = route_stream
+    app.dependency_overrides[get_router] = lambda: mock_router
+
+    response = await client.post("/route/stream", json={"query": "Hello!"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: classification\n")
+    assert 'event: delta\ndata: {"text": "Hi"}' in response.text
+
+
+def test_get_router_wires_model_ladder(monkeypatch):
+    monkeypatch.setenv("ROUTING_TIERS", '[["a-mini"], ["a-large"]]')
+    for getter in (get_settings, get_model_ladder, get_router):
+        getter.cache_clear()
+    try:
+        assert get_router().ladder.tiers == [["a-mini"], ["a-large"]]
+    finally:
+        for getter in (get_settings, get_model_ladder, get_router):
+            getter.cache_clear()
+
+
+def test_get_router_is_a_singleton():
+    # Coalescing, hedging and speculation keep their state on the one shared router
+    get_router.cache_clear()
+    try:
+        assert get_router() is get_router()
+    finally:
+        get_router.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_routes_share_one_provider_call(
+    client, monkeypatch, test_metrics_store
+):
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(0.01)
+        return LLMResponse("Hi!", "gpt-4o-mini", 10, 5, 15)
+
+    llm_client = AsyncMock()
+    llm_client.generate.side_effect = slow_generate
+    monkeypatch.setattr("app.api.dependencies.get_llm_client", lambda: llm_client)
+    monkeypatch.setattr("app.api.dependencies.get_metrics_store", lambda: test_metrics_store)
+    get_router.cache_clear()
+    try:
+        responses = await asyncio.gather(
+            *(client.post("/route", json={"query": "Hello!"}) for _ in range(4))
+        )
+    finally:
+        get_router.cache_clear()
+
+    assert [r.status_code for r in responses] == [200] * 4
+    llm_client.generate.assert_called_once()
+    assert test_metrics_store.get_summary().coalesced_requests == 3
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_survives_a_failed_item(client, app):
+    llm = LLMClassifier(Settings(api_key="test-key"), AsyncMock())
+    llm.client.chat.completions.create.side_effect = [
+        MagicMock(choices=[MagicMock(message=MagicMock(content='{"complexity": "system2"}'))]),
+        MagicMock(choices=[MagicMock(message=MagicMock(content="not json"))]),
+    ]
+    app.dependency_overrides[get_classifier] = lambda: llm
+
+    response = await client.post("/classify/batch", json={"queries": ["Explain X", "Hello!"]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["classifier_used"] for r in results] == ["llm", "llm/heuristic_fallback"]
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from app.bench import classifiers as classifier_bench
+from app.bench import replay as replay_cli
+from app.bench.replay import FakeLLMClient, build_router, compare, load_trace, replay
+
+
+def write_trace(path, queries, gap_ms=None):
+    lines = [
+        {"query": q, **({"interarrival_ms": gap_ms} if gap_ms is not None else {})} for q in queries
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def test_load_trace_reads_queries_and_gaps(tmp_path):
+    write_trace(tmp_path / "gaps.jsonl", ["Hello!", "Write a parser"], gap_ms=5)
+    (tmp_path / "bodies.jsonl").write_text('{"title": "t", "body": "Explain TCP"}\n')
+
+    requests, gaps = load_trace(str(tmp_path / "gaps.jsonl"))
+    assert [r.query for r in requests] == ["Hello!", "Write a parser"]
+    assert gaps == [5, 5]
+    assert all(r.include_spans for r in requests)
+
+    requests, gaps = load_trace(str(tmp_path / "bodies.jsonl"))
+    assert requests[0].query == "Explain TCP"
+    assert gaps is None
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_throughput_and_stages(tmp_path):
+    write_trace(tmp_path / "trace.jsonl", [f"Hello {i}" for i in range(20)])
+    requests, _ = load_trace(str(tmp_path / "trace.jsonl"))
+    client = FakeLLMClient(latency_ms=2, completion_tokens=10)
+
+    results = await replay(build_router(client), requests, concurrency=4)
+
+    assert results["requests"] == 20 and client.calls == 20
+    assert results["errors"] == {}
+    assert results["throughput_rps"] > 0
+    assert {"classify", "generate", "record"} <= results["stages_ms"].keys()
+    # The fake provider's time is excluded from the router's overhead
+    assert results["overhead_ms"]["p50"] < results["latency_ms"]["p50"]
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {
+        "throughput_rps": 1000.0,
+        "overhead_ms": {"p50": 1.0, "p95": 2.0},
+        "stages_ms": {"classify": {"p50": 0.1}},
+        "alloc": {"peak_kib": {"p50": 10.0}},
+    }
+    close = {
+        "throughput_rps": 950.0,
+        "overhead_ms": {"p50": 1.05, "p95": 2.1},
+        "stages_ms": {"classify": {"p50": 0.14}},  # +40%, but within timer noise
+        "alloc": {"peak_kib": {"p50": 10.5}},
+    }
+    assert compare(close, baseline, tolerance=0.1) == []
+
+    worse = {**close, "throughput_rps": 800.0, "alloc": {"peak_kib": {"p50": 15.0}}}
+    regressions = compare(worse, baseline, tolerance=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("throughput_rps")
+
+
+def test_replay_cli_fails_against_a_faster_baseline(tmp_path):
+    write_trace(tmp_path / "trace.jsonl", ["Hello!", "What is Python?"] * 5, gap_ms=0)
+    out = tmp_path / "results.json"
+    assert (
+        replay_cli.main(
+            [
+                str(tmp_path / "trace.jsonl"),
+                "--alloc-requests",
+                "5",
+                "--out",
+                str(out),
+            ]
+        )
+        == 0
+    )
+    results = json.loads(out.read_text())
+    assert results["config"]["open_loop"] is True
+    assert results["alloc"]["requests"] == 5
+
+    results["throughput_rps"] *= 100
+    out.write_text(json.dumps(results))
+    assert (
+        replay_cli.main(
+            [
+                str(tmp_path / "trace.jsonl"),
+                "--alloc-requests",
+                "0",
+                "--baseline",
+                str(out),
+            ]
+        )
+        == 1
+    )
+
+
+def test_classifier_corpus_is_deterministic_and_covers_every_shape():
+    corpus = classifier_bench.build_corpus(seed=3)
+    assert corpus == classifier_bench.build_corpus(seed=3)
+    assert {"greeting", "factual", "math", "code_dump"} <= corpus.keys()
+    assert sum(name.startswith("adversarial/") for name in corpus) >= 10
+    assert all(len(dump) >= 10_000 for dump in corpus["code_dump"])
+
+
+@pytest.mark.asyncio
+async def test_classifier_benchmarks_report_per_category():
+    corpus = {"greeting": ["Hello!"], "code_dump": ["```python\ndef f(x):\n    return x\n```"]}
+    results = await classifier_bench.run(corpus, min_time=0.001, repeats=1)
+
+    assert results.keys() == {"heuristic.classify", "hybrid.classify", "collector.build_metric"}
+    for categories in results.values():
+        assert categories.keys() == corpus.keys()
+        for r in categories.values():
+            assert r["ns_per_op"] > 0 and r["peak_bytes_per_call"] > 0
+            assert r["ops_per_sec"] == pytest.approx(1e9 / r["ns_per_op"], rel=1e-3)
+
+
+def test_classifier_compare_flags_slowdowns():
+    baseline = {"heuristic.classify": {"math": {"ns_per_op": 1000.0, "peak_bytes_per_call": 500}}}
+    slower = {"heuristic.classify": {"math": {"ns_per_op": 10_000.0, "peak_bytes_per_call": 510}}}
+    assert classifier_bench.compare(baseline, baseline, tolerance=0.25) == []
+    assert classifier_bench.compare(slower, baseline, tolerance=0.25) == [
+        "heuristic.classify[math] ns_per_op 10000.0 vs 1000.0 (10.00x)"
+    ]
@@ -0,0 +1,206 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.cache.lru import LRUCache, normalize_query
+from app.cache.response import ResponseCache
+from app.cache.semantic import SemanticResponseCache
+from app.classifier.cached import CachedClassifier
+from app.config import Settings
+from app.llm.base import LLMResponse
+from app.metrics.store import MetricsStore
+from app.models import ClassificationResult, ComplexityLevel
+
+SYSTEM1 = ComplexityLevel.SYSTEM1
+SYSTEM2 = ComplexityLevel.SYSTEM2
+
+
+def make_result():
+    return ClassificationResult(
+        complexity=ComplexityLevel.SYSTEM1,
+        confidence=0.9,
+        reasoning="test",
+        classifier_used="llm",
+    )
+
+
+@pytest.fixture
+def inner_classifier():
+    classifier = AsyncMock()
+    classifier.name = "llm"
+    classifier.classify.return_value = make_result()
+    classifier.classify_many.side_effect = lambda queries: [make_result() for _ in queries]
+    return classifier
+
+
+@pytest.fixture
+def cached(inner_classifier):
+    return CachedClassifier(inner_classifier, max_entries=100, ttl_seconds=60, max_bytes=1 << 20)
+
+
+def test_normalize_query_folds_case_whitespace_and_punctuation():
+    assert normalize_query("  What is  Python?? ") == normalize_query("what is python")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl_seconds=60, max_bytes=1 << 20)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats().evictions == 1
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(max_entries=10, ttl_seconds=0, max_bytes=1 << 20)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.stats().expirations == 1
+
+
+def test_lru_respects_memory_cap():
+    cache = LRUCache(max_entries=100, ttl_seconds=60, max_bytes=200, sizeof=lambda v: 100)
+    for key in range(5):
+        cache.set(key, "x")
+
+    stats = cache.stats()
+    assert stats.size_bytes <= 200
+    assert stats.entries < 5
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_is_served_from_cache(cached, inner_classifier):
+    await cached.classify("What is Python?")
+    result = await cached.classify("what is python")
+
+    inner_classifier.classify.assert_called_once()
+    assert result.classifier_used == "llm"
+    assert cached.cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_classify_many_only_forwards_misses(cached, inner_classifier):
+    await cached.classify("Hello")
+    results = await cached.classify_many(["hello!", "Bye", "bye"])
+
+    inner_classifier.classify_many.assert_called_once_with(["Bye"])
+    assert len(results) == 3
+
+
+@pytest.mark.asyncio
+async def test_fallback_results_are_not_cached(cached, inner_classifier):
+    fallback = make_result()
+    fallback.classifier_used = "hybrid/heuristic_fallback"
+    inner_classifier.classify.return_value = fallback
+    inner_classifier.classify_many.side_effect = lambda queries: [fallback for _ in queries]
+
+    await cached.classify("Hello")
+    await cached.classify("Hello")
+    await cached.classify_many(["Bye"])
+    await cached.classify_many(["Bye"])
+
+    assert inner_classifier.classify.call_count == 2
+    assert inner_classifier.classify_many.call_count == 2
+    assert cached.cache.stats().entries == 0
+
+
+@pytest.mark.asyncio
+async def test_classification_cache_events_reach_metrics(inner_classifier):
+    store = MetricsStore()
+    small = CachedClassifier(
+        inner_classifier,
+        max_entries=1,
+        ttl_seconds=60,
+        max_bytes=1 << 20,
+        on_event=store.record_classification_cache,
+    )
+    expiring = CachedClassifier(
+        inner_classifier,
+        max_entries=10,
+        ttl_seconds=0,
+        max_bytes=1 << 20,
+        on_event=store.record_classification_cache,
+    )
+
+    for query in ("Hello", "Hello", "Bye"):  # miss, hit, miss + eviction
+        await small.classify(query)
+    for _ in range(2):  # miss, expiration + miss
+        await expiring.classify("Hello")
+
+    summary = store.get_summary()
+    assert summary.classification_cache_hits == 1
+    assert summary.classification_cache_misses == 4
+    assert summary.classification_cache_evictions == 1
+    assert summary.classification_cache_expirations == 1
+    assert "smart_router_classification_cache_evictions_total 1" in store.render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.db")
+    response = LLMResponse("Paris", "gpt-4o-mini", 10, 5, 15)
+
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=1 << 20, path=path)
+    await cache.set("gpt-4o-mini", None, "Capital of France?", response)
+    cache.close()
+
+    reopened = ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=1 << 20, path=path)
+    assert await reopened.get("gpt-4o-mini", None, "capital of france") == response
+    assert await reopened.get("gpt-4o", None, "capital of france") is None
+    reopened.close()
+
+
+@pytest.fixture
+def semantic_cache():
+    return SemanticResponseCache(
+        thresholds={SYSTEM1: 0.9, SYSTEM2: 1.01},
+        max_entries=100,
+        ttl_seconds=60,
+    )
+
+
+def test_semantic_cache_matches_paraphrase(semantic_cache):
+    response = LLMResponse("Paris", "gpt-4o-mini", 10, 5, 15)
+    semantic_cache.set("gpt-4o-mini", None, "What's the capital of France?", response)
+
+    assert semantic_cache.get("gpt-4o-mini", None, "capital of france", SYSTEM1) == response
+    assert semantic_cache.get("gpt-4o-mini", None, "capital of germany", SYSTEM1) is None
+
+
+@pytest.mark.parametrize(
+    ("cached", "query"),
+    [
+        ("What was the population of Tokyo in 1990?", "What was the population of Tokyo in 1991?"),
+        (
+            "How many days are in February in a leap year?",
+            "How many days are in February in a non leap year?",
+        ),
+        ("Who is the president of France?", "Who was the president of France?"),
+        ("Is it safe to eat raw eggs?", "Isn't it safe to eat raw eggs?"),
+    ],
+)
+def test_semantic_cache_rejects_near_duplicates_with_different_answers(
+    semantic_cache, cached, query
+):
+    default = Settings.model_fields["semantic_cache_threshold_system1"].default
+    semantic_cache.thresholds[SYSTEM1] = default
+    semantic_cache.set("gpt-4o-mini", None, cached, LLMResponse("answer", "m", 1, 1, 2))
+
+    assert semantic_cache.get("gpt-4o-mini", None, query, SYSTEM1) is None
+
+
+def test_semantic_cache_is_scoped_to_model_and_system_prompt(semantic_cache):
+    semantic_cache.set("gpt-4o-mini", None, "capital of france", LLMResponse("Paris", "m", 1, 1, 2))
+
+    assert semantic_cache.get("gpt-4o", None, "capital of france", SYSTEM1) is None
+    assert semantic_cache.get("gpt-4o-mini", "Be terse", "capital of france", SYSTEM1) is None
+
+
+def test_semantic_cache_threshold_is_per_tier(semantic_cache):
+    semantic_cache.set("gpt-4o", None, "capital of france", LLMResponse("Paris", "m", 1, 1, 2))
+
+    assert semantic_cache.get("gpt-4o", None, "capital of france", SYSTEM2) is None
@@ -1,7 +1,27 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import numpy as np
+import openai
 import pytest
 
+from app.classifier import train as train_cli
 from app.classifier.heuristic import HeuristicClassifier
-from app.models import ComplexityLevel
+from app.classifier.hybrid import HybridClassifier
+from app.classifier.learned import (
+    FeatureConfig,
+    LabelLog,
+    LearnedClassifier,
+    load_model,
+    save_model,
+    train,
+)
+from app.classifier.llm_classifier import LLMClassifier
+from app.config import Settings
+from app.exceptions import ClassificationError, ConfigurationError
+from app.models import ClassificationResult, ComplexityLevel
 
 
 @pytest.fixture
@@ -79,3 +99,328 @@ async def test_classification_has_reasoning(classifier):
 async def test_confidence_is_bounded(classifier):
     result = await classifier.classify("Tell me everything about quantum physics")
     assert 0.0 <= result.confidence <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_sql_statement_detected_as_code(classifier):
+    result = await classifier.classify("Why is SELECT name FROM users slow?")
+    assert "code_detected" in result.reasoning
+
+
+@pytest.mark.asyncio
+async def test_repeated_sql_verbs_without_clause(classifier):
+    result = await classifier.classify("select " * 1400)
+    assert "code_detected" not in result.reasoning
+
+
+@pytest.mark.asyncio
+async def test_overlapping_keywords_counted_once_each(classifier):
+    result = await classifier.classify("reasoning")
+    assert "system2_keywords(2_hits)" in result.reasoning
+
+
+@pytest.mark.asyncio
+async def test_classify_many_matches_classify(classifier):
+    queries = ["Hello!", "Calculate the integral of x^2 from 0 to 5", "What is Python?"]
+    results = await classifier.classify_many(queries)
+    assert results == [await classifier.classify(q) for q in queries]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_classify_many_escalates_low_confidence_only():
+    hybrid = HybridClassifier(Settings(api_key="test-key", confidence_threshold=0.7))
+    hybrid.llm_classifier.classify = AsyncMock(
+        return_value=ClassificationResult(
+            complexity=ComplexityLevel.SYSTEM2,
+            confidence=0.9,
+            reasoning="llm",
+            classifier_used="llm",
+        )
+    )
+
+    results = await hybrid.classify_many(["Hello!", "Tell me about dogs", "Tell me about dogs"])
+
+    hybrid.llm_classifier.classify.assert_called_once_with("Tell me about dogs")
+    assert [r.classifier_used for r in results] == ["hybrid/heuristic", "hybrid/llm", "hybrid/llm"]
+
+
+def provider_down():
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://llm.test"))
+
+
+@pytest.mark.asyncio
+async def test_hybrid_falls_back_to_heuristic_on_classifier_errors():
+    hybrid = HybridClassifier(Settings(api_key="test-key", confidence_threshold=0.99))
+    hybrid.llm_classifier.client = AsyncMock()
+    hybrid.llm_classifier.client.chat.completions.create.side_effect = provider_down()
+
+    result = await hybrid.classify("Tell me about dogs")
+    assert result.classifier_used == "hybrid/heuristic_fallback"
+
+    hybrid.llm_classifier.client.chat.completions.create.side_effect = None
+    hybrid.llm_classifier.client.chat.completions.create.return_value = completion("not json")
+    results = await hybrid.classify_many(["Tell me about dogs"])
+    assert results[0].classifier_used == "hybrid/heuristic_fallback"
+
+
+@pytest.mark.asyncio
+async def test_hybrid_does_not_hide_unexpected_errors():
+    hybrid = HybridClassifier(Settings(api_key="test-key", confidence_threshold=0.99))
+    hybrid.llm_classifier.classify = AsyncMock(side_effect=AttributeError("bug"))
+
+    with pytest.raises(AttributeError):
+        await hybrid.classify("Tell me about dogs")
+    with pytest.raises(AttributeError):
+        await hybrid.classify_many(["Tell me about dogs"])
+
+
+SYSTEM1_QUERIES = [
+    "Hello!",
+    "Hi there",
+    "Thanks a lot",
+    "What is the capital of France?",
+    "Translate 'cat' to Spanish",
+    "Who wrote Hamlet?",
+    "Good morning",
+    "Define photosynthesis",
+]
+SYSTEM2_QUERIES = [
+    "Implement a thread-safe LRU cache in Python with tests",
+    "Analyze the trade-offs between microservices and a monolith",
+    "Prove that the square root of 2 is irrational",
+    "Debug this async function that deadlocks under load",
+    "Design a database schema for a multi-tenant billing system",
+    "Compare quicksort and mergesort complexity and explain why",
+    "Write a recursive algorithm to solve the knapsack problem",
+    "Evaluate the economic implications of a carbon tax",
+]
+
+
+def write_labels(path, pairs):
+    path.write_text(
+        "".join(json.dumps({"query": q, "complexity": c.value}) + "\n" for q, c in pairs)
+        + '{"request_id": "not-a-labeled-query"}\n'
+    )
+
+
+@pytest.mark.asyncio
+async def test_learned_classifier_round_trips_through_model_file(tmp_path):
+    queries = SYSTEM1_QUERIES + SYSTEM2_QUERIES
+    labels = [ComplexityLevel.SYSTEM1] * 8 + [ComplexityLevel.SYSTEM2] * 8
+    model = train(queries, labels, features=FeatureConfig(dim=1 << 12), epochs=20)
+    model.metadata = {"model_version": "test-1"}
+    save_model(model, tmp_path / "classifier.bin")
+
+    classifier = LearnedClassifier.from_path(tmp_path / "classifier.bin")
+
+    assert isinstance(classifier.model.weights, np.memmap)
+    results = [await classifier.classify(q) for q in queries]
+    assert [r.complexity for r in results] == labels
+    assert results[0].classifier_used == "learned"
+    assert "test-1" in results[0].reasoning
+    assert classifier.model.probability(queries[-1]) == pytest.approx(
+        model.probability(queries[-1]), abs=1e-6
+    )
+
+
+def test_learned_model_file_is_validated(tmp_path):
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"not a model at all")
+    with pytest.raises(ConfigurationError):
+        load_model(bad)
+    with pytest.raises(ConfigurationError):
+        load_model(tmp_path / "missing.bin")
+
+    good = tmp_path / "good.bin"
+    save_model(train(["hi", "why"], [ComplexityLevel.SYSTEM1, ComplexityLevel.SYSTEM2]), good)
+    data = good.read_bytes()
+    corrupt_header = tmp_path / "corrupt_header.bin"
+    corrupt_header.write_bytes(data[:12] + b"#" + data[13:])
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(data[: len(data) // 2])
+    for path in (corrupt_header, truncated):
+        with pytest.raises(ConfigurationError):
+            load_model(path)
+
+
+def test_training_cli_reads_logs_and_writes_versioned_model(tmp_path):
+    write_labels(tmp_path / "a.jsonl", [(q, ComplexityLevel.SYSTEM1) for q in SYSTEM1_QUERIES])
+    write_labels(tmp_path / "b.jsonl", [(q, ComplexityLevel.SYSTEM2) for q in SYSTEM2_QUERIES])
+    out = tmp_path / "models" / "classifier.bin"
+
+    code = train_cli.main(
+        [
+            str(tmp_path / "a.jsonl"),
+            str(tmp_path / "b.jsonl"),
+            "--out",
+            str(out),
+            "--model-version",
+            "v7",
+            "--dim-bits",
+            "12",
+            "--holdout",
+            "0",
+        ]
+    )
+
+    assert code == 0
+    model = load_model(out)
+    assert model.version == "v7"
+    assert model.metadata["label_counts"] == {"system1": 8, "system2": 8}
+
+
+@pytest.mark.asyncio
+async def test_llm_classifier_logs_labels_for_training(tmp_path):
+    client = AsyncMock()
+    client.chat.completions.create.return_value.choices = [AsyncMock()]
+    client.chat.completions.create.return_value.choices[
+        0
+    ].message.content = '{"complexity": "system2", "confidence": 0.9, "reasoning": "coding"}'
+    client.chat.completions.create.return_value.usage = None
+    label_log = LabelLog(str(tmp_path / "labels.jsonl"))
+    classifier = LLMClassifier(Settings(api_key="test-key"), client, label_log=label_log)
+
+    await classifier.classify("Refactor this module")
+    label_log.close()
+
+    queries, labels = train_cli.load_examples([str(tmp_path / "labels.jsonl")])
+    assert queries == ["Refactor this module"]
+    assert labels == [ComplexityLevel.SYSTEM2]
+
+
+def test_load_examples_filters_on_confidence(tmp_path):
+    path = tmp_path / "labels.jsonl"
+    lines = [
+        {"query": "Hi", "complexity": "system1", "confidence": 0.9},
+        {"query": "Prove it", "complexity": "system2", "confidence": 0.3},
+        {"query": "Unknown", "complexity": "system1", "confidence": None},
+        {"query": "Hand-labeled", "label": "system2"},
+        {"query": "Garbled", "complexity": "system1", "confidence": "high"},
+    ]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+
+    queries, _ = train_cli.load_examples([str(path)], min_confidence=0.5)
+    assert queries == ["Hi", "Hand-labeled"]
+    queries, _ = train_cli.load_examples([str(path)])
+    assert queries == ["Hi", "Prove it", "Unknown", "Hand-labeled"]
+
+
+def completion(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage = None
+    return response
+
+
+@pytest.mark.asyncio
+async def test_llm_classifier_batches_concurrent_queries():
+    client = AsyncMock()
+    client.chat.completions.create.return_value = completion(
+        json.dumps(
+            {
+                "results": [
+                    {"id": 0, "complexity": "system1", "confidence": 0.9, "reasoning": "greeting"},
+                    {"id": 1, "complexity": "system2", "confidence": 0.8, "reasoning": "coding"},
+                ]
+            }
+        )
+    )
+    settings = Settings(api_key="test-key", classifier_batch_size=3, classifier_batch_window_ms=5)
+    classifier = LLMClassifier(settings, client)
+
+    results = await classifier.classify_many(["Hello!", "Write a parser", "Hello!"])
+
+    client.chat.completions.create.assert_called_once()
+    sent = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert json.loads(sent) == [{"id": 0, "query": "Hello!"}, {"id": 1, "query": "Write a parser"}]
+    assert [r.complexity for r in results] == [
+        ComplexityLevel.SYSTEM1,
+        ComplexityLevel.SYSTEM2,
+        ComplexityLevel.SYSTEM1,
+    ]
+    assert classifier._batcher.batches == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_classifier_retries_unanswered_batch_items_singly():
+    client = AsyncMock()
+    client.chat.completions.create.side_effect = [
+        completion('{"results": [{"id": 1, "complexity": "system2"}, {"id": 7}]}'),
+        completion('{"complexity": "system1", "confidence": 0.95, "reasoning": "greeting"}'),
+    ]
+    settings = Settings(api_key="test-key", classifier_batch_size=2, classifier_batch_window_ms=50)
+    classifier = LLMClassifier(settings, client)
+
+    greeting, code = await asyncio.gather(
+        classifier.classify("Hello!"), classifier.classify("Write a parser")
+    )
+
+    assert client.chat.completions.create.call_count == 2
+    retry = client.chat.completions.create.call_args.kwargs["messages"]
+    assert retry[1]["content"] == "Hello!"
+    assert greeting.complexity == ComplexityLevel.SYSTEM1
+    assert code.complexity == ComplexityLevel.SYSTEM2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_retry_only_fails_its_own_caller():
+    client = AsyncMock()
+    client.chat.completions.create.side_effect = [
+        completion('{"results": [{"id": 0, "complexity": "system1"}]}'),
+        completion('{"complexity": "system2"}'),
+        completion("not json"),
+    ]
+    settings = Settings(api_key="test-key", classifier_batch_size=3, classifier_batch_window_ms=50)
+    classifier = LLMClassifier(settings, client)
+
+    results = await asyncio.gather(
+        classifier.classify("Hello!"),
+        classifier.classify("Write a parser"),
+        classifier.classify("Prove it"),
+        return_exceptions=True,
+    )
+
+    assert [r.complexity for r in results[:2]] == [ComplexityLevel.SYSTEM1, ComplexityLevel.SYSTEM2]
+    assert isinstance(results[2], ClassificationError)
+
+
+@pytest.mark.asyncio
+async def test_batch_provider_error_reaches_every_caller():
+    client = AsyncMock()
+    client.chat.completions.create.side_effect = provider_down()
+    settings = Settings(api_key="test-key", classifier_batch_size=2)
+    classifier = LLMClassifier(settings, client)
+
+    results = await asyncio.gather(
+        classifier.classify("Hello!"),
+        classifier.classify("Write a parser"),
+        return_exceptions=True,
+    )
+
+    client.chat.completions.create.assert_called_once()
+    assert all(isinstance(r, ClassificationError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_llm_classify_many_is_bounded_and_falls_back_per_item():
+    in_flight = peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if kwargs["messages"][1]["content"] == "Write a parser":
+            raise provider_down()
+        return completion('{"complexity": "system2", "confidence": 0.9, "reasoning": "llm"}')
+
+    client = AsyncMock()
+    client.chat.completions.create.side_effect = create
+    classifier = LLMClassifier(Settings(api_key="test-key", classify_batch_concurrency=2), client)
+    queries = [f"Explain topic {i}" for i in range(5)] + ["Write a parser"]
+
+    results = await classifier.classify_many(queries)
+
+    assert peak == 2
+    assert [r.classifier_used for r in results] == ["llm"] * 5 + ["llm/heuristic_fallback"]
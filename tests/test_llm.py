@@ -0,0 +1,143 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from app.api.dependencies import get_llm_client, get_openai_client
+from app.classifier.hybrid import HybridClassifier
+from app.config import Settings
+from app.exceptions import RateLimitedError
+from app.llm.http import build_http_client, build_openai_client, warm_connections
+from app.llm.openai_client import OpenAIClient
+from app.llm.pool import Endpoint, EndpointPool
+from app.llm.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def settings():
+    return Settings(api_key="test-key", http_connect_timeout_seconds=1.5)
+
+
+def make_openai(content="hi", model="provider-model"):
+    openai = MagicMock()
+    openai.chat.completions.create = AsyncMock(
+        return_value=SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=20, completion_tokens=5, total_tokens=25),
+        )
+    )
+    return openai
+
+
+@pytest.mark.asyncio
+async def test_http_client_uses_configured_timeouts(settings):
+    http_client = build_http_client(settings)
+    assert http_client.timeout.connect == 1.5
+    assert http_client.timeout.read == settings.http_read_timeout_seconds
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_classifier_and_generation_share_one_client(settings):
+    http_client = build_http_client(settings)
+    client = build_openai_client(settings, http_client)
+
+    hybrid = HybridClassifier(settings, client)
+
+    assert hybrid.llm_classifier.client is client
+    assert get_llm_client().client is get_openai_client()
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_warm_connections_counts_successes():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(404)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        warmed = await warm_connections(http_client, "https://provider.test/v1/", 3)
+
+    assert warmed == 3
+    assert all(r.method == "HEAD" for r in requests)
+
+
+@pytest.mark.asyncio
+async def test_warm_connections_tolerates_failures():
+    def handler(request):
+        raise httpx.ConnectError("unreachable")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        assert await warm_connections(http_client, "https://provider.test/v1/", 2) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_then_rejects_when_budget_is_exhausted():
+    limiter = RateLimiter({"gpt-4o": {"tpm": 6000}}, max_wait_seconds=0.5)
+
+    await limiter.acquire("gpt-4o", 6000)
+    started = time.perf_counter()
+    await limiter.acquire("gpt-4o", 10)  # refills at 100 tokens/s
+    assert time.perf_counter() - started >= 0.05
+
+    with pytest.raises(RateLimitedError):
+        await limiter.acquire("gpt-4o", 1000)
+    assert limiter.stats()["gpt-4o"]["throttled"] == 1
+    assert limiter.stats()["gpt-4o"]["rejected"] == 1
+    assert await limiter.acquire("unlimited-model", 10**6) is None
+
+
+@pytest.mark.asyncio
+async def test_generate_reconciles_estimate_with_actual_usage(settings):
+    limiter = RateLimiter({"gpt-4o-mini": {"rpm": 60, "tpm": 60}})
+    client = OpenAIClient(settings, make_openai(), rate_limiter=limiter)
+    await client.generate("hello", model="gpt-4o-mini")
+
+    stats = limiter.stats()["gpt-4o-mini"]
+    assert stats["requests_remaining"] == pytest.approx(59, abs=0.5)
+    # Reserved the prompt estimate + 256 completion tokens (into debt), then settled to
+    # the 25 actually billed
+    assert stats["tokens_remaining"] == pytest.approx(60 - 25, abs=0.5)
+
+
+def test_pool_prefers_low_latency_and_ejects_failing_endpoints():
+    fast, slow = Endpoint("fast", MagicMock()), Endpoint("slow", MagicMock())
+    fast.ewma_ms, slow.ewma_ms = 100.0, 400.0
+    pool = EndpointPool([slow, fast], eject_after_failures=2, eject_seconds=0.05)
+    assert pool.pick() is fast
+
+    fast.outstanding = 4  # 100ms x 5 outstanding is worse than 400ms idle
+    assert pool.pick() is slow
+    fast.outstanding = 0
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError), pool.lease() as endpoint:
+            assert endpoint is fast
+            raise RuntimeError("502 from gateway")
+    assert pool.pick() is slow
+    assert pool.stats()["fast"]["ejected"]
+
+    time.sleep(0.06)
+    with pool.lease() as endpoint:
+        assert endpoint is fast  # re-admitted after the ejection period
+    assert fast.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_goes_through_endpoint_pool(settings):
+    default, pooled = make_openai(), make_openai(model="llama-3.1-8b-instant")
+    pool = EndpointPool([Endpoint("groq", pooled, model="llama-3.1-8b-instant")])
+    client = OpenAIClient(settings, default, pools={"gpt-4o-mini": pool})
+
+    response = await client.generate("hello", model="gpt-4o-mini")
+
+    default.chat.completions.create.assert_not_called()
+    assert pooled.chat.completions.create.call_args.kwargs["model"] == "llama-3.1-8b-instant"
+    # Reported under the logical model so pricing and metrics line up
+    assert response.model == "gpt-4o-mini"
+    assert pool.stats()["groq"]["requests"] == 1
@@ -1,9 +1,21 @@
+import json
+
 import pytest
 
+from app.llm.base import LLMResponse
 from app.metrics.collector import MetricsCollector
+from app.metrics.columns import ColumnarBuffer
+from app.metrics.persistence import SQLiteMetricsLog, flush_metrics, restore_metrics
+from app.metrics.sketch import LatencySketch
 from app.metrics.store import MetricsStore
-from app.models import ClassificationResult, ComplexityLevel, RequestMetric
-from app.llm.base import LLMResponse
+from app.metrics.tracing import FileExporter, SpanRecorder
+from app.models import (
+    ClassificationResult,
+    ComplexityLevel,
+    MetricsWindow,
+    RequestMetric,
+    Span,
+)
 
 
 @pytest.fixture
@@ -69,6 +81,217 @@ def test_get_recent(store):
     assert recent[0].latency_ms == 2.0
 
 
+def test_recent_buffer_is_bounded_but_summary_is_not():
+    store = MetricsStore(capacity=3)
+    for i in range(10):
+        store.record(make_metric(latency_ms=float(i), total_tokens=10))
+
+    assert [m.latency_ms for m in store.get_recent(100)] == [7.0, 8.0, 9.0]
+    summary = store.get_summary()
+    assert summary.total_requests == 10
+    assert summary.total_tokens_used == 100
+    assert summary.avg_latency_ms == 4.5
+
+
+def test_recent_rows_round_trip_through_columns(store):
+    store.record(make_metric(ttft_ms=12.5, cached=True))
+    store.record(make_metric(model_used="gpt-4o", complexity=ComplexityLevel.SYSTEM2))
+
+    first, second = store.get_recent(2)
+    assert first == make_metric(ttft_ms=12.5, cached=True, timestamp=first.timestamp)
+    assert second.model_used == "gpt-4o"
+    assert second.complexity == ComplexityLevel.SYSTEM2
+    assert second.ttft_ms is None
+
+
+def test_spans_are_packed_into_the_row():
+    buffer = ColumnarBuffer(2)
+    spans = [
+        Span(name="classify", start_ms=0.0, duration_ms=12.34),
+        Span(name="generate", start_ms=12.5, duration_ms=803.21, attributes={"model": "gpt-4o"}),
+    ]
+    buffer.append(make_metric(spans=spans))
+    buffer.append(make_metric())
+
+    first, second = buffer.recent(2)
+    assert first.spans == spans
+    assert second.spans == []
+    assert [len(row) for row in buffer.spans] == [20, 0]  # 10 bytes per span
+
+
+def test_latency_sketch_quantiles_within_relative_accuracy():
+    sketch = LatencySketch(relative_accuracy=0.01)
+    values = [float(v) for v in range(1, 10_001)]
+    for v in values:
+        sketch.add(v)
+
+    for q, estimate in zip((0.5, 0.9, 0.99, 0.999), sketch.quantiles()):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(estimate - exact) <= 0.01 * exact
+
+
+def test_latency_sketches_merge():
+    a, b, both = LatencySketch(), LatencySketch(), LatencySketch()
+    for v in range(1, 500):
+        a.add(v)
+        both.add(v)
+    for v in range(500, 1000):
+        b.add(v)
+        both.add(v)
+
+    a.merge(b)
+    assert a.count == both.count
+    assert a.quantiles() == both.quantiles()
+
+
+def test_summary_reports_latency_percentiles(store):
+    for i in range(1, 101):
+        store.record(make_metric(latency_ms=float(i)))
+    store.record(make_metric(latency_ms=5000.0, model_used="gpt-4o"))
+
+    summary = store.get_summary()
+    assert set(summary.latency_percentiles) == {"p50", "p90", "p99", "p99.9"}
+    assert summary.latency_percentiles["p50"] == pytest.approx(51, rel=0.01)
+    assert summary.latency_percentiles_by_model["gpt-4o"]["p99"] == pytest.approx(5000, rel=0.01)
+    assert summary.latency_percentiles_by_complexity["system1"]["p99.9"] == pytest.approx(
+        5000, rel=0.01
+    )
+
+
+def test_windowed_summary_only_counts_recent_buckets(store):
+    now = 1_000_000.0
+    store.record(make_metric(timestamp=now - 2 * 3600, latency_ms=900.0))
+    store.record(make_metric(timestamp=now - 1800, latency_ms=300.0))
+    store.record(make_metric(timestamp=now - 5, latency_ms=100.0, model_used="gpt-4o"))
+
+    assert store.get_summary().total_requests == 3
+    last_hour = store.get_summary(MetricsWindow.HOUR, now=now)
+    assert last_hour.window == MetricsWindow.HOUR
+    assert last_hour.total_requests == 2
+    assert last_hour.avg_latency_ms == 200.0
+    last_minute = store.get_summary(MetricsWindow.MINUTE, now=now)
+    assert last_minute.requests_by_model == {"gpt-4o": 1}
+
+
+def test_model_stats_combine_latency_cost_and_errors(store):
+    for generation in (100.0, 200.0, 300.0):
+        store.record(make_metric(latency_ms=generation + 50, generation_ms=generation))
+    # Neither waited on the provider, so neither says anything about its latency
+    unbilled = {"generation_ms": 900.0, "total_tokens": 0, "estimated_cost_usd": 0.0}
+    store.record(make_metric(cached=True, **unbilled))
+    store.record(make_metric(coalesced=True, **unbilled))
+    store.record_model_error("gpt-4o-mini")
+    store.record_model_error("gpt-4o")
+
+    stats = store.model_stats(300)
+    mini = stats["gpt-4o-mini"]
+    assert (mini.requests, mini.errors) == (5, 1)
+    assert mini.p95_generation_ms == pytest.approx(300, rel=0.01)
+    assert mini.cost_per_token == pytest.approx(0.0000675 / 150)
+    assert stats["gpt-4o"].error_rate == 1.0
+    assert stats["gpt-4o"].cost_per_token is None
+    assert store.get_summary().errors_by_model == {"gpt-4o-mini": 1, "gpt-4o": 1}
+
+
+def test_time_buckets_expire_after_retention():
+    store = MetricsStore(bucket_seconds=60, retention_seconds=3600)
+    now = 1_000_000.0
+    store.record(make_metric(timestamp=now - 7200))
+    store.record(make_metric(timestamp=now))
+
+    assert store.get_summary(MetricsWindow.DAY, now=now).total_requests == 1
+    assert store.get_summary().total_requests == 2
+
+
+def test_timeseries_rows_per_bucket_and_key(store):
+    now = 1_000_020.0
+    store.record(make_metric(timestamp=now - 120, total_tokens=10))
+    store.record(make_metric(timestamp=now - 110, total_tokens=20))
+    store.record(make_metric(timestamp=now, model_used="gpt-4o"))
+
+    series = store.get_timeseries(MetricsWindow.FIVE_MINUTES, now=now)
+    assert series.bucket_seconds == 60
+    assert [(b.bucket_start, b.model, b.requests) for b in series.buckets] == [
+        (999_900.0, "gpt-4o-mini", 2),
+        (1_000_020.0, "gpt-4o", 1),
+    ]
+    assert series.buckets[0].total_tokens == 30
+
+
+async def test_metrics_survive_restart_via_snapshot_and_log_tail(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    store = MetricsStore(persist=True)
+    log = SQLiteMetricsLog(path, keep_rows=10)
+    store.record(make_metric(latency_ms=100.0))
+    store.record_cache_lookup(hit=True)
+    await flush_metrics(store, log, snapshot=True)
+    span = Span(name="classify", start_ms=0.0, duration_ms=1.5)
+    store.record(make_metric(latency_ms=300.0, model_used="gpt-4o", spans=[span]))
+    store.record_cache_lookup(hit=False)
+    await flush_metrics(store, log)
+    log.close()
+
+    log = SQLiteMetricsLog(path, keep_rows=10)
+    restored = MetricsStore(persist=True)
+    replay = restore_metrics(restored, log)
+    log.close()
+
+    assert replay.snapshot is not None
+    assert len(replay.metrics) == 1
+    assert restored.get_summary() == store.get_summary()
+    assert restored.get_summary(MetricsWindow.HOUR) == store.get_summary(MetricsWindow.HOUR)
+    assert restored.get_recent(10) == store.get_recent(10)
+
+
+async def test_snapshot_compacts_log_to_recent_rows(tmp_path):
+    store = MetricsStore(capacity=3, persist=True)
+    log = SQLiteMetricsLog(str(tmp_path / "metrics.db"), keep_rows=3)
+    for i in range(10):
+        store.record(make_metric(latency_ms=float(i)))
+    await flush_metrics(store, log, snapshot=True)
+
+    replay = log.load()
+    log.close()
+    assert replay.metrics == []
+    assert [m.latency_ms for m in replay.recent] == [7.0, 8.0, 9.0]
+    assert replay.snapshot["lifetime"]["rollups"][0][3]["requests"] == 10
+
+
+def test_prometheus_exposition(store):
+    store.record(make_metric(latency_ms=200.0, classification_ms=0.5, generation_ms=199.5))
+    store.record(make_metric(latency_ms=3000.0))
+    store.record_cache_lookup(hit=True)
+    with store.in_flight():
+        text = store.render_prometheus()
+
+    labels = 'model="gpt-4o-mini",complexity="system1",classifier="heuristic"'
+    assert f"smart_router_requests_total{{{labels}}} 2" in text
+    assert f'smart_router_tokens_total{{{labels},type="completion"}} 200' in text
+    assert "smart_router_cache_hits_total 1" in text
+    latency = 'model="gpt-4o-mini",complexity="system1"'
+    assert f'smart_router_request_duration_seconds_bucket{{{latency},le="0.25"}} 1' in text
+    assert f'smart_router_request_duration_seconds_bucket{{{latency},le="+Inf"}} 2' in text
+    assert 'smart_router_classification_duration_seconds_count{classifier="heuristic"} 1' in text
+    assert "smart_router_in_flight_requests 1" in text
+    assert "smart_router_in_flight_requests 0" in store.render_prometheus()
+
+
+def test_file_exporter_writes_one_json_line_per_request(tmp_path):
+    spans = SpanRecorder()
+    with spans.span("classify"):
+        pass
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    exporter.export(make_metric(spans=spans.spans))
+    exporter.export(make_metric())
+    exporter.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["spans"][0]["name"] == "classify"
+    assert lines[1]["spans"] == []
+
+
 def test_clear(store):
     store.record(make_metric())
     store.clear()
@@ -115,3 +338,34 @@ def test_build_metric():
     assert metric.complexity == ComplexityLevel.SYSTEM1
     assert metric.latency_ms == 150.0
     assert metric.total_tokens == 150
+
+
+def test_build_metric_prices_the_requested_model():
+    classification = ClassificationResult(
+        complexity=ComplexityLevel.SYSTEM2,
+        confidence=0.9,
+        reasoning="test",
+        classifier_used="heuristic",
+    )
+    llm_response = LLMResponse(
+        content="Hello!",
+        model="gpt-4o-2024-08-06",
+        prompt_tokens=50,
+        completion_tokens=100,
+        total_tokens=150,
+    )
+
+    metric = MetricsCollector.build_metric(
+        query="Hi",
+        classification=classification,
+        llm_response=llm_response,
+        latency_ms=150.0,
+        model_pricing=TEST_PRICING,
+        model="gpt-4o",
+    )
+
+    assert metric.model_used == "gpt-4o"
+    assert metric.estimated_cost_usd == MetricsCollector.calculate_cost(
+        "gpt-4o", 50, 100, TEST_PRICING
+    )
+    assert metric.estimated_cost_usd > 0
@@ -1,11 +1,32 @@
-import pytest
+import asyncio
+from collections import Counter
 from unittest.mock import AsyncMock, MagicMock
 
+import httpx
+import openai
+import pytest
+
+from app.cache.response import ResponseCache
+from app.cache.semantic import SemanticResponseCache
 from app.config import Settings
-from app.llm.base import LLMResponse
+from app.exceptions import CircuitOpenError, OverloadedError
+from app.llm.base import LLMResponse, LLMStreamChunk
 from app.metrics.store import MetricsStore
-from app.models import ClassificationResult, ComplexityLevel, RouteRequest
+from app.metrics.tracing import InMemoryExporter
+from app.models import (
+    CircuitState,
+    ClassificationResult,
+    ComplexityLevel,
+    Priority,
+    RequestMetric,
+    RouteRequest,
+)
+from app.router.admission import AdmissionController
+from app.router.breaker import CircuitBreaker
+from app.router.hedging import Hedger
+from app.router.ladder import ModelLadder
 from app.router.router import SmartRouter
+from app.router.singleflight import SingleFlight
 
 
 def make_settings(**overrides):
@@ -124,6 +145,10 @@ async def test_metrics_are_recorded(router, metrics_store):
 
     summary = metrics_store.get_summary()
     assert summary.total_requests == 1
+    metric = metrics_store.get_recent(1)[0]
+    assert metric.classification_ms is not None
+    assert metric.generation_ms is not None
+    assert "smart_router_in_flight_requests 0" in metrics_store.render_prometheus()
 
 
 @pytest.mark.asyncio
@@ -138,3 +163,645 @@ async def test_response_includes_token_usage(router):
     request = RouteRequest(query="Hello!")
     response = await router.route(request)
     assert response.token_usage["total_tokens"] == 150
+
+
+@pytest.mark.asyncio
+async def test_response_cache_serves_repeats(
+    mock_classifier, mock_llm_client, metrics_store, settings
+):
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=settings,
+        response_cache=ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=1 << 20),
+    )
+
+    first = await router.route(RouteRequest(query="What is Python?"))
+    second = await router.route(RouteRequest(query="what is python"))
+
+    mock_llm_client.generate.assert_called_once()
+    assert not first.cached
+    assert second.cached
+    assert second.answer == first.answer
+    assert second.estimated_cost_usd == 0.0
+    summary = metrics_store.get_summary()
+    assert (summary.cache_hits, summary.cache_misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_serves_paraphrases(
+    mock_classifier, mock_llm_client, metrics_store, settings
+):
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=settings,
+        semantic_cache=SemanticResponseCache(
+            thresholds={ComplexityLevel.SYSTEM1: 0.9, ComplexityLevel.SYSTEM2: 0.9},
+            max_entries=10,
+            ttl_seconds=60,
+        ),
+    )
+
+    await router.route(RouteRequest(query="What's the capital of France?"))
+    response = await router.route(RouteRequest(query="capital of france"))
+
+    mock_llm_client.generate.assert_called_once()
+    assert response.cached
+    assert metrics_store.get_summary().semantic_cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced(router, mock_llm_client, metrics_store):
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(0.01)
+        return make_llm_response()
+
+    mock_llm_client.generate.side_effect = slow_generate
+
+    requests = [RouteRequest(query="Hello!") for _ in range(3)]
+    responses = await asyncio.gather(*(router.route(request) for request in requests))
+
+    mock_llm_client.generate.assert_called_once()
+    assert sorted(r.coalesced for r in responses) == [False, True, True]
+    assert sum(r.estimated_cost_usd > 0 for r in responses) == 1
+    summary = metrics_store.get_summary()
+    assert summary.total_requests == 3
+    assert summary.coalesced_requests == 2
+
+
+def make_stream(fail_models=()):
+    async def generate_stream(query, system_prompt=None, model=None):
+        if model in fail_models:
+            raise RuntimeError("provider unavailable")
+        for word in ["Test ", "answer"]:
+            yield LLMStreamChunk(delta=word)
+        yield LLMStreamChunk(response=make_llm_response(model))
+
+    return generate_stream
+
+
+@pytest.mark.asyncio
+async def test_route_stream_emits_classification_deltas_and_done(
+    router, mock_llm_client, metrics_store
+):
+    mock_llm_client.generate_stream = make_stream()
+
+    events = [event async for event in router.route_stream(RouteRequest(query="Hello!"))]
+
+    names = [name for name, _ in events]
+    assert names == ["classification", "delta", "delta", "done"]
+    assert events[0][1]["model"] == "gpt-4o-mini"
+    assert "".join(data["text"] for name, data in events if name == "delta") == "Test answer"
+    done = events[-1][1]
+    assert done["token_usage"]["total_tokens"] == 150
+    assert done["ttft_ms"] is not None
+    assert metrics_store.get_recent(1)[0].ttft_ms == done["ttft_ms"]
+
+
+@pytest.mark.asyncio
+async def test_route_stream_falls_back_before_first_token(router, mock_llm_client):
+    mock_llm_client.generate_stream = make_stream(fail_models={"gpt-4o-mini"})
+
+    events = [event async for event in router.route_stream(RouteRequest(query="Hello!"))]
+
+    assert ("fallback", {"model": "gpt-4o"}) in events
+    assert events[-1][1]["model_used"] == "gpt-4o"
+
+
+@pytest.mark.asyncio
+async def test_route_records_stage_spans(mock_classifier, mock_llm_client, metrics_store):
+    mock_llm_client.generate.side_effect = [RuntimeError("down"), make_llm_response("gpt-4o")]
+    tracer = InMemoryExporter()
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(),
+        tracer=tracer,
+    )
+
+    response = await router.route(RouteRequest(query="Hello!", include_spans=True))
+
+    names = [span.name for span in response.spans]
+    assert names == ["classify", "cache_lookup", "generate", "fallback", "record"]
+    generate, fallback = response.spans[2], response.spans[3]
+    assert generate.attributes == {"model": "gpt-4o-mini", "attempt": "1", "error": "RuntimeError"}
+    assert fallback.attributes == {"model": "gpt-4o", "attempt": "2"}
+    assert fallback.start_ms >= generate.start_ms + generate.duration_ms
+    # The stored row is packed before its own record span ends
+    assert metrics_store.get_recent(1)[0].spans == response.spans[:-1]
+    assert tracer.traces()[0].spans == response.spans
+
+
+@pytest.mark.asyncio
+async def test_spans_are_omitted_from_response_unless_requested(router):
+    response = await router.route(RouteRequest(query="Hello!"))
+    assert response.spans is None
+
+
+def make_speculative_router(
+    mock_classifier, mock_llm_client, metrics_store, classify_delay, **kwargs
+):
+    async def slow_classify(query):
+        await asyncio.sleep(classify_delay)
+        return mock_classifier.classify.return_value
+
+    mock_classifier.name = "llm"
+    mock_classifier.classify.side_effect = slow_classify
+    return SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(speculative_system1=True),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_speculative_system1_answer_is_used(mock_classifier, mock_llm_client, metrics_store):
+    router = make_speculative_router(mock_classifier, mock_llm_client, metrics_store, 0.01)
+
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    mock_llm_client.generate.assert_called_once()
+    assert response.model_used == "gpt-4o-mini"
+    summary = metrics_store.get_summary()
+    assert summary.speculative_used == 1
+    assert summary.speculative_latency_saved_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_cached_answer_is_not_speculated(mock_classifier, mock_llm_client, metrics_store):
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, max_bytes=1 << 20)
+    router = make_speculative_router(
+        mock_classifier, mock_llm_client, metrics_store, 0.01, response_cache=cache
+    )
+
+    await router.route(RouteRequest(query="Hello!"))
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    mock_llm_client.generate.assert_called_once()
+    assert response.cached
+    summary = metrics_store.get_summary()
+    assert (summary.cache_hits, summary.cache_misses) == (1, 1)
+    assert summary.speculative_used == 1
+
+
+@pytest.mark.asyncio
+async def test_only_the_leader_speculates(mock_classifier, mock_llm_client, metrics_store):
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(0.02)
+        return make_llm_response()
+
+    mock_llm_client.generate.side_effect = slow_generate
+    router = make_speculative_router(mock_classifier, mock_llm_client, metrics_store, 0.01)
+
+    responses = await asyncio.gather(
+        *(router.route(RouteRequest(query="Hello!")) for _ in range(3))
+    )
+
+    mock_llm_client.generate.assert_called_once()
+    assert sorted(r.coalesced for r in responses) == [False, True, True]
+    assert metrics_store.get_summary().speculative_used == 1
+
+
+@pytest.mark.asyncio
+async def test_followers_share_a_speculation_that_beat_classification(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    async def fast_generate(**kwargs):
+        await asyncio.sleep(0.02)
+        return make_llm_response()
+
+    mock_llm_client.generate.side_effect = fast_generate
+    router = make_speculative_router(mock_classifier, mock_llm_client, metrics_store, 0.05)
+
+    responses = await asyncio.gather(
+        *(router.route(RouteRequest(query="Hello!")) for _ in range(4))
+    )
+
+    mock_llm_client.generate.assert_called_once()
+    assert sorted(r.coalesced for r in responses) == [False, True, True, True]
+    assert [r.estimated_cost_usd for r in responses if r.coalesced] == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("abandon", ["cancel", "fail"])
+async def test_single_flight_waiters_take_over_an_abandoned_call(abandon):
+    flight = SingleFlight()
+    calls = []
+
+    async def work(name):
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        if name == "speculation" and abandon == "fail":
+            raise RuntimeError("provider down")
+        return name
+
+    leader, led = flight.lead("key", lambda: work("speculation"))
+    assert led
+    assert flight.lead("key", lambda: work("other")) == (leader, False)
+    waiter = asyncio.create_task(flight.do("key", lambda: work("waiter")))
+    await asyncio.sleep(0)
+    if abandon == "cancel":
+        leader.cancel()
+
+    assert await waiter == ("waiter", False)
+    assert calls == ["speculation", "waiter"]
+    with pytest.raises(RuntimeError if abandon == "fail" else asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_failed_speculation_is_retried_by_the_regular_path(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    mock_llm_client.generate.side_effect = [
+        openai.APIConnectionError(request=httpx.Request("POST", "https://llm.test")),
+        make_llm_response(),
+    ]
+    router = make_speculative_router(mock_classifier, mock_llm_client, metrics_store, 0.01)
+
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    assert mock_llm_client.generate.call_count == 2
+    assert response.model_used == "gpt-4o-mini"
+    assert metrics_store.get_summary().speculative_discarded == 1
+
+
+@pytest.mark.asyncio
+async def test_speculative_system1_is_discarded_for_system2(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    mock_classifier.classify.return_value = ClassificationResult(
+        complexity=ComplexityLevel.SYSTEM2,
+        confidence=0.9,
+        reasoning="complex",
+        classifier_used="llm",
+    )
+    router = make_speculative_router(mock_classifier, mock_llm_client, metrics_store, 0.01)
+
+    response = await router.route(RouteRequest(query="Write a merge sort implementation"))
+
+    # The fast speculative call completed first, so its spend is counted as wasted
+    assert [call.kwargs["model"] for call in mock_llm_client.generate.call_args_list] == [
+        "gpt-4o-mini",
+        "gpt-4o",
+    ]
+    assert response.model_used == "gpt-4o"
+    summary = metrics_store.get_summary()
+    assert summary.speculative_discarded == 1
+    assert summary.speculative_wasted_tokens == 150
+    assert summary.speculative_wasted_cost_usd > 0
+
+
+def make_call(delays):
+    """Provider stub whose n-th call takes delays[n] seconds."""
+    calls = []
+
+    async def call(model):
+        calls.append(model)
+        await asyncio.sleep(delays[len(calls) - 1])
+        return make_llm_response(model)
+
+    return call, calls
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_when_primary_is_slow():
+    call, calls = make_call([1.0, 0.0])
+    hedger = Hedger(delay_ms=10, budget=1.0)
+
+    outcome = await hedger.run(call, "gpt-4o-mini", "gpt-4o")
+
+    assert calls == ["gpt-4o-mini", "gpt-4o"]
+    assert outcome.hedged and outcome.hedge_won
+    assert outcome.model == "gpt-4o"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedge_cancels_both_attempts():
+    cancelled = []
+
+    async def call(model):
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return make_llm_response(model)
+
+    hedger = Hedger(delay_ms=10, budget=1.0)
+    run = asyncio.create_task(hedger.run(call, "gpt-4o-mini", "gpt-4o"))
+    await asyncio.sleep(0.05)
+    run.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    await asyncio.sleep(0)
+    assert sorted(cancelled) == ["gpt-4o", "gpt-4o-mini"]
+
+
+@pytest.mark.asyncio
+async def test_hedge_respects_budget():
+    call, calls = make_call([0.05])
+    hedger = Hedger(delay_ms=10, budget=0.0)
+
+    outcome = await hedger.run(call, "gpt-4o-mini", "gpt-4o-mini")
+
+    assert calls == ["gpt-4o-mini"]
+    assert not outcome.hedged
+
+
+def test_hedge_delay_learned_from_p95():
+    hedger = Hedger(delay_ms=None, budget=0.1, min_samples=20)
+    assert hedger.delay_for("gpt-4o-mini") is None
+
+    for i in range(1, 101):
+        hedger.observe("gpt-4o-mini", i / 100)
+    assert hedger.delay_for("gpt-4o-mini") == pytest.approx(0.95)
+
+
+@pytest.mark.asyncio
+async def test_router_records_hedges(mock_classifier, mock_llm_client, metrics_store):
+    call, _ = make_call([1.0, 0.0])
+
+    async def generate(query, system_prompt, model):
+        return await call(model)
+
+    mock_llm_client.generate.side_effect = generate
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(hedge_enabled=True, hedge_delay_ms=10, hedge_budget=1.0),
+    )
+
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    assert response.model_used == "gpt-4o-mini"
+    summary = metrics_store.get_summary()
+    assert (summary.hedges_fired, summary.hedges_won) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_admission_serves_interactive_lane_before_batch():
+    admission = AdmissionController(max_in_flight=1, queue_timeout_seconds=1.0)
+    order = []
+
+    async def worker(name, priority):
+        async with admission.admit("gpt-4o-mini", priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with admission.admit("gpt-4o-mini"):
+        tasks = [asyncio.create_task(worker("batch", Priority.BATCH))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("interactive", Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert admission.stats()["gpt-4o-mini"] == {"in_flight": 1, "queued": 2, "limit": 1}
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive", "batch"]
+    assert admission.stats()["gpt-4o-mini"] == {"in_flight": 0, "queued": 0, "limit": 1}
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_after_queue_deadline():
+    admission = AdmissionController(max_in_flight=1, queue_timeout_seconds=0.01)
+
+    async with admission.admit("gpt-4o-mini"):
+        with pytest.raises(OverloadedError):
+            async with admission.admit("gpt-4o-mini"):
+                pass
+
+    assert admission.stats()["gpt-4o-mini"]["queued"] == 0
+    async with admission.admit("gpt-4o-mini") as waited:
+        assert waited == 0.0
+
+
+@pytest.mark.asyncio
+async def test_router_rejects_overload_without_falling_back(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    admission = AdmissionController(max_in_flight=1, queue_timeout_seconds=0.01)
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(),
+        admission=admission,
+    )
+
+    async with admission.admit("gpt-4o-mini"):
+        with pytest.raises(OverloadedError):
+            await router.route(RouteRequest(query="Hello!"))
+
+    mock_llm_client.generate.assert_not_called()
+    assert metrics_store.get_summary().admission_rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_router_records_queue_wait(mock_classifier, mock_llm_client, metrics_store):
+    admission = AdmissionController(max_in_flight=1, queue_timeout_seconds=1.0)
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(single_flight_enabled=False),
+        admission=admission,
+    )
+
+    async with admission.admit("gpt-4o-mini"):
+        pending = asyncio.create_task(router.route(RouteRequest(query="Hello!")))
+        await asyncio.sleep(0.02)
+    await pending
+
+    metric = metrics_store.get_recent(1)[0]
+    assert metric.queue_wait_ms >= 15
+    assert "queue_wait" in [span.name for span in metric.spans]
+
+
+def fail_through(breaker, model):
+    with pytest.raises(RuntimeError), breaker.guard(model):
+        raise RuntimeError("provider error")
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_then_probes_and_closes():
+    breaker = CircuitBreaker(min_requests=2, error_rate_threshold=0.5, open_seconds=0.05)
+
+    fail_through(breaker, "gpt-4o-mini")
+    assert breaker.state("gpt-4o-mini") == CircuitState.CLOSED
+    fail_through(breaker, "gpt-4o-mini")
+    assert breaker.state("gpt-4o-mini") == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError), breaker.guard("gpt-4o-mini"):
+        pass
+
+    await asyncio.sleep(0.06)
+    assert breaker.state("gpt-4o-mini") == CircuitState.HALF_OPEN
+    fail_through(breaker, "gpt-4o-mini")  # failed probe reopens
+    assert breaker.state("gpt-4o-mini") == CircuitState.OPEN
+
+    await asyncio.sleep(0.06)
+    with breaker.guard("gpt-4o-mini"):
+        pass
+    assert breaker.state("gpt-4o-mini") == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_admission_waits_and_rejections_do_not_open_the_circuit(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    breaker = CircuitBreaker(min_requests=1, slow_call_ms=10, open_seconds=60)
+    admission = AdmissionController(max_in_flight=1, queue_timeout_seconds=0.03)
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(fallback_to_system2=False),
+        admission=admission,
+        breaker=breaker,
+    )
+
+    async with admission.admit("gpt-4o-mini"):
+        with pytest.raises(OverloadedError):
+            await router.route(RouteRequest(query="Hello!"))
+    assert breaker.state("gpt-4o-mini") == CircuitState.CLOSED
+
+    async def release_soon():
+        async with admission.admit("gpt-4o-mini"):
+            await asyncio.sleep(0.015)
+
+    holder = asyncio.create_task(release_soon())
+    await asyncio.sleep(0)
+    await router.route(RouteRequest(query="Hello!"))
+    await holder
+
+    # Queued past slow_call_ms, but the provider call itself was fast
+    assert metrics_store.get_recent(1)[0].queue_wait_ms >= 10
+    assert breaker.state("gpt-4o-mini") == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_routes_straight_to_fallback(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    breaker = CircuitBreaker(min_requests=1, open_seconds=60)
+    fail_through(breaker, "gpt-4o-mini")
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(),
+        breaker=breaker,
+    )
+    mock_llm_client.generate.return_value = make_llm_response("gpt-4o")
+
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    assert response.model_used == "gpt-4o"
+    assert mock_llm_client.generate.call_args_list[0].kwargs["model"] == "gpt-4o"
+    assert mock_llm_client.generate.call_count == 1
+    assert metrics_store.get_summary().circuit_rejected == 1
+
+
+def record_calls(store, model, n, latency_ms=200.0, cost_usd=0.0001, errors=0):
+    for _ in range(n):
+        store.record(
+            RequestMetric(
+                query_length=10,
+                complexity=ComplexityLevel.SYSTEM1,
+                classifier_used="heuristic",
+                classification_confidence=0.9,
+                model_used=model,
+                latency_ms=latency_ms,
+                generation_ms=latency_ms,
+                prompt_tokens=50,
+                completion_tokens=50,
+                total_tokens=100,
+                estimated_cost_usd=cost_usd,
+            )
+        )
+    for _ in range(errors):
+        store.record_model_error(model)
+
+
+@pytest.mark.asyncio
+async def test_model_stats_key_successes_by_requested_model(router, mock_llm_client, metrics_store):
+    # Providers often answer with a dated variant of the requested model
+    mock_llm_client.generate.return_value = make_llm_response("gpt-4o-mini-2024-07-18")
+    await router.route(RouteRequest(query="Hello!"))
+    metrics_store.record_model_error("gpt-4o-mini")
+
+    stats = metrics_store.model_stats(300)
+    assert stats.keys() == {"gpt-4o-mini"}
+    assert (stats["gpt-4o-mini"].requests, stats["gpt-4o-mini"].errors) == (1, 1)
+
+
+def make_ladder(store, **kwargs):
+    return ModelLadder(
+        [["gemini-2.5-flash-lite", "gpt-4o-mini"], ["gemini-2.5-flash", "gpt-4o"]],
+        store,
+        make_settings().model_pricing,
+        min_requests=5,
+        refresh_seconds=0,
+        **kwargs,
+    )
+
+
+def test_ladder_picks_within_tier_from_live_stats(metrics_store):
+    ladder = make_ladder(metrics_store, objective="cost", latency_slo_ms=1000)
+    # No stats yet: cheapest list price
+    assert ladder.select(0) == "gemini-2.5-flash-lite"
+
+    record_calls(metrics_store, "gemini-2.5-flash-lite", 10, latency_ms=3000)
+    record_calls(metrics_store, "gpt-4o-mini", 10, latency_ms=400, cost_usd=0.001)
+    assert ladder.select(0) == "gpt-4o-mini"  # cheaper one misses the SLO
+
+    record_calls(metrics_store, "gpt-4o-mini", 0, errors=10)
+    assert ladder.select(0) == "gemini-2.5-flash-lite"  # error rate over 20%
+
+    latency_ladder = make_ladder(metrics_store)
+    record_calls(metrics_store, "gpt-4o", 10, latency_ms=900)
+    record_calls(metrics_store, "gemini-2.5-flash", 10, latency_ms=1500)
+    assert latency_ladder.select(1) == "gpt-4o"
+
+
+def test_ladder_sends_only_probes_to_models_without_stats(metrics_store):
+    ladder = make_ladder(metrics_store, probe_share=0.1)
+    record_calls(metrics_store, "gpt-4o-mini", 10, latency_ms=800)
+    # gemini-2.5-flash-lite has no stats in the window (new, or degraded and aged out)
+
+    picks = Counter(ladder.select(0) for _ in range(100))
+
+    assert picks == {"gpt-4o-mini": 90, "gemini-2.5-flash-lite": 10}
+    assert make_ladder(metrics_store, probe_share=0).select(0) == "gpt-4o-mini"
+
+
+@pytest.mark.asyncio
+async def test_ladder_routes_by_tier_and_falls_back_one_tier_up(
+    mock_classifier, mock_llm_client, metrics_store
+):
+    router = SmartRouter(
+        classifier=mock_classifier,
+        llm_client=mock_llm_client,
+        metrics_store=metrics_store,
+        settings=make_settings(),
+        ladder=make_ladder(metrics_store),
+    )
+
+    async def generate(query, system_prompt, model):
+        if model == "gemini-2.5-flash-lite":
+            raise RuntimeError("provider down")
+        return make_llm_response(model)
+
+    mock_llm_client.generate.side_effect = generate
+
+    response = await router.route(RouteRequest(query="Hello!"))
+
+    assert response.model_used == "gemini-2.5-flash"
+    assert metrics_store.get_summary().errors_by_model == {"gemini-2.5-flash-lite": 1}